@@ -0,0 +1,111 @@
+from typing import List
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-size set membership with false positives but no false negatives.
+
+    Sized for capacity items at error_rate; past capacity the false
+    positive rate climbs. Positions come from one 128-bit blake2b digest
+    split into two hashes (Kirsch-Mitzenmacher double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> range:
+        digest = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest(), 'little')
+        # The second hash is odd, so the probe sequence never collapses onto one bit
+        first, second = digest >> 64, (digest & 0xFFFFFFFFFFFFFFFF) | 1
+        # first + i * second for i < hashes; reduced modulo size by the caller
+        return range(first, first + self.hashes * second, second)
+
+    def add(self, item: str) -> bool:
+        """Add item; True when it was not (as far as the filter can tell) already present."""
+        bits, size = self.bits, self.size
+        added = False
+        for position in self._positions(item):
+            position %= size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        bits, size = self.bits, self.size
+        for position in self._positions(item):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+class ScalableBloomFilter:
+    """A Bloom filter that grows instead of degrading once it fills up.
+
+    When the newest filter reaches its capacity another one is added with
+    growth times the capacity and a tighter error rate, so the combined
+    false positive rate stays below error_rate however many items are
+    added, and memory grows with the items seen rather than being
+    reserved up front (Almeida et al., "Scalable Bloom Filters").
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 100000,
+        error_rate: float = 0.0001,
+        growth: int = 2,
+        tightening: float = 0.5
+    ):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters: List[BloomFilter] = []
+        self._grow()
+
+    def _grow(self):
+        index = len(self.filters)
+        self.filters.append(BloomFilter(
+            self.initial_capacity * self.growth ** index,
+            # Error rates form a geometric series summing to error_rate
+            self.error_rate * (1 - self.tightening) * self.tightening ** index
+        ))
+
+    def add(self, item: str) -> bool:
+        """Add item; True when it was not already present."""
+        if any(item in bloom for bloom in self.filters[:-1]):
+            return False
+        if len(self.filters[-1]) >= self.filters[-1].capacity:
+            if item in self.filters[-1]:
+                return False
+            self._grow()
+        return self.filters[-1].add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom for bloom in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(len(bloom) for bloom in self.filters)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bloom.nbytes for bloom in self.filters)
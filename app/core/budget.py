@@ -0,0 +1,119 @@
+from typing import Any, Dict, List
+import re
+
+from app.core.llm_dispatch import count_tokens, get_encoding
+
+# Blocks are paragraphs, headings and list items, separated by blank lines
+BLOCK_SEPARATOR = '\n\n'
+
+# Rough size of a token when the model's encoding cannot be loaded, as in count_tokens
+CHARS_PER_TOKEN = 4
+
+# Menus, tag clouds and related-link lists come through as runs of short,
+# unpunctuated blocks; this many in a row are dropped
+LINK_RUN_LENGTH = 4
+LINK_BLOCK_MAX_WORDS = 5
+
+# Phrasing of cookie and consent banners; an article about cookies rarely
+# says these in a short paragraph
+CONSENT = re.compile(
+    r'\b(we|this (web)?site|our (web)?site|we and our partners) uses? cookies\b'
+    r'|\baccept (all )?cookies\b'
+    r'|\bcookie (settings|preferences|policy|notice)\b'
+    r'|\bmanage (your )?(cookie|consent|privacy) (settings|preferences|choices)\b',
+    re.IGNORECASE
+)
+CONSENT_MAX_WORDS = 80
+
+BOILERPLATE = re.compile(
+    r'^(advertisement|sponsored|share( this( article| story| post)?)?|read more|continue reading|'
+    r'skip to (main )?content|back to top|sign up for (our|the) newsletter|subscribe( now)?|'
+    r'all rights reserved|click here|log ?in|sign ?in|sign ?up|menu|search)\W*$',
+    re.IGNORECASE
+)
+
+
+def truncate_tokens(text: str, max_tokens: int, model_name: str) -> str:
+    """The longest prefix of text within max_tokens, cut back to a word boundary."""
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        prefix = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        prefix = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    if len(prefix) < len(text) and ' ' in prefix:
+        prefix = prefix.rsplit(' ', 1)[0]
+    return prefix
+
+
+def _is_short(block: str) -> bool:
+    return len(block.split()) <= LINK_BLOCK_MAX_WORDS and not block.rstrip().endswith(('.', '!', '?', ':'))
+
+
+def informative_blocks(blocks: List[str]) -> List[str]:
+    """Drop repeated blocks, boilerplate lines, consent banners and runs of link-like blocks."""
+    seen = set()
+    kept: List[str] = []
+    for block in blocks:
+        key = ' '.join(block.lower().split())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        if BOILERPLATE.match(key):
+            continue
+        if len(key.split()) <= CONSENT_MAX_WORDS and CONSENT.search(key):
+            continue
+        kept.append(block)
+
+    # Runs of short blocks are navigation rather than content
+    filtered: List[str] = []
+    run: List[str] = []
+    for block in kept + [None]:
+        if block is not None and _is_short(block):
+            run.append(block)
+            continue
+        if len(run) < LINK_RUN_LENGTH:
+            filtered.extend(run)
+        run = []
+        if block is not None:
+            filtered.append(block)
+    return filtered
+
+
+def fit_to_budget(text: str, model_name: str, max_tokens: int = 0) -> Dict[str, Any]:
+    """Prepare extracted text for the LLM.
+
+    Low-information blocks are removed, then whole blocks are kept in
+    page order until max_tokens is reached; the block that crosses the
+    limit is cut at a word boundary. max_tokens of 0 only cleans. Returns
+    the text with paragraph breaks intact and token counts before and
+    after.
+    """
+    blocks = [block.strip() for block in text.split(BLOCK_SEPARATOR)]
+    blocks = [block for block in blocks if block]
+    counts = {block: count_tokens(block, model_name) for block in blocks}
+    kept = informative_blocks(blocks)
+    separator = count_tokens(BLOCK_SEPARATOR, model_name)
+
+    budgeted: List[str] = []
+    tokens = 0
+    truncated = False
+    for block in kept:
+        cost = counts[block] + (separator if budgeted else 0)
+        if max_tokens and tokens + cost > max_tokens:
+            truncated = True
+            remaining = max_tokens - tokens - (separator if budgeted else 0)
+            partial = truncate_tokens(block, remaining, model_name) if remaining > 0 else ''
+            if partial:
+                tokens += count_tokens(partial, model_name) + (separator if budgeted else 0)
+                budgeted.append(partial)
+            break
+        budgeted.append(block)
+        tokens += cost
+
+    return {
+        'text': BLOCK_SEPARATOR.join(budgeted),
+        'tokens': tokens,
+        'source_tokens': sum(counts[block] for block in blocks) + separator * max(len(blocks) - 1, 0),
+        'dropped_blocks': len(blocks) - len(kept),
+        'truncated': truncated
+    }
@@ -0,0 +1,160 @@
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models import SummaryCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Failures of the database tier; it is a cache, so they count as misses or skipped writes
+DATABASE_ERRORS = (SQLAlchemyError, OSError, asyncio.TimeoutError)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share a cache key."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def summary_cache_key(text: str, model: str, prompt: str) -> str:
+    """Hash the normalized text together with the model and prompt."""
+    digest = hashlib.sha256()
+    for part in (model, prompt, normalize_text(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Two-tier summary cache: an in-process LRU in front of Postgres.
+
+    Both tiers expire entries after ttl_seconds. The memory tier holds at
+    most max_entries summaries and the database tier at most max_rows. The
+    database tier is used when a session_factory is given; its errors are
+    logged and treated as a miss or a skipped write, never raised.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: int = 30 * 24 * 3600,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+        max_rows: int = 1000000,
+        prune_every: int = 1000
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats: Dict[str, int] = {'memory_hits': 0, 'database_hits': 0, 'misses': 0, 'database_errors': 0}
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            summary, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return summary
+
+    def _set_memory(self, key: str, summary: str):
+        with self._lock:
+            self._entries[key] = (summary, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _get_database(self, key: str) -> Optional[str]:
+        async with self.session_factory() as db:
+            entry = await db.get(SummaryCacheEntry, key)
+            if entry is None:
+                return None
+            if entry.created_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+                await db.delete(entry)
+                await db.commit()
+                return None
+            entry.last_used_at = datetime.utcnow()
+            await db.commit()
+            return entry.summary
+
+    async def _set_database(self, key: str, summary: str, model: str):
+        now = datetime.utcnow()
+        stmt = insert(SummaryCacheEntry).values(
+            key=key, model=model, summary=summary, created_at=now, last_used_at=now
+        )
+        # Concurrent jobs may summarise the same text; the last writer wins
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SummaryCacheEntry.key],
+            set_={'model': model, 'summary': summary, 'created_at': now, 'last_used_at': now}
+        )
+        async with self.session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def _prune_database(self):
+        async with self.session_factory() as db:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+            await db.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.created_at < cutoff))
+            # Evict the least recently used rows beyond the size bound
+            stale = (
+                select(SummaryCacheEntry.key)
+                .order_by(SummaryCacheEntry.last_used_at.desc())
+                .offset(self.max_rows)
+            )
+            await db.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.key.in_(stale)))
+            await db.commit()
+
+    async def get(self, key: str) -> Tuple[Optional[str], str]:
+        """Look a summary up; returns (summary, tier) with tier 'memory', 'database' or 'miss'."""
+        summary = self._get_memory(key)
+        if summary is not None:
+            self.stats['memory_hits'] += 1
+            return summary, 'memory'
+
+        if self.session_factory is not None:
+            try:
+                summary = await self._get_database(key)
+            except DATABASE_ERRORS:
+                self._database_error("read")
+                summary = None
+            if summary is not None:
+                self._set_memory(key, summary)
+                self.stats['database_hits'] += 1
+                return summary, 'database'
+
+        self.stats['misses'] += 1
+        return None, 'miss'
+
+    async def set(self, key: str, summary: str, model: str):
+        """Store a summary in both tiers."""
+        self._set_memory(key, summary)
+        if self.session_factory is None:
+            return
+        try:
+            await self._set_database(key, summary, model)
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                await self._prune_database()
+        except DATABASE_ERRORS:
+            self._database_error("write")
+
+    def _database_error(self, operation: str):
+        self.stats['database_errors'] += 1
+        logger.warning("Summary cache database %s failed; carrying on without it", operation, exc_info=True)
@@ -0,0 +1,144 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+import itertools
+import os
+from collections import Counter
+from urllib.parse import urlsplit
+
+from app.core.bloom import ScalableBloomFilter
+from app.core.urls import dedupe_urls
+
+# URLs waiting in one crawl's frontier; links found beyond this are dropped
+# (and can be found again later), which bounds a crawl's memory
+MAX_QUEUED = int(os.getenv("CRAWL_MAX_QUEUED", "100000"))
+
+# False positive rate of the visited set: the share of new URLs a crawl
+# wrongly skips as already seen
+VISITED_ERROR_RATE = float(os.getenv("CRAWL_VISITED_ERROR_RATE", "0.0001"))
+
+# Links to files that are never HTML, skipped before they cost a request
+SKIP_EXTENSIONS = frozenset({
+    '.7z', '.avi', '.bmp', '.css', '.csv', '.doc', '.docx', '.exe', '.gif', '.gz', '.ico', '.jpeg',
+    '.jpg', '.js', '.json', '.mov', '.mp3', '.mp4', '.ogg', '.pdf', '.png', '.ppt', '.pptx', '.rar',
+    '.rss', '.svg', '.tar', '.tgz', '.wav', '.webm', '.webp', '.woff', '.woff2', '.xls', '.xlsx',
+    '.xml', '.zip'
+})
+
+
+def site_domain(url: str) -> str:
+    """A seed URL's host without a leading www., so www. and bare hosts match each other."""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class CrawlFrontier:
+    """The URLs a crawl has found but not yet scraped, best first.
+
+    Shallower pages come first, and within a depth the host with the
+    fewest pages queued so far, so one large site cannot starve the
+    others. URLs are deduplicated through a scalable Bloom filter, which
+    keeps a few million seen URLs in a few megabytes at the cost of
+    wrongly skipping about VISITED_ERROR_RATE of new ones.
+
+    Limits: max_depth links away from a seed, max_pages scraped in
+    total, max_pages_per_domain per host, and only hosts under domains
+    (by default the seeds' own hosts and their subdomains).
+    """
+
+    def __init__(
+        self,
+        seeds: Iterable[str],
+        max_depth: int = 2,
+        max_pages: int = 100,
+        max_pages_per_domain: Optional[int] = None,
+        domains: Optional[List[str]] = None,
+        max_queued: int = MAX_QUEUED,
+        visited_error_rate: float = VISITED_ERROR_RATE
+    ):
+        seeds = dedupe_urls(seeds)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_pages_per_domain = max_pages_per_domain
+        self.domains = tuple(dict.fromkeys(
+            domain.lower().strip('.') for domain in (domains or [site_domain(url) for url in seeds])
+        ))
+        self.max_queued = max_queued
+        self.visited = ScalableBloomFilter(min(max_queued, 100000), visited_error_rate)
+        self.queue: List[Tuple[int, int, int, str]] = []
+        self._order = itertools.count()
+        # Pages queued per host, for fairness and max_pages_per_domain
+        self.host_pages: Counter = Counter()
+        self.scheduled = 0
+        self.stats = {
+            'queued': 0,
+            'duplicates': 0,
+            'off_domain': 0,
+            'too_deep': 0,
+            'skipped_files': 0,
+            'domain_limit': 0,
+            'dropped': 0
+        }
+        for url in seeds:
+            self.add(url, 0)
+
+    def allowed_host(self, host: str) -> bool:
+        return any(host == domain or host.endswith('.' + domain) for domain in self.domains)
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue a canonical URL found depth links from a seed; False if it was filtered out."""
+        if depth > self.max_depth:
+            self.stats['too_deep'] += 1
+            return False
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        if not self.allowed_host(host):
+            self.stats['off_domain'] += 1
+            return False
+        if os.path.splitext(parts.path)[1].lower() in SKIP_EXTENSIONS:
+            self.stats['skipped_files'] += 1
+            return False
+        if self.max_pages_per_domain is not None and self.host_pages[host] >= self.max_pages_per_domain:
+            self.stats['domain_limit'] += 1
+            return False
+        if len(self.queue) >= min(self.max_queued, self.max_pages - self.scheduled):
+            # More than will ever be scraped, or than memory allows; not marked
+            # visited, so a later page can offer it again
+            self.stats['dropped'] += 1
+            return False
+        if not self.visited.add(url):
+            self.stats['duplicates'] += 1
+            return False
+        heapq.heappush(self.queue, (depth, self.host_pages[host], next(self._order), url))
+        self.host_pages[host] += 1
+        self.stats['queued'] += 1
+        return True
+
+    def extend(self, urls: Iterable[str], depth: int) -> int:
+        """Queue the links of a page scraped at depth - 1; returns how many were new."""
+        if self.done or depth > self.max_depth:
+            return 0
+        return sum(self.add(url, depth) for url in urls)
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """The next (url, depth) to scrape, or None when empty or max_pages is reached."""
+        if self.done or not self.queue:
+            return None
+        depth, _, _, url = heapq.heappop(self.queue)
+        self.scheduled += 1
+        return url, depth
+
+    @property
+    def done(self) -> bool:
+        return self.scheduled >= self.max_pages
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def report(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            'scheduled': self.scheduled,
+            'waiting': len(self.queue),
+            'hosts': len(self.host_pages),
+            'visited_bytes': self.visited.nbytes
+        }
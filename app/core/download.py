@@ -0,0 +1,154 @@
+from typing import Any, Dict, Optional, Tuple
+import codecs
+import hashlib
+import re
+import zlib
+
+import aiohttp
+
+# Content types worth parsing; anything else is rejected before its body is read
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Requested with auto_decompress=False and inflated here, so output can be capped
+ACCEPT_ENCODING = "gzip, deflate"
+
+# How much of the body to look at for a <meta charset> before decoding starts
+SNIFF_BYTES = 4096
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class FetchError(Exception):
+    """A page that was fetched but cannot be used; retrying will not help."""
+
+    error_type = "fetch_error"
+
+
+class PageTooLargeError(FetchError):
+    error_type = "page_too_large"
+
+
+class UnsupportedContentTypeError(FetchError):
+    error_type = "unsupported_content_type"
+
+
+class UnsupportedEncodingError(FetchError):
+    error_type = "unsupported_content_encoding"
+
+
+def error_type(error: Exception) -> str:
+    """Short name recorded with a failed result."""
+    return getattr(error, 'error_type', type(error).__name__)
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_charset(head: bytes, declared: Optional[str] = None) -> str:
+    """Pick the encoding: a BOM, then the Content-Type charset, then <meta>, then UTF-8."""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    encoding = _codec(declared)
+    if encoding:
+        return encoding
+    match = META_CHARSET.search(head)
+    if match:
+        encoding = _codec(match.group(1).decode('ascii', 'ignore'))
+        if encoding:
+            return encoding
+    return "utf-8"
+
+
+def check_content_type(response: aiohttp.ClientResponse, allowed: Tuple[str, ...] = HTML_CONTENT_TYPES):
+    header = response.headers.get('Content-Type')
+    # A missing header is common on small sites; let the parser decide
+    if header is None:
+        return
+    mimetype = header.split(';', 1)[0].strip().lower()
+    if mimetype not in allowed:
+        response.close()
+        raise UnsupportedContentTypeError(f"Unsupported content type: {mimetype}")
+
+
+def _inflater(response: aiohttp.ClientResponse):
+    encoding = response.headers.get('Content-Encoding', '').strip().lower()
+    if encoding in ('', 'identity'):
+        return None
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        # 32 + MAX_WBITS accepts both gzip and zlib framing
+        return zlib.decompressobj(32 + zlib.MAX_WBITS)
+    response.close()
+    raise UnsupportedEncodingError(f"Unsupported content encoding: {encoding}")
+
+
+async def read_html(
+    response: aiohttp.ClientResponse,
+    max_bytes: int,
+    allowed_types: Tuple[str, ...] = HTML_CONTENT_TYPES,
+    chunk_size: int = 64 * 1024
+) -> Dict[str, Any]:
+    """Stream a response body into text without holding more than max_bytes.
+
+    The response must have been requested with auto_decompress=False:
+    compressed bodies are inflated here with the output capped, so a small
+    compressed payload cannot expand past the limit. Bytes are decoded
+    incrementally once the charset is known. Returns html, the number of
+    (decompressed) bytes read and a sha256 of the body.
+    """
+    check_content_type(response, allowed_types)
+    if response.content_length is not None and response.content_length > max_bytes:
+        response.close()
+        raise PageTooLargeError(f"Content-Length {response.content_length} exceeds the {max_bytes} byte limit")
+
+    inflater = _inflater(response)
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    decoder = None
+    parts = []
+
+    def consume(data: bytes):
+        nonlocal size, head, decoder
+        size += len(data)
+        if size > max_bytes:
+            response.close()
+            raise PageTooLargeError(f"Body exceeds the {max_bytes} byte limit")
+        digest.update(data)
+        if decoder is None:
+            head += data
+            if len(head) < SNIFF_BYTES:
+                return
+            decoder = codecs.getincrementaldecoder(sniff_charset(head, response.charset))(errors='replace')
+            data, head = head, b''
+        parts.append(decoder.decode(data))
+
+    try:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            if inflater is not None:
+                # Ask for one byte past the limit so an oversized body is detected
+                chunk = inflater.decompress(chunk, max_bytes - size + 1)
+            consume(chunk)
+        if inflater is not None:
+            consume(inflater.flush())
+    except zlib.error as e:
+        response.close()
+        raise FetchError(f"Corrupt compressed body: {e}") from e
+
+    if decoder is None:
+        decoder = codecs.getincrementaldecoder(sniff_charset(head, response.charset))(errors='replace')
+        parts.append(decoder.decode(head))
+    parts.append(decoder.decode(b'', final=True))
+    return {'html': ''.join(parts), 'bytes': size, 'body_hash': digest.hexdigest()}
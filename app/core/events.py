@@ -0,0 +1,182 @@
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import select
+import threading
+
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel carrying job progress between workers and the API
+CHANNEL = "job_events"
+
+# NOTIFY payloads are limited to 8000 bytes, so events carry only small fields
+MAX_FIELD_CHARS = 500
+
+# Per-URL events are fetched, extracted, summarised, stored and failed;
+# this one closes the stream
+JOB_COMPLETED = "completed"
+
+# The job's current status, sent when notifications may have been missed
+JOB_STATUS = "status"
+
+# Queued to subscribers, not sent to clients, when the listener reconnects:
+# anything notified while it was down is lost, so the job is read again
+LISTENER_RESUMED = "listener_resumed"
+
+
+def make_event(job_id: int, event: str, url: Optional[str] = None, **data: Any) -> Dict[str, Any]:
+    payload = {'job_id': job_id, 'event': event}
+    if url is not None:
+        payload['url'] = url
+    for key, value in data.items():
+        if isinstance(value, str) and len(value) > MAX_FIELD_CHARS:
+            value = value[:MAX_FIELD_CHARS]
+        payload[key] = value
+    return payload
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Render an event in Server-Sent Events wire format."""
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+class JobEventPublisher:
+    """Publishes job events with pg_notify, batching them per round trip.
+
+    Events are queued without blocking the caller and a background task
+    sends whatever has accumulated in a single statement.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_batch: int = 500):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self.task is None:
+            return
+        await self.queue.join()
+        self.task.cancel()
+        self.task = None
+
+    def publish(self, event: Dict[str, Any]):
+        self.queue.put_nowait(event)
+
+    async def _notify(self, payloads: List[str]):
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                {'channel': CHANNEL, 'payloads': payloads}
+            )
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self._notify([json.dumps(event) for event in batch])
+            except Exception:
+                # Progress events are best effort; the job itself carries on
+                logger.exception("Failed to publish %d job events", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+class JobEventBroker:
+    """Fans job events from Postgres LISTEN out to in-process subscribers.
+
+    A single listening connection, polled from a thread, serves every
+    streaming client in the process. After reconnecting it tells every
+    subscriber with a LISTENER_RESUMED event.
+    """
+
+    def __init__(self, engine: Engine, poll_timeout: float = 1.0):
+        self.engine = engine
+        self.poll_timeout = poll_timeout
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.thread = threading.Thread(target=self._listen, name="job-events", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.poll_timeout * 2)
+
+    def subscribe(self, job_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[job_id]
+
+    def _dispatch(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        for queue in self.subscribers.get(event.get('job_id'), ()):
+            queue.put_nowait(event)
+
+    def _resume(self):
+        for job_id, queues in self.subscribers.items():
+            for queue in queues:
+                queue.put_nowait({'job_id': job_id, 'event': LISTENER_RESUMED})
+
+    def _connect(self):
+        # The dialect's own connect arguments keep query options such as sslmode
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        connection = psycopg2.connect(*cargs, **cparams)
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def _listen(self):
+        connection = None
+        lost = False
+        while not self.stopping.is_set():
+            try:
+                if connection is None:
+                    connection = self._connect()
+                    if lost:
+                        lost = False
+                        self.loop.call_soon_threadsafe(self._resume)
+                if select.select([connection], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    self.loop.call_soon_threadsafe(self._dispatch, notify.payload)
+            except psycopg2.Error:
+                logger.exception("Job event listener lost its connection, reconnecting")
+                if connection is not None:
+                    connection.close()
+                connection = None
+                lost = True
+                self.stopping.wait(self.poll_timeout)
+        if connection is not None:
+            connection.close()
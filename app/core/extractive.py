@@ -0,0 +1,132 @@
+from typing import Any, Dict, List
+import re
+
+import numpy as np
+
+# A sentence ends at . ! or ? followed by space and a capital, digit or quote,
+# or at a paragraph break
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])|\n\s*\n')
+WORD = re.compile(r'[^\W\d_]{2,}')
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just me more most my myself no
+nor not now of off on once only or other our ours ourselves out over own same she should so some such than
+that the their theirs them themselves then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+# Sentences shorter than this many words are headings or fragments, not summary material
+MIN_SENTENCE_WORDS = 4
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = (' '.join(part.split()) for part in SENTENCE_END.split(text))
+    return [sentence for sentence in sentences if sentence]
+
+
+def tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    """L2-normalised TF-IDF rows, one per sentence, over the document's own vocabulary."""
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    columns: List[int] = []
+    for row, sentence in enumerate(sentences):
+        for word in WORD.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    counts = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1)
+    present = counts > 0
+    idf = np.log((1 + len(sentences)) / (1 + present.sum(axis=0))) + 1
+    weights = np.where(present, 1 + np.log(np.maximum(counts, 1)), 0) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return (weights / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+def textrank(similarity: np.ndarray, damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-5) -> np.ndarray:
+    """PageRank over the sentence similarity graph, by power iteration."""
+    n = len(similarity)
+    similarity = similarity.copy()
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no words with any other spread their rank evenly
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight == 0, 1, out_weight), 1 / n)
+    scores = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+class ExtractiveSummarizer:
+    """Local summaries built from the page's most central sentences.
+
+    Sentences are scored by TextRank over their TF-IDF cosine similarity;
+    pages with more than textrank_max_sentences sentences are scored by
+    similarity to the document centroid instead, which is linear in the
+    page length. The best sentences are returned in page order.
+
+    The confidence is the cosine similarity between the TF-IDF mass of the
+    chosen sentences and that of the whole page: close to 1 when a few
+    sentences carry most of the page's vocabulary, low when the page
+    covers many unrelated topics and an abstractive summary would do
+    better.
+    """
+
+    def __init__(self, max_sentences: int = 5, max_chars: int = 1200, textrank_max_sentences: int = 400):
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+        self.textrank_max_sentences = textrank_max_sentences
+
+    def summarize(self, text: str) -> Dict[str, Any]:
+        """Return the summary, its confidence and the number of sentences considered."""
+        sentences = [
+            sentence for sentence in split_sentences(text)
+            if len(sentence.split()) >= MIN_SENTENCE_WORDS
+        ]
+        if not sentences:
+            return {'summary': '', 'confidence': 0.0, 'sentences': 0}
+        if len(sentences) <= self.max_sentences and sum(map(len, sentences)) <= self.max_chars:
+            # Already as short as a summary would be
+            return {'summary': ' '.join(sentences), 'confidence': 1.0, 'sentences': len(sentences)}
+
+        matrix = tfidf_matrix(sentences)
+        document = matrix.sum(axis=0)
+        if len(sentences) <= self.textrank_max_sentences:
+            scores = textrank(matrix @ matrix.T)
+        else:
+            scores = matrix @ (document / (np.linalg.norm(document) or 1))
+
+        chosen: List[int] = []
+        length = 0
+        for index in np.argsort(-scores, kind='stable'):
+            if len(chosen) == self.max_sentences:
+                break
+            if chosen and length + len(sentences[index]) > self.max_chars:
+                continue
+            chosen.append(int(index))
+            length += len(sentences[index])
+        chosen.sort()
+
+        selected = matrix[chosen].sum(axis=0)
+        denominator = float(np.linalg.norm(selected) * np.linalg.norm(document))
+        confidence = float(selected @ document) / denominator if denominator else 0.0
+        summary = ' '.join(sentences[i] for i in chosen)
+        if len(summary) > self.max_chars:
+            # A single run-on sentence can still be longer than the limit
+            summary = summary[:self.max_chars].rsplit(' ', 1)[0] + '…'
+        return {
+            'summary': summary,
+            'confidence': round(confidence, 3),
+            'sentences': len(sentences)
+        }
+
+
+def extractive_summary(text: str, max_sentences: int = 5, max_chars: int = 1200) -> Dict[str, Any]:
+    """Module-level entry point, so it can run in the parse executor."""
+    return ExtractiveSummarizer(max_sentences, max_chars).summarize(text)
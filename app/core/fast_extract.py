@@ -0,0 +1,224 @@
+from typing import Any, Dict, List, Optional
+from html.parser import HTMLParser
+
+# Kept in sync with the BeautifulSoup engine in app.core.scraper
+UNWANTED_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'noscript', 'meta', 'link'])
+TEXT_TAGS = frozenset(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'blockquote'])
+CONTENT_CLASSES = frozenset(['content', 'main', 'article'])
+
+# Void elements are closed as soon as they open, as BeautifulSoup does
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'
+])
+
+# Content areas, in the order extract_content prefers them
+AREA_MAIN, AREA_ARTICLE, AREA_DIV, AREA_BODY = 1, 2, 4, 8
+AREA_PRIORITY = (AREA_MAIN, AREA_ARTICLE, AREA_DIV, AREA_BODY)
+
+
+class _Element:
+    __slots__ = ('tag', 'skip', 'area', 'text')
+
+    def __init__(self, tag: str, skip: bool, area: int, text: Optional[List[int]]):
+        self.tag = tag
+        self.skip = skip
+        self.area = area
+        self.text = text
+
+
+class StreamingExtractor(HTMLParser):
+    """Single-pass equivalent of the BeautifulSoup extract_content path.
+
+    The document is never built as a tree: excluded subtrees are skipped as
+    they stream past, and the text of every text element is collected once
+    for each candidate content area so the area can be chosen at the end.
+    tests/test_extract.py checks the output against the soup engine and
+    lists the titles where the two still differ.
+    """
+
+    def __init__(self, links: bool = False):
+        super().__init__(convert_charrefs=True)
+        # hrefs of followable <a> tags anywhere in the page, nav included
+        self.links: Optional[List[str]] = [] if links else None
+        self.base_href: Optional[str] = None
+        self.stack: List[_Element] = []
+        self.skip_depth = 0
+        self.open_areas = 0
+        # Areas are taken from their first occurrence only, like soup.find
+        self.seen_areas = 0
+        # Text chunks are stored once; every text element is an
+        # [area mask at open time, start, end] range over them, so nested
+        # elements repeat their text without copying it
+        self.chunks: List[str] = []
+        self.blocks: List[List[int]] = []
+        self.open_text = 0
+        self.pending: List[str] = []
+        self.title: Optional[List[str]] = None
+        self.in_title = False
+        # Nodes directly inside the title, counted as BeautifulSoup builds
+        # them: soup's title.string is None unless there is exactly one
+        self.title_element: Optional[_Element] = None
+        self.title_nodes = 0
+
+    def _flush(self):
+        if not self.pending:
+            return
+        raw = ''.join(self.pending)
+        self.pending = []
+        if self.in_title:
+            # Kept as is, like soup's title.string
+            self.title.append(raw)
+            if raw and self.stack[-1] is self.title_element:
+                self.title_nodes += 1
+        # Collapse whitespace per chunk so the result never needs a
+        # document-wide split
+        data = ' '.join(raw.split())
+        if not data:
+            return
+        if self.skip_depth or not self.open_text:
+            return
+        self.chunks.append(data)
+
+    def _area_for(self, tag: str, attrs) -> int:
+        if tag == 'main':
+            area = AREA_MAIN
+        elif tag == 'article':
+            area = AREA_ARTICLE
+        elif tag == 'div':
+            classes = next((value for name, value in attrs if name == 'class'), None) or ''
+            if not CONTENT_CLASSES.intersection(classes.split()):
+                return 0
+            area = AREA_DIV
+        elif tag == 'body':
+            area = AREA_BODY
+        else:
+            return 0
+        if self.seen_areas & area:
+            return 0
+        self.seen_areas |= area
+        return area
+
+    def _node(self):
+        """Flush the text before a tag, comment or declaration, and count it as a title node."""
+        self._flush()
+        if self.in_title and self.stack[-1] is self.title_element:
+            self.title_nodes += 1
+
+    def handle_starttag(self, tag, attrs):
+        self._node()
+        is_title = tag == 'title' and self.title is None
+        if is_title:
+            self.title = []
+            self.in_title = True
+        if self.links is not None and tag in ('a', 'base'):
+            self._link(tag, dict(attrs))
+
+        skip = tag in UNWANTED_TAGS
+        area = 0
+        text = None
+        if not self.skip_depth and not skip:
+            area = self._area_for(tag, attrs)
+            if tag in TEXT_TAGS:
+                start = len(self.chunks)
+                text = [self.open_areas | area, start, start]
+                self.blocks.append(text)
+        element = _Element(tag, skip, area, text)
+        if is_title:
+            self.title_element = element
+
+        if tag in VOID_TAGS:
+            return
+        self.stack.append(element)
+        if skip:
+            self.skip_depth += 1
+        self.open_areas |= area
+        if text is not None:
+            self.open_text += 1
+
+    def _link(self, tag: str, attrs: Dict[str, Optional[str]]):
+        href = attrs.get('href')
+        if not href:
+            return
+        if tag == 'base':
+            if self.base_href is None:
+                self.base_href = href
+        elif 'nofollow' not in (attrs.get('rel') or '').lower().split():
+            self.links.append(href)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        # Close back to the most recent matching open tag, ignore stray ones
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].tag == tag:
+                break
+        else:
+            return
+        while len(self.stack) > index:
+            self._pop()
+
+    def _pop(self):
+        element = self.stack.pop()
+        if element.skip:
+            self.skip_depth -= 1
+        if element.area:
+            self.open_areas &= ~element.area
+        if element.text is not None:
+            element.text[2] = len(self.chunks)
+            self.open_text -= 1
+        if element is self.title_element:
+            self.in_title = False
+
+    def handle_data(self, data):
+        if self.in_title or self.open_text:
+            self.pending.append(data)
+
+    def handle_comment(self, data):
+        self._node()
+
+    def handle_decl(self, decl):
+        self._node()
+
+    def handle_pi(self, data):
+        self._node()
+
+    def unknown_decl(self, data):
+        self._node()
+
+    def close(self):
+        super().close()
+        self._flush()
+        while self.stack:
+            self._pop()
+
+    def result(self) -> Dict[str, Any]:
+        """Return the title and extracted text (and links, if collected) once the document is fed."""
+        area = next((area for area in AREA_PRIORITY if self.seen_areas & area), 0)
+        # Chunks are already collapsed, so joining them with single spaces
+        # gives the same block text as the soup engine; blocks are separated
+        # by blank lines
+        content = '\n\n'.join(
+            ' '.join(self.chunks[start:end])
+            for mask, start, end in self.blocks
+            if end > start and (not area or mask & area)
+        )
+        title = ''.join(self.title) if self.title_nodes == 1 else ''
+        result: Dict[str, Any] = {'title': title, 'text': content}
+        if self.links is not None:
+            result['links'] = self.links
+            result['base_href'] = self.base_href
+        return result
+
+
+def stream_extract(html: str, links: bool = False) -> Dict[str, Any]:
+    """Extract the title and main text (and raw hrefs with links=True) in a single streaming pass."""
+    parser = StreamingExtractor(links)
+    parser.feed(html)
+    parser.close()
+    return parser.result()
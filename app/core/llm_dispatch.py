@@ -0,0 +1,160 @@
+from typing import Any, Dict, Optional
+import asyncio
+import functools
+import hashlib
+import random
+import time
+
+import openai
+
+from app.core import metrics
+from app.core.scheduler import TokenBucket
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken ships with langchain-openai
+    tiktoken = None
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model_name: str):
+    """The model's tiktoken encoding, or None when it cannot be loaded."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # The encoding files are downloaded on first use; offline hosts estimate
+        return None
+
+
+def count_tokens(text: str, model_name: str = "gpt-3.5-turbo") -> int:
+    """Count tokens for the model, estimating when no tokenizer is available."""
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return isinstance(error, openai.RateLimitError) or getattr(error, 'status_code', None) == 429
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the provider's Retry-After hint from a rate limit error."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    for header, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return float(value) * scale
+        except ValueError:
+            continue
+    return None
+
+
+class LLMDispatcher:
+    """Shared gateway for every LLM call made by the summarizer.
+
+    Prompts are token-counted before they are sent and held back until the
+    requests-per-minute and tokens-per-minute budgets allow them. A 429
+    pauses all callers for the Retry-After period (or an exponential
+    backoff with jitter) and the call is retried. Identical prompts that
+    are already in flight share one request.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        requests_per_minute: int = 3500,
+        tokens_per_minute: int = 90000,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+        expected_output_tokens: int = 256
+    ):
+        self.llm = llm
+        self.model_name = getattr(llm, 'model_name', type(llm).__name__)
+        self.max_retries = max_retries
+        self.expected_output_tokens = expected_output_tokens
+        # Buckets hold ten seconds' worth of budget to smooth out bursts
+        self.request_bucket = TokenBucket(requests_per_minute / 60, max(1, requests_per_minute // 6))
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, max(1, tokens_per_minute // 6))
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._paused_until = 0.0
+        self.stats = {
+            'requests': 0,
+            'coalesced': 0,
+            'rate_limited': 0,
+            'retries': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0
+        }
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text, self.model_name)
+
+    async def invoke(self, prompt: str) -> str:
+        """Send prompt to the LLM within budget and return the reply text."""
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+        else:
+            task = asyncio.ensure_future(self._dispatch(prompt))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield the shared request so one cancelled caller does not cancel it for all
+        return await asyncio.shield(task)
+
+    async def _wait_for_pause(self):
+        loop = asyncio.get_running_loop()
+        while self._paused_until > loop.time():
+            await asyncio.sleep(self._paused_until - loop.time())
+
+    async def _dispatch(self, prompt: str) -> str:
+        tokens = self.count_tokens(prompt)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_pause()
+            await self.request_bucket.acquire()
+            await self.token_bucket.acquire(tokens + self.expected_output_tokens)
+            async with self.semaphore:
+                started = time.perf_counter()
+                try:
+                    self.stats['requests'] += 1
+                    message = await self.llm.ainvoke(prompt)
+                except Exception as e:
+                    limited = is_rate_limit_error(e)
+                    metrics.LLM_REQUESTS.labels(self.model_name, 'rate_limited' if limited else 'error').inc()
+                    if not limited or attempt == self.max_retries:
+                        raise
+                    self.stats['rate_limited'] += 1
+                    delay = retry_after_seconds(e)
+                    if delay is None:
+                        delay = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                    self._paused_until = max(self._paused_until, loop.time() + delay)
+                else:
+                    content = message.content if hasattr(message, 'content') else str(message)
+                    self._record(tokens, content, getattr(message, 'usage_metadata', None), time.perf_counter() - started)
+                    return content
+            self.stats['retries'] += 1
+
+    def _record(self, prompt_tokens: int, content: str, usage: Optional[Dict[str, int]], seconds: float):
+        """Count tokens, preferring the provider's usage report over local estimates."""
+        if usage:
+            prompt_tokens = usage.get('input_tokens', prompt_tokens)
+            completion_tokens = usage.get('output_tokens', 0)
+        else:
+            completion_tokens = self.count_tokens(content)
+        self.stats['prompt_tokens'] += prompt_tokens
+        self.stats['completion_tokens'] += completion_tokens
+        metrics.LLM_REQUESTS.labels(self.model_name, 'ok').inc()
+        metrics.LLM_SECONDS.labels(self.model_name).observe(seconds)
+        metrics.LLM_TOKENS.labels(self.model_name, 'prompt').inc(prompt_tokens)
+        metrics.LLM_TOKENS.labels(self.model_name, 'completion').inc(completion_tokens)
@@ -0,0 +1,54 @@
+from typing import Set
+import os
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter, Histogram
+
+# Per-page stage times range from a cache hit to a slow LLM call
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Hosts beyond this many are reported as "other" so a large crawl cannot
+# create unbounded label sets
+MAX_HOSTS = int(os.getenv("METRICS_MAX_HOSTS", "200"))
+
+STAGE_SECONDS = Histogram(
+    'scraper_stage_seconds', 'Time one page spent in each pipeline stage',
+    ['stage', 'host'], buckets=STAGE_BUCKETS
+)
+FETCHED_BYTES = Counter('scraper_fetched_bytes_total', 'Page bytes downloaded, after decompression', ['host'])
+PAGES = Counter('scraper_pages_total', 'Pages scraped, by outcome', ['host', 'outcome'])
+ERRORS = Counter('scraper_errors_total', 'Failed pages by the stage they failed in', ['stage', 'host', 'error_type'])
+FETCH_RETRIES = Counter('scraper_fetch_retries_total', 'Fetch attempts that were retried', ['host', 'error_class'])
+BREAKER_OPENED = Counter('scraper_circuit_breaker_opened_total', 'Times a host\'s circuit breaker opened', ['host'])
+BREAKER_REJECTIONS = Counter(
+    'scraper_circuit_breaker_rejections_total', 'URLs failed fast because their host\'s breaker was open', ['host']
+)
+SUMMARIES = Counter('scraper_summaries_total', 'Summaries produced, by source', ['source'])
+
+LLM_REQUESTS = Counter('scraper_llm_requests_total', 'Requests sent to the LLM, by outcome', ['model', 'outcome'])
+LLM_TOKENS = Counter('scraper_llm_tokens_total', 'LLM tokens, by kind (prompt or completion)', ['model', 'kind'])
+LLM_SECONDS = Histogram('scraper_llm_request_seconds', 'LLM request latency', ['model'], buckets=STAGE_BUCKETS)
+
+PERSIST_SECONDS = Histogram(
+    'scraper_persist_batch_seconds', 'Time to write and commit one batch of results', buckets=STAGE_BUCKETS
+)
+PERSISTED_ROWS = Counter('scraper_persisted_rows_total', 'scraped_content rows written, by outcome', ['outcome'])
+
+JOBS = Counter('scraper_jobs_total', 'Finished jobs, by status', ['status'])
+JOB_SECONDS = Histogram(
+    'scraper_job_seconds', 'Wall time of a job',
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+_hosts: Set[str] = set()
+
+
+def host_label(url: str) -> str:
+    """The URL's host, or "other" once MAX_HOSTS distinct hosts have been seen."""
+    host = urlsplit(url).hostname or 'unknown'
+    if host in _hosts:
+        return host
+    if len(_hosts) < MAX_HOSTS:
+        _hosts.add(host)
+        return host
+    return 'other'
@@ -0,0 +1,234 @@
+"""The staged pipeline a job's URLs run through.
+
+Fetch, extract and summarise each have their own workers, joined by
+bounded queues, and finished pages go to the consumer through one more
+bounded queue. However many URLs a job has, only the pages in a stage or
+a queue are held in memory, and a stage that falls behind (usually the
+LLM, or the database behind the consumer) makes the stages before it
+wait rather than letting pages pile up.
+"""
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, TYPE_CHECKING
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+from app.core import metrics
+
+if TYPE_CHECKING:
+    from app.core.scraper import AsyncWebScraper
+
+# Pages waiting between two stages, and finished pages waiting for the consumer
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+
+# Pages parsed at once; the parse executor does the work, so by default one per CPU
+EXTRACT_WORKERS = int(os.getenv("PIPELINE_EXTRACT_WORKERS", "0")) or os.cpu_count() or 1
+
+# Pages summarised at once; most wait on the summary cache or the LLM
+# dispatcher, which applies its own concurrency and rate limits
+SUMMARISE_WORKERS = int(os.getenv("PIPELINE_SUMMARISE_WORKERS", "16"))
+
+_DONE = object()
+
+
+def interleave_hosts(urls: List[str]) -> Iterator[str]:
+    """Yield urls one host at a time in turn, keeping each host's own order.
+
+    Fetch workers take URLs in order, so a list sorted by host would
+    otherwise leave them all waiting on one host's limits.
+    """
+    hosts: Dict[str, deque] = OrderedDict()
+    for url in urls:
+        hosts.setdefault(urlsplit(url).netloc.lower(), deque()).append(url)
+    while hosts:
+        for host in list(hosts):
+            queue = hosts[host]
+            yield queue.popleft()
+            if not queue:
+                del hosts[host]
+
+
+class PageTask:
+    """One URL on its way through the stages, with the time spent in each."""
+
+    def __init__(self, url: str, validators: Optional[Dict[str, str]] = None, follow_links: bool = False):
+        self.url = url
+        self.validators = validators
+        self.follow_links = follow_links
+        self.host = metrics.host_label(url)
+        self.timings: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.fetched: Optional[Dict[str, Any]] = None
+        self.parsed: Optional[Dict[str, Any]] = None
+        self.prompt: Optional[Dict[str, Any]] = None
+        # Set once the page is finished: stored content, unchanged or an error
+        self.result: Optional[dict] = None
+
+    def resume(self):
+        """Start timing the next stage; time spent queued before it is added to queued_ms."""
+        now = time.perf_counter()
+        if self.timings:
+            self.timings['queued_ms'] = round(self.timings.get('queued_ms', 0.0) + (now - self.started) * 1000, 1)
+        self.started = now
+
+    def lap(self, stage: str):
+        """Record the time since the stage started, in timings and the per-stage histogram."""
+        now = time.perf_counter()
+        self.timings[f"{stage}_ms"] = round((now - self.started) * 1000, 1)
+        metrics.STAGE_SECONDS.labels(stage, self.host).observe(now - self.started)
+        self.started = now
+
+
+class ScrapePipeline:
+    """Runs a list of URLs through the scraper's stages with bounded queues between them.
+
+    Fetch workers (by default twice the fetch limit, so fetch slots stay
+    busy while some workers wait on a host) take URLs in turn, host by
+    host. Unchanged and failed pages skip the remaining stages. At most
+    the workers plus queue_size pages per queue are in the pipeline at
+    once.
+
+    With a runtime, a URL that another job in the process is already
+    scraping is not scraped again: this pipeline waits for that job's
+    result instead, and other jobs likewise wait on the URLs claimed
+    here.
+    """
+
+    def __init__(
+        self,
+        scraper: "AsyncWebScraper",
+        queue_size: int = QUEUE_SIZE,
+        fetch_workers: Optional[int] = None,
+        extract_workers: int = EXTRACT_WORKERS,
+        summarise_workers: int = SUMMARISE_WORKERS
+    ):
+        self.scraper = scraper
+        self.queue_size = queue_size
+        self.fetch_workers = fetch_workers or scraper.scheduler.global_limit * 2
+        self.extract_workers = extract_workers
+        self.summarise_workers = summarise_workers
+        runtime = scraper.runtime
+        self.in_flight: Optional[Dict[str, asyncio.Future]] = runtime.in_flight if runtime is not None else None
+        # URLs this pipeline is scraping for other jobs to wait on
+        self.claimed: Dict[str, asyncio.Future] = {}
+
+    async def join(self, url: str, validators: Optional[Dict[str, str]] = None) -> Optional[dict]:
+        """Claim url for this pipeline, or return the result of another job's scrape of it.
+
+        An unchanged result only means something to a job that has the
+        stored page too; without validators the URL is scraped here.
+        """
+        if self.in_flight is None:
+            return None
+        while True:
+            shared = self.in_flight.get(url)
+            if shared is None:
+                future = asyncio.get_running_loop().create_future()
+                self.in_flight[url] = self.claimed[url] = future
+                return None
+            try:
+                # Shielded so this job giving up does not cancel the scrape for the others
+                result = await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+                # That job gave up before the page finished; scrape it here instead
+                continue
+            if result.get('unchanged') and not validators:
+                continue
+            self.scraper.runtime.scrape_stats['shared'] += 1
+            return result
+
+    def release(self, url: str, result: dict):
+        future = self.claimed.pop(url, None)
+        if future is None:
+            return
+        if self.in_flight.get(url) is future:
+            del self.in_flight[url]
+        future.set_result(result)
+
+    def abandon(self):
+        """Give up the URLs still claimed, so jobs waiting on them scrape them themselves."""
+        for url, future in self.claimed.items():
+            if self.in_flight.get(url) is future:
+                del self.in_flight[url]
+            future.cancel()
+        self.claimed = {}
+
+    async def run(self, urls: List[str], validators: Dict[str, Dict[str, str]]) -> AsyncIterator[dict]:
+        """Scrape canonical urls, yielding each result as soon as its page is finished."""
+        scraper = self.scraper
+        pending = interleave_hosts(urls)
+        extract_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        summarise_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        results: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        async def finish(page: PageTask):
+            self.release(page.url, page.result)
+            await results.put(page.result)
+
+        async def fetch():
+            # Workers share one iterator, so each URL is taken exactly once
+            for url in pending:
+                shared = await self.join(url, validators.get(url))
+                if shared is not None:
+                    await results.put(shared)
+                    continue
+                page = PageTask(url, validators.get(url))
+                await scraper.run_stage(scraper.fetch_stage, page)
+                if page.result is not None:
+                    await finish(page)
+                else:
+                    await extract_queue.put(page)
+
+        async def work(inbox: asyncio.Queue, step, outbox: Optional[asyncio.Queue]):
+            while True:
+                page = await inbox.get()
+                if page is _DONE:
+                    return
+                await scraper.run_stage(step, page)
+                if page.result is not None or outbox is None:
+                    await finish(page)
+                else:
+                    await outbox.put(page)
+
+        async def run_workers(workers, downstream: asyncio.Queue, downstream_workers: int):
+            """Run a stage's workers, then tell each worker of the next stage to stop."""
+            try:
+                await asyncio.gather(*workers)
+            except Exception as e:
+                # A bug rather than a failed page; hand it to the consumer to raise
+                await results.put(e)
+                return
+            for _ in range(downstream_workers):
+                await downstream.put(_DONE)
+
+        stages = [
+            asyncio.ensure_future(run_workers(
+                [fetch() for _ in range(self.fetch_workers)],
+                extract_queue, self.extract_workers
+            )),
+            asyncio.ensure_future(run_workers(
+                [work(extract_queue, scraper.extract_stage, summarise_queue) for _ in range(self.extract_workers)],
+                summarise_queue, self.summarise_workers
+            )),
+            asyncio.ensure_future(run_workers(
+                [work(summarise_queue, scraper.summarise_stage, None) for _ in range(self.summarise_workers)],
+                results, 1
+            ))
+        ]
+        try:
+            while True:
+                result = await results.get()
+                if result is _DONE:
+                    return
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+        finally:
+            # Stop outstanding pages if the consumer gives up early
+            for task in stages:
+                task.cancel()
+            if self.in_flight is not None:
+                self.abandon()
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional
+import cProfile
+import os
+import pstats
+
+# Where .prof files of profiled jobs are written, for snakeviz or pstats
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+_active = False
+
+
+class JobProfiler:
+    """cProfile the event loop while one job runs, when the job asks for it.
+
+    The profiler sees everything on the loop's thread, so jobs running
+    alongside in the same process show up too; the parse stage runs in
+    the parse executor and appears only as time spent waiting on it.
+    Only one job per process is profiled at a time; a second request
+    while one is running is recorded as skipped.
+    """
+
+    def __init__(self, job_id: int, enabled: bool = False, top: int = 25, directory: Optional[str] = PROFILE_DIR):
+        self.job_id = job_id
+        self.enabled = enabled
+        self.top = top
+        self.directory = directory
+        self.profiler: Optional[cProfile.Profile] = None
+        self.report: Optional[Dict[str, Any]] = None
+
+    def __enter__(self) -> "JobProfiler":
+        global _active
+        if not self.enabled:
+            return self
+        if _active:
+            self.report = {'skipped': 'another job is being profiled'}
+            return self
+        _active = True
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _active
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        _active = False
+        self.report = {'file': self._dump(), 'functions': self._top_functions()}
+        self.profiler = None
+
+    def _dump(self) -> Optional[str]:
+        if not self.directory:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"job-{self.job_id}.prof")
+        self.profiler.dump_stats(path)
+        return path
+
+    def _top_functions(self) -> List[Dict[str, Any]]:
+        """The functions with the most cumulative time, as JSON-friendly rows."""
+        stats = pstats.Stats(self.profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': calls,
+                'own_ms': round(own * 1000, 2),
+                'cumulative_ms': round(cumulative * 1000, 2)
+            }
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows
+        ]
@@ -0,0 +1,309 @@
+from typing import Dict, Mapping, Optional
+import asyncio
+import math
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.core import metrics
+from app.core.download import FetchError
+
+# Statuses worth another attempt; every other 4xx is the page's fault, not the host's
+THROTTLED_STATUSES = (429, 503)
+SERVER_ERROR_STATUSES = (408, 425, 500, 502, 504)
+
+# Attempts (including the first) per error class; classes missing here are not retried
+DEFAULT_ATTEMPTS = {
+    'throttled': 4,
+    'server_error': 3,
+    'connection': 3,
+    'timeout': 2,
+}
+
+# Error classes that count against a host's circuit breaker
+HOST_FAILURES = ('throttled', 'server_error', 'connection', 'timeout')
+
+# Longest Retry-After taken at its word; a longer one (usually a bogus
+# value or a date far ahead) is cut down to this
+MAX_RETRY_AFTER = 3600.0
+
+
+class CircuitOpenError(FetchError):
+    """The host's breaker is open, so the URL failed without being requested."""
+
+    error_type = "circuit_open"
+
+
+def classify(error: BaseException) -> Optional[str]:
+    """The retry class of a fetch error, or None when retrying cannot help."""
+    if isinstance(error, FetchError):
+        return None
+    if isinstance(error, aiohttp.ClientResponseError):
+        if error.status in THROTTLED_STATUSES:
+            return 'throttled'
+        if error.status in SERVER_ERROR_STATUSES or error.status >= 500:
+            return 'server_error'
+        return None
+    if isinstance(error, asyncio.TimeoutError):
+        return 'timeout'
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return 'connection'
+    return None
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date.
+
+    At most MAX_RETRY_AFTER; values that are not a finite number or a date are ignored.
+    """
+    value = (headers or {}).get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    if not math.isfinite(seconds):
+        return None
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
+
+
+class RetryPolicy:
+    """How many times, and how long to wait, before retrying a failed fetch.
+
+    Backoff is exponential with full jitter, so many URLs failing at once
+    do not come back in lockstep. A Retry-After hint replaces the backoff
+    when it is longer; one beyond max_retry_after means the host asked us
+    to stay away for longer than a job should wait, and the URL fails.
+    """
+
+    def __init__(
+        self,
+        attempts: Optional[Dict[str, int]] = None,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_retry_after: float = 60.0
+    ):
+        self.attempts = dict(DEFAULT_ATTEMPTS if attempts is None else attempts)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def delay(self, retry_class: Optional[str], attempt: int, hint: Optional[float] = None) -> Optional[float]:
+        """Seconds to sleep before attempt + 1, or None to give up."""
+        if retry_class is None or attempt >= min(self.attempts.get(retry_class, 1), self.max_attempts):
+            return None
+        if hint is not None:
+            if hint > self.max_retry_after:
+                return None
+            return max(hint, self.backoff(attempt))
+        return self.backoff(attempt)
+
+
+class CircuitBreaker:
+    """Fails a host's requests fast once it keeps failing.
+
+    Closed: requests go through; failure_threshold consecutive host
+    failures open it. Open: requests fail with CircuitOpenError until
+    reset_seconds have passed. Half open: one probe request is let
+    through; success closes the breaker, failure opens it again for twice
+    as long (up to max_reset_seconds).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0, max_reset_seconds: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max_reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.open_for = reset_seconds
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+        # Set from Retry-After: requests wait (rather than fail) until then
+        self.paused_until = 0.0
+        self.last_used = time.monotonic()
+        self.stats = {'opened': 0, 'rejected': 0}
+
+    def _due(self, now: float) -> bool:
+        return now - self.opened_at >= self.open_for
+
+    def check(self):
+        """Fail fast while open; does not take the half-open probe."""
+        if self.state == 'open' and not self._due(time.monotonic()):
+            self.stats['rejected'] += 1
+            raise CircuitOpenError(f"Circuit open for another {self.retry_in():.1f}s")
+
+    def allow(self):
+        """Admit a request about to be sent, or raise CircuitOpenError."""
+        now = time.monotonic()
+        self.last_used = now
+        if self.state == 'open':
+            self.check()
+            self.state = 'half_open'
+            self.probe_started = None
+        if self.state == 'half_open':
+            # A probe that never reported back (e.g. cancelled) is given up on
+            if self.probe_started is not None and now - self.probe_started < self.reset_seconds:
+                self.stats['rejected'] += 1
+                raise CircuitOpenError("Circuit half open; waiting on a probe request")
+            self.probe_started = now
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_for - time.monotonic())
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != 'closed':
+            self.state = 'closed'
+            self.open_for = self.reset_seconds
+            self.probe_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half_open':
+            self.trip(min(self.max_reset_seconds, self.open_for * 2))
+        elif self.state == 'closed' and self.failures >= self.failure_threshold:
+            self.trip(self.reset_seconds)
+
+    def trip(self, seconds: float):
+        """Open the breaker for seconds."""
+        self.state = 'open'
+        self.open_for = seconds
+        self.opened_at = time.monotonic()
+        self.probe_started = None
+        self.stats['opened'] += 1
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def idle(self, now: float, seconds: float) -> bool:
+        """Closed, not paused and unused for seconds, so it holds nothing worth keeping."""
+        return self.state == 'closed' and self.paused_until <= now and now - self.last_used >= seconds
+
+    async def wait(self):
+        """Sleep out a Retry-After pause before taking a fetch slot."""
+        while self.paused_until > time.monotonic():
+            await asyncio.sleep(self.paused_until - time.monotonic())
+
+
+class HostBreakers:
+    """One CircuitBreaker per host, shared by every job in the process.
+
+    Closed breakers unused for idle_seconds are dropped once the number of
+    hosts doubles, so a long-running process crawling many hosts keeps
+    only the breakers still in use or still open.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        max_reset_seconds: float = 300.0,
+        idle_seconds: float = 600.0,
+        min_hosts: int = 1000
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max_reset_seconds
+        self.idle_seconds = idle_seconds
+        self.min_hosts = min_hosts
+        self.hosts: Dict[str, CircuitBreaker] = {}
+        self.evict_at = min_hosts
+        # Counts of evicted breakers, kept so stats stay running totals
+        self.evicted = {'hosts': 0, 'opened': 0, 'rejected': 0}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc.lower()
+        breaker = self.hosts.get(host)
+        if breaker is None:
+            if len(self.hosts) >= self.evict_at:
+                self.evict_idle()
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_seconds, self.max_reset_seconds)
+            self.hosts[host] = breaker
+        breaker.last_used = time.monotonic()
+        return breaker
+
+    def evict_idle(self):
+        """Drop idle breakers; the next sweep waits until the remaining hosts double."""
+        now = time.monotonic()
+        for host, breaker in list(self.hosts.items()):
+            if breaker.idle(now, self.idle_seconds):
+                del self.hosts[host]
+                self.evicted['hosts'] += 1
+                self.evicted['opened'] += breaker.stats['opened']
+                self.evicted['rejected'] += breaker.stats['rejected']
+        self.evict_at = max(self.min_hosts, len(self.hosts) * 2)
+
+    def stats(self) -> Dict[str, int]:
+        breakers = self.hosts.values()
+        return {
+            'hosts': len(self.hosts),
+            'evicted': self.evicted['hosts'],
+            'open': sum(breaker.state != 'closed' for breaker in breakers),
+            'opened': self.evicted['opened'] + sum(breaker.stats['opened'] for breaker in breakers),
+            'rejected': self.evicted['rejected'] + sum(breaker.stats['rejected'] for breaker in breakers)
+        }
+
+
+async def fetch_with_retries(url: str, fetch, policy: RetryPolicy, breaker: CircuitBreaker):
+    """Run fetch() under the host's breaker, retrying per policy.
+
+    fetch(admit) must call admit() once it holds its fetch slot, just
+    before sending the request, so URLs queued behind a host that has
+    since failed are rejected without being requested.
+    """
+    attempt = 0
+    host = metrics.host_label(url)
+    while True:
+        attempt += 1
+        await breaker.wait()
+        try:
+            breaker.check()
+            result = await fetch(breaker.allow)
+        except CircuitOpenError:
+            metrics.BREAKER_REJECTIONS.labels(host).inc()
+            raise
+        except FetchError:
+            # The host answered; the page is the problem
+            breaker.record_success()
+            raise
+        except Exception as e:
+            retry_class = classify(e)
+            opened = breaker.stats['opened']
+            if retry_class in HOST_FAILURES:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            hint = retry_after(getattr(e, 'headers', None))
+            delay = policy.delay(retry_class, attempt, hint)
+            if hint is not None:
+                if hint > policy.max_retry_after:
+                    # Told to stay away longer than we would wait: stop sending anything
+                    breaker.trip(hint)
+                else:
+                    breaker.pause(hint)
+            if breaker.stats['opened'] > opened:
+                metrics.BREAKER_OPENED.labels(host).inc()
+            if delay is None:
+                raise
+            metrics.FETCH_RETRIES.labels(host, retry_class).inc()
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,234 @@
+from typing import Any, Dict, Optional
+import asyncio
+import os
+from concurrent.futures import Executor
+
+import aiohttp
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_openai import ChatOpenAI
+
+from app.core.cache import SummaryCache
+from app.core.events import JobEventPublisher
+from app.core.llm_dispatch import LLMDispatcher
+from app.core.retry import HostBreakers, RetryPolicy
+from app.core.scheduler import HostScheduler
+from app.core.scraper import create_parse_executor
+from app.core.simhash import SimHashIndex
+from app.core.summarizer import Summarizer
+
+
+class ScraperRuntime:
+    """Long-lived resources shared by every scraping job in a process.
+
+    Owns one pooled aiohttp session (keep-alive connections and a DNS
+    cache), the LLM client, dispatcher and summarizer, the parse
+    executor, the summary cache and SimHash index, the fetch scheduler,
+    retry policy and per-host circuit breakers, and the job event
+    publisher. Start it once, hand it to each AsyncWebScraper, and close
+    it on shutdown.
+    """
+
+    def __init__(
+        self,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        request_timeout: int = 10,
+        max_page_bytes: int = 5 * 1024 * 1024,
+        parse_executor: Optional[Executor] = None,
+        extraction_engine: str = "soup",
+        summary_cache: Optional[SummaryCache] = None,
+        near_duplicates: Optional[SimHashIndex] = None,
+        scheduler: Optional[HostScheduler] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breakers: Optional[HostBreakers] = None,
+        job_events: Optional[JobEventPublisher] = None,
+        llm: Optional[Any] = None,
+        model_name: str = "gpt-3.5-turbo",
+        summary_mode: str = "stuff",
+        summary_strategy: str = "llm",
+        extractive_min_confidence: float = 0.5,
+        extractive_max_chars: int = 20000,
+        token_budget: int = 3000,
+        llm_concurrency: int = 4,
+        llm_requests_per_minute: int = 3500,
+        llm_tokens_per_minute: int = 90000
+    ):
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.max_page_bytes = max_page_bytes
+        self.parse_executor = parse_executor or create_parse_executor()
+        self.extraction_engine = extraction_engine
+        self.summary_cache = summary_cache
+        self.near_duplicates = near_duplicates
+        self.scheduler = scheduler or HostScheduler()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or HostBreakers()
+        # Retries are left to the dispatcher so 429s pause every caller
+        self.llm = llm or ChatOpenAI(temperature=0, model_name=model_name, max_retries=0)
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=4000, chunk_overlap=0)
+        self.llm_dispatcher = LLMDispatcher(
+            self.llm,
+            requests_per_minute=llm_requests_per_minute,
+            tokens_per_minute=llm_tokens_per_minute,
+            max_concurrency=llm_concurrency
+        )
+        self.summarizer = Summarizer(
+            self.llm,
+            self.text_splitter,
+            summary_mode,
+            dispatcher=self.llm_dispatcher
+        )
+        # Default for jobs that do not choose a summary strategy themselves
+        self.summary_strategy = summary_strategy
+        self.extractive_min_confidence = extractive_min_confidence
+        self.extractive_max_chars = extractive_max_chars
+        self.token_budget = token_budget
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Canonical URL -> scrape in progress, shared by every job in the process
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.scrape_stats = {'shared': 0}
+        # None for runtimes without a database, e.g. in the offline benchmarks
+        self.job_events = job_events
+        self.connection_stats = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'dns_cache_hits': 0,
+            'dns_cache_misses': 0
+        }
+
+    @classmethod
+    def from_env(cls) -> "ScraperRuntime":
+        """Build a runtime configured from environment variables."""
+        # Imported here so building a runtime by hand does not need a database driver
+        from app.db.database import AsyncSessionLocal, async_engine
+
+        return cls(
+            connection_limit=int(os.getenv("HTTP_POOL_SIZE", "100")),
+            connection_limit_per_host=int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "10")),
+            dns_cache_ttl=int(os.getenv("DNS_CACHE_TTL", "300")),
+            keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30")),
+            max_page_bytes=int(os.getenv("MAX_PAGE_BYTES", str(5 * 1024 * 1024))),
+            parse_executor=create_parse_executor(
+                int(os.getenv("PARSE_WORKERS", "0")) or None,
+                os.getenv("PARSE_EXECUTOR", "process")
+            ),
+            extraction_engine=os.getenv("EXTRACTION_ENGINE", "soup"),
+            summary_cache=SummaryCache(
+                max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", "10000")),
+                ttl_seconds=int(os.getenv("SUMMARY_CACHE_TTL", str(30 * 24 * 3600))),
+                session_factory=AsyncSessionLocal
+            ),
+            near_duplicates=SimHashIndex(
+                max_distance=int(os.getenv("SIMHASH_MAX_DISTANCE", "3")),
+                session_factory=AsyncSessionLocal
+            ),
+            scheduler=HostScheduler(
+                global_limit=int(os.getenv("FETCH_CONCURRENCY", "20")),
+                per_host_limit=int(os.getenv("HOST_CONCURRENCY", "2")),
+                per_host_rate=float(os.getenv("HOST_RATE", "4")),
+                respect_robots=os.getenv("RESPECT_ROBOTS", "false").lower() == "true",
+                idle_seconds=float(os.getenv("HOST_IDLE_SECONDS", "600"))
+            ),
+            retry_policy=RetryPolicy(
+                max_attempts=int(os.getenv("FETCH_MAX_ATTEMPTS", "4")),
+                base_delay=float(os.getenv("FETCH_BACKOFF_BASE", "0.5")),
+                max_delay=float(os.getenv("FETCH_BACKOFF_MAX", "30")),
+                max_retry_after=float(os.getenv("FETCH_MAX_RETRY_AFTER", "60"))
+            ),
+            breakers=HostBreakers(
+                failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+                reset_seconds=float(os.getenv("BREAKER_RESET_SECONDS", "30")),
+                max_reset_seconds=float(os.getenv("BREAKER_MAX_RESET_SECONDS", "300")),
+                idle_seconds=float(os.getenv("HOST_IDLE_SECONDS", "600"))
+            ),
+            job_events=JobEventPublisher(async_engine),
+            model_name=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+            summary_mode=os.getenv("SUMMARY_MODE", "stuff"),
+            summary_strategy=os.getenv("SUMMARY_STRATEGY", "llm"),
+            extractive_min_confidence=float(os.getenv("EXTRACTIVE_MIN_CONFIDENCE", "0.5")),
+            extractive_max_chars=int(os.getenv("EXTRACTIVE_MAX_CHARS", "20000")),
+            token_budget=int(os.getenv("SUMMARY_TOKEN_BUDGET", "3000")),
+            llm_concurrency=int(os.getenv("LLM_CONCURRENCY", "4")),
+            llm_requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "3500")),
+            llm_tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "90000"))
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        stats = self.connection_stats
+
+        async def on_request_start(session, context, params):
+            stats['requests'] += 1
+
+        async def on_connection_create_end(session, context, params):
+            stats['connections_created'] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            stats['connections_reused'] += 1
+
+        async def on_dns_cache_hit(session, context, params):
+            stats['dns_cache_hits'] += 1
+
+        async def on_dns_cache_miss(session, context, params):
+            stats['dns_cache_misses'] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    async def start(self) -> "ScraperRuntime":
+        """Open the pooled session; must be called from the serving event loop."""
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            trace_configs=[self._trace_config()]
+        )
+        if self.job_events is not None:
+            self.job_events.start()
+        return self
+
+    async def close(self):
+        if self.job_events is not None:
+            await self.job_events.close()
+        if self.session:
+            await self.session.close()
+            self.session = None
+        self.parse_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse, DNS cache, summary cache, near-duplicate, LLM, breaker and shared scrape statistics."""
+        stats: Dict[str, Any] = dict(self.connection_stats)
+        connections = stats['connections_created'] + stats['connections_reused']
+        stats['connection_reuse_ratio'] = round(stats['connections_reused'] / connections, 3) if connections else 0.0
+        if self.summary_cache is not None:
+            stats['summary_cache'] = dict(self.summary_cache.stats)
+        if self.near_duplicates is not None:
+            stats['near_duplicates'] = {'indexed': self.near_duplicates.size, **self.near_duplicates.stats}
+        stats['llm'] = dict(self.llm_dispatcher.stats)
+        stats['hosts'] = len(self.scheduler.hosts)
+        stats['circuit_breakers'] = self.breakers.stats()
+        stats['scrapes'] = {'in_flight': len(self.in_flight), **self.scrape_stats}
+        return stats
@@ -0,0 +1,179 @@
+from typing import Dict, Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from app.core.download import ACCEPT_ENCODING, FetchError, read_html
+
+# robots.txt bodies beyond this are not read; the host is treated as having no rules
+ROBOTS_MAX_BYTES = 512 * 1024
+ROBOTS_CONTENT_TYPES = ("text/plain",)
+
+
+class TokenBucket:
+    """Token bucket limiting how often requests may start."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if self.updated_at is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        """Wait until amount tokens are available and take them.
+
+        Requests larger than the burst size wait for a full bucket and then
+        leave it in debt, so oversized requests are slowed but never stuck.
+        """
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            self._refill(loop.time())
+            needed = min(amount, self.burst)
+            if self.tokens < needed:
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+                self._refill(loop.time())
+            self.tokens -= amount
+
+
+class HostState:
+    """Concurrency and rate limits for a single host."""
+
+    def __init__(self, concurrency: int, rate: float, burst: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.robots_checked = False
+        self.robots_lock = asyncio.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        # Requests waiting for or holding a slot, and when the last one left
+        self.active = 0
+        self.last_used = time.monotonic()
+
+
+class HostScheduler:
+    """Fetch scheduler with per-host limits under a global cap.
+
+    Requests wait for a slot on their own host first, so a job dominated by
+    one domain queues behind that host's limit while requests to other
+    hosts keep using the remaining global slots.
+
+    Hosts with no requests for idle_seconds are dropped once the number of
+    hosts doubles; a host that comes back starts with a full bucket and
+    its robots.txt is checked again.
+    """
+
+    def __init__(
+        self,
+        global_limit: int = 20,
+        per_host_limit: int = 2,
+        per_host_rate: float = 4.0,
+        per_host_burst: int = 2,
+        respect_robots: bool = False,
+        user_agent: str = "*",
+        idle_seconds: float = 600.0,
+        min_hosts: int = 1000
+    ):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.per_host_rate = per_host_rate
+        self.per_host_burst = per_host_burst
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.global_semaphore = asyncio.Semaphore(global_limit)
+        self.idle_seconds = idle_seconds
+        self.min_hosts = min_hosts
+        self.hosts: Dict[str, HostState] = {}
+        self.evict_at = min_hosts
+        self.evicted = 0
+
+    def host_state(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            if len(self.hosts) >= self.evict_at:
+                self.evict_idle()
+            state = HostState(self.per_host_limit, self.per_host_rate, self.per_host_burst)
+            self.hosts[host] = state
+        return state
+
+    def evict_idle(self):
+        """Drop idle hosts; the next sweep waits until the remaining hosts double."""
+        now = time.monotonic()
+        for host, state in list(self.hosts.items()):
+            if not state.active and now - state.last_used >= self.idle_seconds:
+                del self.hosts[host]
+                self.evicted += 1
+        self.evict_at = max(self.min_hosts, len(self.hosts) * 2)
+
+    async def _apply_robots(self, state: HostState, url: str, session: aiohttp.ClientSession):
+        """Slow the host's token bucket down to its robots.txt Crawl-delay."""
+        async with state.robots_lock:
+            if state.robots_checked:
+                return
+            state.robots_checked = True
+            parts = urlsplit(url)
+            robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+            try:
+                async with session.get(
+                    robots_url,
+                    timeout=aiohttp.ClientTimeout(total=10),
+                    headers={'Accept-Encoding': ACCEPT_ENCODING},
+                    auto_decompress=False
+                ) as response:
+                    if response.status != 200:
+                        return
+                    body = (await read_html(response, ROBOTS_MAX_BYTES, ROBOTS_CONTENT_TYPES))['html']
+            except (aiohttp.ClientError, asyncio.TimeoutError, FetchError):
+                return
+
+            parser = RobotFileParser()
+            parser.parse(body.splitlines())
+            delay = parser.crawl_delay(self.user_agent)
+            if delay:
+                state.bucket.rate = min(state.bucket.rate, 1 / float(delay))
+                state.bucket.burst = 1
+                state.bucket.tokens = min(state.bucket.tokens, 1)
+
+    @asynccontextmanager
+    async def slot(self, url: str, session: Optional[aiohttp.ClientSession] = None):
+        """Hold a fetch slot for url, respecting host and global limits."""
+        host = urlsplit(url).netloc.lower()
+        state = self.host_state(host)
+        state.active += 1
+        try:
+            if self.respect_robots and session is not None and not state.robots_checked:
+                await self._apply_robots(state, url, session)
+
+            async with state.semaphore:
+                await state.bucket.acquire()
+                async with self.global_semaphore:
+                    state.in_flight += 1
+                    state.requests += 1
+                    try:
+                        yield
+                    finally:
+                        state.in_flight -= 1
+        finally:
+            state.active -= 1
+            state.last_used = time.monotonic()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-host request counts and current rate limits."""
+        return {
+            host: {
+                'requests': state.requests,
+                'in_flight': state.in_flight,
+                'rate': state.bucket.rate
+            }
+            for host, state in self.hosts.items()
+        }
@@ -1,161 +1,563 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable, AsyncIterator, TYPE_CHECKING
 import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import aiohttp
 from bs4 import BeautifulSoup
+from app.core.budget import fit_to_budget
+from app.core.crawl import CrawlFrontier
+from app.core import metrics
+from app.core.download import ACCEPT_ENCODING, error_type, read_html
+from app.core.extractive import extractive_summary
+from app.core.retry import HostBreakers, RetryPolicy, fetch_with_retries
+from app.core.fast_extract import stream_extract
+from app.core.pipeline import PageTask, ScrapePipeline
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
 from langchain_openai import ChatOpenAI
-from langchain.chains.summarize import load_summarize_chain
+from app.core.cache import SummaryCache, summary_cache_key
+from app.core.summarizer import Summarizer
+from app.core.scheduler import HostScheduler
+from app.core.simhash import SimHashIndex, simhash
+from app.core.urls import dedupe_urls, resolve_links
 import json
 
+if TYPE_CHECKING:
+    from app.core.runtime import ScraperRuntime
+
+UNWANTED_TAGS = ['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'noscript', 'meta', 'link']
+TEXT_TAGS = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'blockquote']
+CONTENT_CLASSES = ['content', 'main', 'article']
+
+
+def extract_content(soup: BeautifulSoup) -> str:
+    """Extract content from the page using an improved approach."""
+    # Remove unwanted elements
+    for element in soup.find_all(UNWANTED_TAGS):
+        element.decompose()
+
+    # Find the main content area
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=CONTENT_CLASSES)
+    
+    if main_content:
+        # If we found a main content area, use that
+        content_area = main_content
+    else:
+        # Otherwise use the body
+        content_area = soup.body or soup
+
+    # Get all text elements in order
+    elements = content_area.find_all(TEXT_TAGS)
+    
+    # Extract text, collapsing whitespace within each element
+    results_text = []
+    for element in elements:
+        text = ' '.join(element.get_text(separator=' ', strip=True).split())
+        if text:  # Only add non-empty text
+            results_text.append(text)
+    
+    # Join with double newlines to preserve structure
+    return '\n\n'.join(results_text)
+
+
+EXTRACTION_ENGINES = ("soup", "stream")
+
+# Timed stages of a page, in order; each is timed into timings['<stage>_ms']
+PIPELINE_STAGES = ("fetch", "extract", "budget", "summarise")
+
+# "llm" always asks the model, "extractive" never does, and "hybrid" keeps the
+# extractive summary unless the page is long or the summary's confidence is low
+SUMMARY_STRATEGIES = ("llm", "extractive", "hybrid")
+
+
+def page_links(soup: BeautifulSoup) -> Dict[str, Any]:
+    """Raw hrefs of followable links, read before extract_content strips nav and footer."""
+    base = soup.find('base', href=True)
+    return {
+        'links': [
+            a['href'] for a in soup.find_all('a', href=True)
+            if a['href'] and 'nofollow' not in [rel.lower() for rel in a.get('rel') or []]
+        ],
+        'base_href': base['href'] if base and base['href'] else None
+    }
+
+
+def parse_page(html: str, engine: str = "soup", url: Optional[str] = None) -> Dict[str, Any]:
+    """Parse raw HTML and return the title, extracted text and its SimHash.
+
+    Runs inside the parse executor, so it must stay a picklable module-level
+    function and must not hand back any BeautifulSoup objects. The "stream"
+    engine produces the same output in one pass without building a tree.
+    Both engines return the title as written; it is stripped here. When
+    the page's url is given, its links are also returned, resolved and
+    canonicalized, for crawling.
+    """
+    if engine == "stream":
+        page = stream_extract(html, links=url is not None)
+    elif engine == "soup":
+        soup = BeautifulSoup(html, 'html.parser')
+        title = soup.title.string if soup.title else None
+        found = page_links(soup) if url is not None else {}
+        page = {
+            'title': str(title) if title is not None else '',
+            'text': extract_content(soup),
+            **found
+        }
+    else:
+        raise ValueError(f"Unknown extraction engine: {engine}")
+    page['title'] = page['title'].strip()
+    page['fingerprint'] = simhash(page['text'])
+    if url is not None:
+        page['links'] = resolve_links(url, page['links'], page.pop('base_href'))
+    return page
+
+
+def create_parse_executor(workers: Optional[int] = None, kind: str = "process") -> Executor:
+    """Create the executor used for the parse/extract stage.
+
+    Falls back to a thread pool when processes are unavailable on the platform.
+    """
+    workers = workers or os.cpu_count() or 1
+    if kind == "process":
+        try:
+            return ProcessPoolExecutor(max_workers=workers)
+        except (NotImplementedError, OSError, ImportError):
+            pass
+    elif kind != "thread":
+        raise ValueError(f"Unknown parse executor kind: {kind}")
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+
+
 class AsyncWebScraper:
     def __init__(
         self,
         rate_limit: int = 5,
-        timeout: int = 10,
-        max_retries: int = 2
+        timeout: Optional[int] = None,
+        max_retries: int = 4,
+        parse_workers: Optional[int] = None,
+        parse_executor_kind: str = "process",
+        parse_executor: Optional[Executor] = None,
+        extraction_engine: Optional[str] = None,
+        summary_cache: Optional[SummaryCache] = None,
+        near_duplicates: Optional[SimHashIndex] = None,
+        scheduler: Optional[HostScheduler] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breakers: Optional[HostBreakers] = None,
+        runtime: Optional["ScraperRuntime"] = None,
+        summary_mode: Optional[str] = None,
+        summary_strategy: Optional[str] = None,
+        extractive_min_confidence: Optional[float] = None,
+        extractive_max_chars: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        llm_concurrency: int = 4,
+        max_page_bytes: Optional[int] = None,
+        on_event: Optional[Callable[..., None]] = None
     ):
+        # A runtime supplies shared, already-open resources the scraper
+        # must not close itself, and defaults for settings left as None
+        self.runtime = runtime
+        if runtime is not None:
+            parse_executor = parse_executor or runtime.parse_executor
+            summary_cache = summary_cache or runtime.summary_cache
+            scheduler = scheduler or runtime.scheduler
+            retry_policy = retry_policy or runtime.retry_policy
+            breakers = breakers or runtime.breakers
+            near_duplicates = near_duplicates or runtime.near_duplicates
+            summary_strategy = summary_strategy or runtime.summary_strategy
+            extraction_engine = extraction_engine or runtime.extraction_engine
+            if max_page_bytes is None:
+                max_page_bytes = runtime.max_page_bytes
+            if extractive_min_confidence is None:
+                extractive_min_confidence = runtime.extractive_min_confidence
+            if extractive_max_chars is None:
+                extractive_max_chars = runtime.extractive_max_chars
+            if token_budget is None:
+                token_budget = runtime.token_budget
+        else:
+            # The runtime's session sets its own timeout; without one, each request does
+            timeout = 10 if timeout is None else timeout
+            extraction_engine = extraction_engine or "soup"
+            max_page_bytes = 5 * 1024 * 1024 if max_page_bytes is None else max_page_bytes
+            extractive_min_confidence = 0.5 if extractive_min_confidence is None else extractive_min_confidence
+            extractive_max_chars = 20000 if extractive_max_chars is None else extractive_max_chars
+            token_budget = 3000 if token_budget is None else token_budget
+        # Called as on_event(event, url, **data) as each URL moves through the stages
+        self.on_event = on_event
         self.rate_limit = rate_limit
+        # Per-request timeout; None leaves it to the session
         self.timeout = timeout
         self.max_retries = max_retries
-        self.semaphore = asyncio.Semaphore(rate_limit)
+        # Backoff per error class, and per-host breakers that fail URLs fast
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=max_retries)
+        self.breakers = breakers or HostBreakers()
+        # Bodies beyond this many (decompressed) bytes are abandoned mid-download
+        self.max_page_bytes = max_page_bytes
+        # rate_limit is the global cap; per-host limits live in the scheduler
+        self.scheduler = scheduler or HostScheduler(global_limit=rate_limit)
+        self.parse_workers = parse_workers
+        self.parse_executor_kind = parse_executor_kind
+        # An executor passed in is shared and owned by the caller
+        self.parse_executor = parse_executor
+        self._owns_parse_executor = parse_executor is None
+        if extraction_engine not in EXTRACTION_ENGINES:
+            raise ValueError(f"Unknown extraction engine: {extraction_engine}")
+        self.extraction_engine = extraction_engine
+        self.summary_cache = summary_cache
+        # Optional SimHash index; near-duplicate pages reuse a stored summary
+        self.near_duplicates = near_duplicates
+        # Per-scraper counts, so a shared cache still yields per-job numbers
+        self.cache_stats = {'hits': 0, 'misses': 0, 'near_duplicates': 0, 'extractive': 0, 'escalated': 0}
+        summary_strategy = summary_strategy or "llm"
+        if summary_strategy not in SUMMARY_STRATEGIES:
+            raise ValueError(f"Unknown summary strategy: {summary_strategy}")
+        self.summary_strategy = summary_strategy
+        # Hybrid escalates to the LLM below this confidence or above this length
+        self.extractive_min_confidence = extractive_min_confidence
+        self.extractive_max_chars = extractive_max_chars
+        # Most tokens of page text sent to the LLM; 0 sends everything left after cleaning
+        self.token_budget = token_budget
         self.session: Optional[aiohttp.ClientSession] = None
-        self.llm = ChatOpenAI(
-            temperature=0,
-            model_name="gpt-3.5-turbo"
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=4000,
-            chunk_overlap=0
-        )
+        if runtime is not None:
+            self.llm = runtime.llm
+            self.text_splitter = runtime.text_splitter
+            self.summarizer = runtime.summarizer
+        else:
+            self.llm = ChatOpenAI(
+                temperature=0,
+                model_name="gpt-3.5-turbo",
+                max_retries=0
+            )
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=4000,
+                chunk_overlap=0
+            )
+            self.summarizer = Summarizer(self.llm, self.text_splitter, summary_mode or "stuff", llm_concurrency)
+        self.summary_mode = summary_mode or self.summarizer.mode
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if self.runtime is not None:
+            self.session = self.runtime.session
+        else:
+            self.session = aiohttp.ClientSession()
+        if self.parse_executor is None:
+            self.parse_executor = create_parse_executor(self.parse_workers, self.parse_executor_kind)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and self.runtime is None:
             await self.session.close()
+        if self._owns_parse_executor and self.parse_executor:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+            self.parse_executor = None
 
-    async def fetch_page(self, url: str) -> str:
-        """Fetch a single page with rate limiting and retries."""
-        for attempt in range(self.max_retries):
-            try:
-                async with self.semaphore:
-                    async with self.session.get(url, timeout=self.timeout) as response:
-                        response.raise_for_status()
-                        return await response.text()
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    raise
-                await asyncio.sleep(1)
+    async def fetch_page(self, url: str, validators: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Fetch a single page with rate limiting, retries and the host's circuit breaker.
+
+        When validators from a previous fetch are given, the request is made
+        conditional and a 304 comes back with not_modified set and no html.
+        url in the result is where the page was found, after redirects.
+        """
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        options: Dict[str, Any] = {} if self.timeout is None else {'timeout': self.timeout}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        async def attempt(admit: Callable[[], None]) -> Dict[str, Any]:
+            async with self.scheduler.slot(url, self.session):
+                # Checked again with the slot held: the host may have failed while we queued
+                admit()
+                async with self.session.get(url, headers=headers, auto_decompress=False, **options) as response:
+                    response.raise_for_status()
+                    page = {
+                        'url': str(response.url),
+                        'status': response.status,
+                        'not_modified': response.status == 304,
+                        'html': None,
+                        'bytes': 0,
+                        'validators': {
+                            'etag': response.headers.get('ETag') or (validators or {}).get('etag'),
+                            'last_modified': response.headers.get('Last-Modified') or (validators or {}).get('last_modified'),
+                            'body_hash': (validators or {}).get('body_hash')
+                        }
+                    }
+                    if not page['not_modified']:
+                        body = await read_html(response, self.max_page_bytes)
+                        page['html'] = body['html']
+                        page['bytes'] = body['bytes']
+                        page['validators']['body_hash'] = body['body_hash']
+                    return page
+
+        return await fetch_with_retries(url, attempt, self.retry_policy, self.breakers.for_url(url))
 
     def extract_content(self, soup: BeautifulSoup) -> str:
         """Extract content from the page using an improved approach."""
-        # Remove unwanted elements
-        for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'noscript', 'meta', 'link']):
-            element.decompose()
-
-        # Find the main content area
-        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=['content', 'main', 'article'])
-        
-        if main_content:
-            # If we found a main content area, use that
-            content_area = main_content
-        else:
-            # Otherwise use the body
-            content_area = soup.body or soup
-
-        # Get all text elements in order
-        elements = content_area.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'blockquote'])
-        
-        # Extract text and join with proper spacing
-        results_text = []
-        for element in elements:
-            text = element.get_text(separator=' ', strip=True)
-            if text:  # Only add non-empty text
-                results_text.append(text)
-        
-        # Join with double newlines to preserve structure
-        content = '\n\n'.join(results_text)
-        
-        # Clean up extra whitespace
-        content = ' '.join(content.split())
-        
-        return content
+        return extract_content(soup)
 
     async def generate_summary(self, text: str) -> str:
-        """Generate a summary using LangChain and OpenAI."""
-        # Split text into smaller chunks
-        docs = [Document(page_content=text)]
-        split_docs = self.text_splitter.split_documents(docs)
-        
-        # Use a simpler chain type for faster processing
-        chain = load_summarize_chain(
-            self.llm,
-            chain_type="stuff",
-            verbose=False
-        )
-        
-        # Generate summary
-        summary = await chain.arun(split_docs)
+        """Generate a summary, reusing a cached one for identical text."""
+        prompt = await self.prepare_prompt(text)
+        summary, _ = await self.summarize(prompt['text'], page_chars=len(text))
         return summary
 
+    async def prepare_prompt(self, text: str) -> Dict[str, Any]:
+        """Drop low-information blocks and fit the text to the token budget, off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.parse_executor, fit_to_budget, text, self.summarizer.model_name, self.token_budget
+        )
+
+    async def summarize(
+        self,
+        text: str,
+        fingerprint: Optional[int] = None,
+        page_chars: Optional[int] = None
+    ) -> Tuple[str, str]:
+        """Return the summary and its source: 'extractive', 'memory', 'database', 'near_duplicate' or 'llm'.
+
+        text is what the LLM would be sent; page_chars is the length of the
+        page it came from, which decides whether hybrid mode escalates. The
+        extractive and hybrid strategies try a local summary first. A
+        stored page whose SimHash is within the index's distance of
+        fingerprint lends its summary before the LLM is asked.
+        """
+        page_chars = len(text) if page_chars is None else page_chars
+        if self.summary_strategy == "extractive" or (
+            self.summary_strategy == "hybrid" and page_chars <= self.extractive_max_chars
+        ):
+            extract = await self.summarize_extractive(text)
+            if self.summary_strategy == "extractive" or extract['confidence'] >= self.extractive_min_confidence:
+                self.cache_stats['extractive'] += 1
+                return extract['summary'], 'extractive'
+        if self.summary_strategy == "hybrid":
+            self.cache_stats['escalated'] += 1
+
+        model_name = self.summarizer.model_name
+        key = None
+        if self.summary_cache is not None:
+            key = summary_cache_key(text, model_name, self.summarizer.prompt_id(self.summary_mode))
+            summary, tier = await self.summary_cache.get(key)
+            if summary is not None:
+                self.cache_stats['hits'] += 1
+                return summary, tier
+            self.cache_stats['misses'] += 1
+
+        source = 'llm'
+        duplicate = None
+        if self.near_duplicates is not None:
+            duplicate = await self.near_duplicates.find_summary(fingerprint)
+        if duplicate is not None:
+            summary, _ = duplicate
+            source = 'near_duplicate'
+            self.cache_stats['near_duplicates'] += 1
+        else:
+            summary = await self.run_summary_chain(text)
+
+        if key is not None:
+            await self.summary_cache.set(key, summary, model_name)
+        return summary, source
+
+    async def summarize_extractive(self, text: str) -> Dict[str, Any]:
+        """Score sentences locally in the parse executor; no network involved."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, extractive_summary, text)
+
+    async def run_summary_chain(self, text: str) -> str:
+        """Generate a summary using LangChain and OpenAI."""
+        return await self.summarizer.summarize(text, self.summary_mode)
+
+    async def parse(self, html: str, url: Optional[str] = None) -> Dict[str, Any]:
+        """Run the parse/extract stage off the event loop; with the page's url, also collect its links."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, parse_page, html, self.extraction_engine, url)
+
+    def emit(self, event: str, url: str, **data: Any):
+        if self.on_event is not None:
+            self.on_event(event, url, **data)
+
     def create_error_result(self, url: str, error: Exception) -> Dict[str, Any]:
         """Create a properly formatted error result."""
         return {
             'url': url,
             'error': str(error),
+            'error_type': error_type(error),
             'timestamp': datetime.utcnow().isoformat(),
             'title': '',
             'text': '',
             'summary': f"Error generating summary: {str(error)}"
         }
 
-    async def scrape_url(self, url: str) -> dict:
-        """Scrape a single URL and process its content."""
+    def create_unchanged_result(self, url: str, validators: Dict[str, str]) -> Dict[str, Any]:
+        """Create a result for a page that has not changed since the last fetch."""
+        return {
+            'url': url,
+            'unchanged': True,
+            'timestamp': datetime.utcnow().isoformat(),
+            'validators': validators,
+            'title': '',
+            'text': '',
+            'summary': ''
+        }
+
+    async def fetch_stage(self, page: PageTask):
+        """Fetch the page; an unchanged page is finished here."""
+        fetched = await self.fetch_page(page.url, page.validators)
+        page.lap('fetch')
+        metrics.FETCHED_BYTES.labels(page.host).inc(fetched['bytes'])
+
+        # Skip extraction and summarisation when the page is unchanged
+        validators = page.validators
+        unchanged = fetched['not_modified'] or (
+            validators and validators.get('body_hash') == fetched['validators']['body_hash']
+        )
+        self.emit('fetched', page.url, status=fetched['status'], unchanged=bool(unchanged))
+        if unchanged:
+            metrics.PAGES.labels(page.host, 'unchanged').inc()
+            page.result = self.create_unchanged_result(page.url, fetched['validators'])
+            page.result['timings'] = page.timings
+        page.fetched = fetched
+
+    async def extract_stage(self, page: PageTask):
+        """Parse and extract the text, then fit it to the prompt budget, in the parse executor."""
+        html = page.fetched.pop('html')
+        # Relative links resolve against where the page was found, which
+        # differs from the canonical URL after a redirect or a trailing slash
+        page.parsed = await self.parse(html, page.fetched['url'] if page.follow_links else None)
+        page.lap('extract')
+        self.emit('extracted', page.url, title=page.parsed['title'], chars=len(page.parsed['text']))
+
+        # Trim boilerplate and fit the page to the prompt budget
+        page.prompt = await self.prepare_prompt(page.parsed['text'])
+        page.lap('budget')
+
+    async def summarise_stage(self, page: PageTask):
+        """Generate the summary, or reuse a cached one, and build the page's result."""
+        parsed, text = page.parsed, page.parsed['text']
+        summary, summary_source = await self.summarize(page.prompt['text'], parsed.get('fingerprint'), len(text))
+        page.lap('summarise')
+        self.emit('summarised', page.url, source=summary_source)
+        metrics.SUMMARIES.labels(summary_source).inc()
+        metrics.PAGES.labels(page.host, 'stored').inc()
+
+        content = {
+            'url': page.url,
+            'timestamp': datetime.utcnow().isoformat(),
+            'title': parsed['title'],
+            'text': text,
+            'summary': summary,
+            'summary_source': summary_source,
+            'fingerprint': parsed.get('fingerprint'),
+            'validators': page.fetched['validators'],
+            'timings': page.timings,
+            'bytes': page.fetched['bytes'],
+            'tokens': {'page': page.prompt['source_tokens'], 'prompt': page.prompt['tokens']}
+        }
+        if page.follow_links:
+            content['links'] = parsed['links']
+
+        # Ensure all content is JSON serializable
+        page.result = json.loads(json.dumps(content))
+
+    async def run_stage(self, stage: Callable[[PageTask], Awaitable[None]], page: PageTask):
+        """Run one stage for page; a failure finishes the page with an error result."""
+        page.resume()
         try:
-            html = await self.fetch_page(url)
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Extract content
-            text = self.extract_content(soup)
-            
-            # Generate AI summary
-            summary = await self.generate_summary(text)
-            
-            content = {
-                'url': url,
-                'timestamp': datetime.utcnow().isoformat(),
-                'title': soup.title.string if soup.title else '',
-                'text': text,
-                'summary': summary
-            }
-            
-            # Ensure all content is JSON serializable
-            return json.loads(json.dumps(content))
+            await stage(page)
         except Exception as e:
-            return self.create_error_result(url, e)
-
-    async def scrape_urls(self, urls: List[str]) -> List[dict]:
-        """Scrape multiple URLs concurrently."""
-        # If only one URL is provided, use scrape_url directly
-        if len(urls) == 1:
-            result = await self.scrape_url(urls[0])
-            return [result]
-            
-        # For multiple URLs, use concurrent scraping
-        tasks = [self.scrape_url(url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results and ensure proper error handling
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append(self.create_error_result(urls[i], result))
-            else:
-                processed_results.append(result)
-        
-        return processed_results 
-        
\ No newline at end of file
+            self.emit('failed', page.url, error=str(e), error_type=error_type(e))
+            timings = page.timings
+            failed = next((stage for stage in PIPELINE_STAGES if f"{stage}_ms" not in timings), PIPELINE_STAGES[-1])
+            if f"{failed}_ms" not in timings:
+                # Time spent in the failing stage, retries included
+                page.lap(failed)
+            metrics.ERRORS.labels(failed, page.host, error_type(e)).inc()
+            metrics.PAGES.labels(page.host, 'failed').inc()
+            page.result = self.create_error_result(page.url, e)
+            page.result['timings'] = timings
+
+    async def scrape_url(
+        self,
+        url: str,
+        validators: Optional[Dict[str, str]] = None,
+        follow_links: bool = False
+    ) -> dict:
+        """Scrape a single URL and process its content, running its stages back to back.
+
+        With follow_links the result also carries the page's links, for crawl.
+        """
+        page = PageTask(url, validators, follow_links)
+        for stage in (self.fetch_stage, self.extract_stage, self.summarise_stage):
+            await self.run_stage(stage, page)
+            if page.result is not None:
+                break
+        return page.result
+
+    async def scrape_urls(
+        self,
+        urls: List[str],
+        validators: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> List[dict]:
+        """Scrape multiple URLs and return every result, in the order the URLs were given.
+
+        This holds the whole job's results; use iter_scrape to handle
+        each page as it finishes instead.
+        """
+        urls = dedupe_urls(urls)
+        results = {result['url']: result async for result in self.iter_scrape(urls, validators)}
+        return [results[url] for url in urls]
+
+    async def iter_scrape(
+        self,
+        urls: List[str],
+        validators: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> AsyncIterator[dict]:
+        """Scrape canonicalized URLs through the staged pipeline, yielding each result as soon as it finishes.
+
+        validators maps a canonical URL to the validators stored from its
+        last fetch. At most the pipeline's queue depth of pages is held
+        between stages, however many URLs there are, and a consumer that
+        falls behind slows the fetching down.
+        """
+        async for result in ScrapePipeline(self).run(dedupe_urls(urls), validators or {}):
+            yield result
+
+    async def crawl(self, frontier: CrawlFrontier, concurrency: Optional[int] = None) -> AsyncIterator[dict]:
+        """Scrape the frontier's URLs and the links they lead to, yielding each result as it finishes.
+
+        Up to concurrency pages (by default twice the fetch limit, so
+        fetch slots stay busy while other pages parse and summarise) are in
+        progress at once; the frontier decides what comes next and when to
+        stop. Pages are always fetched in full, since a 304 has no links to
+        follow.
+        """
+        concurrency = concurrency or self.scheduler.global_limit * 2
+
+        async def scrape(url: str) -> dict:
+            try:
+                return await self.scrape_url(url, follow_links=True)
+            except Exception as e:
+                return self.create_error_result(url, e)
+
+        tasks: Dict[asyncio.Future, int] = {}
+        try:
+            while True:
+                while len(tasks) < concurrency:
+                    next_url = frontier.pop()
+                    if next_url is None:
+                        break
+                    url, depth = next_url
+                    tasks[asyncio.ensure_future(scrape(url))] = depth
+                if not tasks:
+                    return
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    depth = tasks.pop(task)
+                    result = task.result()
+                    frontier.extend(result.pop('links', None) or [], depth + 1)
+                    yield result
+        finally:
+            # Stop outstanding pages if the consumer gives up early
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,253 @@
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import logging
+import re
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import DATABASE_ERRORS
+from app.db.models import ScrapedContent
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r'\w+')
+
+# Words per shingle; three-word shingles survive a changed byline or date
+SHINGLE_SIZE = 3
+
+# Below this many shingles a fingerprint is too unstable to compare
+MIN_SHINGLES = 32
+
+# Nearest entries a lookup checks against the database; entries turning out
+# stale or extractive are skipped, so this is well above the usual match count
+MAX_CANDIDATES = 32
+
+BITS = np.arange(64, dtype=np.uint64)
+
+# Odd 64-bit constants used to mix word hashes into shingle hashes
+MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F), np.uint64(0x165667B19E3779F9))
+
+
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _avalanche(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, applied to a whole array at once."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """64-bit hashes of every run of `size` consecutive words."""
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    # Hash each distinct word once, then combine neighbours with array arithmetic
+    vocabulary: Dict[str, int] = {}
+    hashes = np.fromiter(
+        (vocabulary[word] if word in vocabulary else vocabulary.setdefault(word, _word_hash(word)) for word in words),
+        dtype=np.uint64,
+        count=len(words)
+    )
+    count = len(words) - size + 1
+    combined = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for offset in range(size):
+            combined ^= hashes[offset:offset + count] * MIX[offset % len(MIX)]
+        return _avalanche(combined)
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of the text as a signed integer, or None for very short texts.
+
+    Each bit is set when more than half of the shingle hashes have it set,
+    so texts sharing most of their shingles differ in only a few bits.
+    """
+    hashes = shingle_hashes(text)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    fingerprint = 0
+    for bit in range(64):
+        if 2 * np.count_nonzero(hashes & np.uint64(1 << bit)) > len(hashes):
+            fingerprint |= 1 << bit
+    # Stored in a signed BIGINT column
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:  # numpy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(values: np.ndarray) -> np.ndarray:
+        return _BYTE_COUNTS[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << 64) - 1)).count('1')
+
+
+class SimHashIndex:
+    """In-memory index of scraped_content fingerprints for near-duplicate lookups.
+
+    Fingerprints live in one contiguous int64 array, so a lookup is a single
+    vectorised XOR and popcount over every stored page. The array is loaded
+    from the database on first use and topped up with newer rows every
+    refresh_seconds; rows stored by this process are added as they are
+    written. Each content id has one entry, replaced in place when the page
+    is stored again. A match is re-checked against the row before its
+    summary is reused, so stale entries are harmless. Without a
+    session_factory nothing is loaded and no summary is lent; database
+    errors are logged and counted, and the lookup finds no near-duplicate.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 3,
+        refresh_seconds: float = 60,
+        load_batch: int = 100000,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+    ):
+        self.session_factory = session_factory
+        self.max_distance = max_distance
+        self.refresh_seconds = refresh_seconds
+        self.load_batch = load_batch
+        self.fingerprints = np.empty(1024, dtype=np.int64)
+        self.ids = np.empty(1024, dtype=np.int64)
+        self.size = 0
+        self.max_loaded_id = 0
+        # Ids added by this process that the next refresh will load again
+        self.unloaded: Set[int] = set()
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.stats = {'lookups': 0, 'matches': 0, 'stale': 0, 'database_errors': 0}
+
+    def _position(self, content_id: int) -> Optional[int]:
+        positions = np.flatnonzero(self.ids[:self.size] == content_id)
+        return int(positions[0]) if len(positions) else None
+
+    def _append(self, ids: np.ndarray, fingerprints: np.ndarray):
+        needed = self.size + len(ids)
+        if needed > len(self.ids):
+            capacity = max(needed, len(self.ids) * 2)
+            self.fingerprints = np.resize(self.fingerprints, capacity)
+            self.ids = np.resize(self.ids, capacity)
+        self.fingerprints[self.size:needed] = fingerprints
+        self.ids[self.size:needed] = ids
+        self.size = needed
+
+    def add(self, content_id: int, fingerprint: int):
+        """Index a stored page, replacing its entry if it is already indexed."""
+        position = self._position(content_id)
+        if position is not None:
+            self.fingerprints[position] = fingerprint
+            return
+        self._append(np.array([content_id], dtype=np.int64), np.array([fingerprint], dtype=np.int64))
+        if content_id > self.max_loaded_id:
+            self.unloaded.add(content_id)
+
+    def add_many(self, rows: List[Tuple[int, int]]):
+        """Index rows loaded from the database, newer than any loaded before."""
+        fresh = []
+        for content_id, fingerprint in rows:
+            if content_id in self.unloaded:
+                # Already added by this process; keep the database's current value
+                self.unloaded.discard(content_id)
+                self.fingerprints[self._position(content_id)] = fingerprint
+            else:
+                fresh.append((content_id, fingerprint))
+        if fresh:
+            self._append(
+                np.fromiter((row[0] for row in fresh), dtype=np.int64, count=len(fresh)),
+                np.fromiter((row[1] for row in fresh), dtype=np.int64, count=len(fresh))
+            )
+
+    def candidates(self, fingerprint: int, limit: int = MAX_CANDIDATES) -> List[Tuple[int, int]]:
+        """Closest (content_id, distance) pairs within max_distance, nearest first."""
+        if self.size == 0:
+            return []
+        distances = popcount((self.fingerprints[:self.size] ^ np.int64(fingerprint)).view(np.uint64))
+        within = np.flatnonzero(distances <= self.max_distance)
+        if len(within) == 0:
+            return []
+        nearest = within[np.argsort(distances[within], kind='stable')[:limit]]
+        return [(int(self.ids[i]), int(distances[i])) for i in nearest]
+
+    async def refresh(self):
+        """Load rows stored since the last refresh, at most every refresh_seconds."""
+        now = time.monotonic()
+        if self.session_factory is None:
+            return
+        if self.loaded_at is not None and now - self.loaded_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if self.loaded_at is not None and now - self.loaded_at < self.refresh_seconds:
+                return
+            try:
+                async with self.session_factory() as db:
+                    while True:
+                        rows = (await db.execute(
+                            select(ScrapedContent.id, ScrapedContent.fingerprint)
+                            .where(ScrapedContent.id > self.max_loaded_id, ScrapedContent.fingerprint.is_not(None))
+                            .order_by(ScrapedContent.id)
+                            .limit(self.load_batch)
+                        )).all()
+                        self.add_many(rows)
+                        if rows:
+                            self.max_loaded_id = rows[-1].id
+                        if len(rows) < self.load_batch:
+                            break
+            except DATABASE_ERRORS:
+                # Batches loaded before the error are kept; the rest come with the next refresh
+                self._database_error("refresh")
+            else:
+                # Ids at or below max_loaded_id are never loaded again
+                self.unloaded = {content_id for content_id in self.unloaded if content_id > self.max_loaded_id}
+            self.loaded_at = time.monotonic()
+
+    async def find_summary(self, fingerprint: Optional[int]) -> Optional[Tuple[str, int]]:
+        """Summary and id of a stored near-duplicate of the fingerprinted text, if any."""
+        if fingerprint is None or self.max_distance < 0 or self.session_factory is None:
+            return None
+        await self.refresh()
+        self.stats['lookups'] += 1
+        candidates = self.candidates(fingerprint)
+        if not candidates:
+            return None
+        try:
+            async with self.session_factory() as db:
+                rows = {
+                    row.id: row
+                    for row in await db.execute(
+                        select(ScrapedContent.id, ScrapedContent.summary, ScrapedContent.fingerprint, ScrapedContent.extra_metadata)
+                        .where(ScrapedContent.id.in_([content_id for content_id, _ in candidates]))
+                    )
+                }
+        except DATABASE_ERRORS:
+            self._database_error("lookup")
+            return None
+        for content_id, _ in candidates:
+            row = rows.get(content_id)
+            # The row may have been re-scraped since it was indexed
+            if row is None or row.fingerprint is None or hamming_distance(row.fingerprint, fingerprint) > self.max_distance:
+                self.stats['stale'] += 1
+                if row is not None and row.fingerprint is not None:
+                    self.add(content_id, row.fingerprint)
+                continue
+            # Extractive summaries are not worth lending to a page that would get an LLM one
+            if (row.extra_metadata or {}).get('summary_source') == 'extractive':
+                continue
+            self.stats['matches'] += 1
+            return row.summary, content_id
+        return None
+
+    def _database_error(self, operation: str):
+        self.stats['database_errors'] += 1
+        logger.warning("SimHash index database %s failed; carrying on without near-duplicates", operation, exc_info=True)
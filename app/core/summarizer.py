@@ -0,0 +1,77 @@
+from typing import Any, List, Optional
+import asyncio
+
+from langchain.chains.summarize import map_reduce_prompt, stuff_prompt
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.core.llm_dispatch import LLMDispatcher
+
+SUMMARY_MODES = ("stuff", "map_reduce")
+
+
+class Summarizer:
+    """LLM summarisation in "stuff" or "map_reduce" mode.
+
+    The prompts are built once and every call goes through the shared
+    LLMDispatcher, which bounds concurrency and enforces rate budgets. In
+    map_reduce mode the chunks of a long page are summarised concurrently
+    and the partial summaries are then reduced into one.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        text_splitter: RecursiveCharacterTextSplitter,
+        mode: str = "stuff",
+        max_concurrency: int = 4,
+        reduce_max_chars: int = 12000,
+        dispatcher: Optional[LLMDispatcher] = None
+    ):
+        if mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode: {mode}")
+        self.llm = llm
+        self.text_splitter = text_splitter
+        self.mode = mode
+        self.reduce_max_chars = reduce_max_chars
+        self.dispatcher = dispatcher or LLMDispatcher(llm, max_concurrency=max_concurrency)
+        self.stuff_prompt = stuff_prompt.PROMPT
+        self.map_prompt = map_reduce_prompt.PROMPT
+        self.reduce_prompt = map_reduce_prompt.PROMPT
+
+    @property
+    def model_name(self) -> str:
+        return self.dispatcher.model_name
+
+    def prompt_id(self, mode: str = None) -> str:
+        """Identify the prompt(s) a mode uses, for summary cache keys."""
+        mode = mode or self.mode
+        if mode == "stuff":
+            return f"stuff:{stuff_prompt.PROMPT.template}"
+        return f"map_reduce:{map_reduce_prompt.PROMPT.template}"
+
+    async def _run(self, prompt, text: str) -> str:
+        return await self.dispatcher.invoke(prompt.format(text=text))
+
+    async def summarize(self, text: str, mode: str = None) -> str:
+        """Summarise text with the given mode, or the default one."""
+        mode = mode or self.mode
+        if mode == "stuff":
+            return await self._run(self.stuff_prompt, text)
+        if mode == "map_reduce":
+            return await self._map_reduce(text)
+        raise ValueError(f"Unknown summary mode: {mode}")
+
+    async def _map_reduce(self, text: str) -> str:
+        chunks = self.text_splitter.split_text(text)
+        if len(chunks) <= 1:
+            return await self._run(self.stuff_prompt, text)
+
+        partials: List[str] = await asyncio.gather(
+            *[self._run(self.map_prompt, chunk) for chunk in chunks]
+        )
+        combined = '\n\n'.join(partials)
+
+        # Collapse again while the partial summaries are still too long
+        if len(combined) > self.reduce_max_chars and len(combined) < len(text):
+            return await self._map_reduce(combined)
+        return await self._run(self.reduce_prompt, combined)
@@ -0,0 +1,73 @@
+from typing import Iterable, List, Optional
+from urllib.parse import unquote_plus, urljoin, urlsplit, urlunsplit
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = frozenset({
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_hsenc', '_hsmi', 'mkt_tok'
+})
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Only these link schemes are worth following; mailto:, javascript: etc. are not
+FOLLOW_SCHEMES = ('http', 'https')
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Reduce trivially different spellings of a URL to one form.
+
+    Lowercases the scheme and host, drops default ports, the fragment and
+    tracking parameters and strips trailing slashes from the path. The
+    canonical URL is the one fetched, so the remaining query parameters
+    keep their order and encoding: servers may read them in order, and
+    re-encoding them can ask for a different resource.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        host = f"[{host}]"
+    port = parts.port
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else '')
+        host = f"{credentials}@{host}"
+
+    path = parts.path.rstrip('/') or '/'
+    query = '&'.join(
+        pair for pair in parts.query.split('&')
+        if pair and not is_tracking_param(unquote_plus(pair.split('=', 1)[0]))
+    )
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    """Canonicalize URLs and drop repeats, keeping first-seen order."""
+    return list(dict.fromkeys(canonicalize_url(url) for url in urls))
+
+
+def resolve_links(page_url: str, hrefs: Iterable[str], base_href: Optional[str] = None) -> List[str]:
+    """Resolve a page's hrefs against it (or its <base href>) into canonical http(s) URLs, without repeats."""
+    base = urljoin(page_url, base_href) if base_href else page_url
+    links = {}
+    for href in hrefs:
+        href = href.strip()
+        if not href or href.startswith('#'):
+            continue
+        try:
+            url = urljoin(base, href)
+            if urlsplit(url).scheme.lower() not in FOLLOW_SCHEMES:
+                continue
+            links[canonicalize_url(url)] = None
+        except ValueError:
+            # Malformed hosts or ports, e.g. http://[broken/
+            continue
+    return list(links)
@@ -0,0 +1,148 @@
+from typing import Any, Dict, List
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import JSON, String, cast, column, func, literal_column, update, values
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.db.models import ScrapedContent
+
+TITLE_MAX_LENGTH = ScrapedContent.__table__.c.title.type.length
+
+
+def content_metadata(result: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = {'timestamp': result['timestamp']}
+    if result.get('validators'):
+        metadata['validators'] = result['validators']
+    if result.get('summary_source'):
+        metadata['summary_source'] = result['summary_source']
+    return metadata
+
+
+class ScrapedContentWriter:
+    """Writes scrape results to scraped_content in batches.
+
+    New and changed pages are written with one INSERT ... ON CONFLICT (url)
+    DO UPDATE per batch, unchanged pages with one UPDATE ... FROM VALUES,
+    and each batch is committed on its own so finished pages survive a
+    failure later in the job. Error results only create a row when the URL
+    is new and never overwrite stored content.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 500):
+        self.db = db
+        self.batch_size = batch_size
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': 0, 'batches': 0}
+        # Time spent writing and committing, for the job's timing breakdown
+        self.seconds = 0.0
+
+    async def add(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Queue a result; returns the rows stored if this filled a batch."""
+        # A URL appearing twice in one batch keeps its latest result
+        self.pending[result['url']] = result
+        if len(self.pending) >= self.batch_size:
+            return await self.flush()
+        return []
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """Write and commit the queued results; returns {'url', 'id', 'fingerprint', 'inserted'} per stored page."""
+        if not self.pending:
+            return []
+        results = list(self.pending.values())
+        self.pending = {}
+        now = datetime.utcnow()
+        started = time.perf_counter()
+
+        content = [r for r in results if not r.get('error') and not r.get('unchanged')]
+        unchanged = [r for r in results if r.get('unchanged')]
+        errors = [r for r in results if r.get('error')]
+
+        stored = []
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        try:
+            if content:
+                stored = await self._upsert(content, now)
+            if unchanged:
+                counts['unchanged'] = await self._touch(unchanged, now)
+            if errors:
+                counts['errors'] = await self._insert_errors(errors, now)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds += elapsed
+            metrics.PERSIST_SECONDS.observe(elapsed)
+
+        self.stats['batches'] += 1
+        for row in stored:
+            counts['inserted' if row['inserted'] else 'updated'] += 1
+        for outcome, count in counts.items():
+            self.stats[outcome] += count
+            metrics.PERSISTED_ROWS.labels(outcome).inc(count)
+        return stored
+
+    def _row(self, result: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        return {
+            'url': result['url'],
+            'title': (result['title'] or '')[:TITLE_MAX_LENGTH],
+            'text': result['text'],
+            'summary': result['summary'],
+            'extra_metadata': content_metadata(result),
+            'fingerprint': result.get('fingerprint'),
+            'created_at': now,
+            'updated_at': now
+        }
+
+    async def _upsert(self, results: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+        stmt = insert(ScrapedContent).values([self._row(r, now) for r in results])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ScrapedContent.url],
+            set_={
+                'title': stmt.excluded.title,
+                'text': stmt.excluded.text,
+                'summary': stmt.excluded.summary,
+                'extra_metadata': stmt.excluded.extra_metadata,
+                'fingerprint': stmt.excluded.fingerprint,
+                'updated_at': stmt.excluded.updated_at
+            }
+        ).returning(
+            ScrapedContent.id,
+            ScrapedContent.url,
+            ScrapedContent.fingerprint,
+            # xmax is 0 only for rows this statement inserted
+            literal_column("(xmax = 0)").label("inserted")
+        )
+        return [
+            {'url': row.url, 'id': row.id, 'fingerprint': row.fingerprint, 'inserted': bool(row.inserted)}
+            for row in await self.db.execute(stmt)
+        ]
+
+    async def _touch(self, results: List[Dict[str, Any]], now: datetime) -> int:
+        """Bump updated_at and merge fresh validators into the metadata."""
+        data = values(
+            column('url', String),
+            column('metadata', String),
+            name='unchanged'
+        ).data([(r['url'], json.dumps(content_metadata(r))) for r in results])
+        merged = cast(
+            func.coalesce(cast(ScrapedContent.extra_metadata, JSONB), cast('{}', JSONB))
+            .op('||')(cast(data.c.metadata, JSONB)),
+            JSON
+        )
+        stmt = (
+            update(ScrapedContent)
+            .where(ScrapedContent.url == data.c.url)
+            .values(updated_at=now, extra_metadata=merged)
+        )
+        return (await self.db.execute(stmt)).rowcount
+
+    async def _insert_errors(self, results: List[Dict[str, Any]], now: datetime) -> int:
+        stmt = insert(ScrapedContent).values([self._row(r, now) for r in results])
+        stmt = stmt.on_conflict_do_nothing(index_elements=[ScrapedContent.url])
+        return (await self.db.execute(stmt)).rowcount
@@ -0,0 +1,36 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.db.models import Base
+
+# create_all only creates missing tables, so columns and indexes added to
+# existing tables are brought in here. Every statement is idempotent and
+# runs on each start.
+MIGRATIONS = [
+    # Summary cache stats, per-job options and bulk upload shards
+    "ALTER TABLE scraping_jobs ADD COLUMN IF NOT EXISTS stats JSON",
+    "ALTER TABLE scraping_jobs ADD COLUMN IF NOT EXISTS options JSON",
+    "ALTER TABLE scraping_jobs ADD COLUMN IF NOT EXISTS parent_id INTEGER",
+    # Worker leases
+    "ALTER TABLE scraping_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0",
+    "ALTER TABLE scraping_jobs ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(255)",
+    "ALTER TABLE scraping_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_scraping_jobs_status ON scraping_jobs (status)",
+    "CREATE INDEX IF NOT EXISTS ix_scraping_jobs_parent_id ON scraping_jobs (parent_id)",
+    # SimHash fingerprints and keyset pagination of content
+    "ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS fingerprint BIGINT",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_content_created_at_id ON scraped_content (created_at, id)",
+]
+
+# Held while migrating, so an API and its workers starting together do
+# not race to create the same tables and indexes
+MIGRATION_LOCK_ID = 7212024
+
+
+def migrate(engine: Engine):
+    """Create missing tables, then add columns and indexes missing from existing ones."""
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {'id': MIGRATION_LOCK_ID})
+        Base.metadata.create_all(bind=connection)
+        for statement in MIGRATIONS:
+            connection.execute(text(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, JSON, ARRAY, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -13,16 +13,37 @@ class ScrapedContent(Base):
     text = Column(Text)
     summary = Column(Text)
     extra_metadata = Column(JSON)
+    fingerprint = Column(BigInteger, nullable=True)  # 64-bit SimHash of text, for near-duplicate lookups
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves newest-first keyset pagination of /api/content
+        Index('ix_scraped_content_created_at_id', 'created_at', 'id'),
+    )
+
 class ScrapingJob(Base):
     __tablename__ = "scraping_jobs"
 
     id = Column(Integer, primary_key=True, index=True)
-    status = Column(String(50))  # pending, running, completed, failed
+    status = Column(String(50), index=True)  # ingesting, pending, running, completed, failed
+    parent_id = Column(Integer, nullable=True, index=True)  # Bulk upload this job is a shard of
     urls = Column(ARRAY(String))  # List of URLs to scrape
     results = Column(JSON)  # Results of scraping
+    stats = Column(JSON, nullable=True)  # Job-level counters, e.g. summary cache hits
+    options = Column(JSON, nullable=True)  # Per-job settings, e.g. summary_strategy
     error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)  # Times a worker has claimed the job
+    lease_owner = Column(String(255), nullable=True)  # Worker currently running the job
+    lease_expires_at = Column(DateTime, nullable=True)  # Renewed by the worker heartbeat
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
+
+class SummaryCacheEntry(Base):
+    __tablename__ = "summary_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of normalized text, model and prompt
+    model = Column(String(100))
+    summary = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
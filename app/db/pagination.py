@@ -0,0 +1,62 @@
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+from datetime import datetime
+
+from sqlalchemy import Select, tuple_
+
+from app.db.models import ScrapedContent
+
+# Columns a client may ask for with `fields=`; text and summary are the heavy ones
+CONTENT_FIELDS = ('id', 'url', 'title', 'text', 'summary', 'extra_metadata', 'created_at', 'updated_at')
+
+# Always loaded so every row can produce a cursor
+CURSOR_FIELDS = ('id', 'created_at')
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for the position just after the given row."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Turn a comma-separated `fields=` value into column names, defaulting to all."""
+    if not fields:
+        return list(CONTENT_FIELDS)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in CONTENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def newest_first(query: Select, cursor: Optional[str] = None) -> Select:
+    """Order by (created_at, id) descending and resume after the cursor.
+
+    The row comparison is served by the (created_at, id) index, so a deep
+    page costs the same as the first one.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(ScrapedContent.created_at, ScrapedContent.id) < (created_at, row_id))
+    return query.order_by(ScrapedContent.created_at.desc(), ScrapedContent.id.desc())
+
+
+def next_cursor(rows: Sequence[Any], limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when this page was the last."""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
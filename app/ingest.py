@@ -0,0 +1,142 @@
+"""Streaming ingestion of very large URL lists.
+
+An upload is read line by line, each URL is validated and canonicalized
+as it arrives, and every shard_size distinct URLs are committed as a
+pending child job of one parent job. Only the current shard, a short
+sample of errors and a Bloom filter of seen URLs are held in memory, so
+an upload of any size runs in flat memory, and the shards already
+committed start running before the upload ends.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import json
+import os
+
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bloom import ScalableBloomFilter
+from app.core.urls import canonicalize_url
+from app.db.models import ScrapingJob
+
+# URLs per child job unless the upload asks for another size
+BULK_SHARD_SIZE = int(os.getenv("BULK_SHARD_SIZE", "1000"))
+BULK_MAX_SHARD_SIZE = 10000
+
+# Longest line accepted; longer ones are skipped as invalid without being buffered
+MAX_LINE_BYTES = 16 * 1024
+
+# Invalid lines reported back with their line numbers; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# A repeated URL is dropped; this share of distinct ones is wrongly dropped as repeats
+DEDUPE_ERROR_RATE = 1e-6
+
+_url = TypeAdapter(HttpUrl)
+
+
+async def ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Split a byte stream into (line number, text); an overlong line comes back as None."""
+    buffer = b''
+    number = 0
+    overlong = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b'\n')
+        buffer = lines.pop()
+        for line in lines:
+            number += 1
+            if overlong or len(line) > MAX_LINE_BYTES:
+                yield number, None
+            else:
+                yield number, line.decode('utf-8', errors='replace')
+            overlong = False
+        if len(buffer) > MAX_LINE_BYTES:
+            # Keep reading to the end of the line, but not into memory
+            overlong = True
+            buffer = b''
+    if buffer or overlong:
+        yield number + 1, None if overlong else buffer.decode('utf-8', errors='replace')
+
+
+def parse_line(line: str) -> Optional[str]:
+    """The canonical URL on one line: a JSON string, a {"url": ...} object or a bare URL.
+
+    Returns None for blank lines and raises ValueError for anything else
+    that is not a valid http(s) URL.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line[0] in '{"':
+        value = json.loads(line)
+        if isinstance(value, dict):
+            value = value.get('url')
+        if not isinstance(value, str):
+            raise ValueError("expected a URL string or an object with a \"url\" string")
+        line = value
+    try:
+        return canonicalize_url(str(_url.validate_python(line)))
+    except ValidationError as e:
+        raise ValueError(e.errors()[0]['msg']) from None
+
+
+class ShardWriter:
+    """Validates streamed URLs and commits them as child jobs of parent."""
+
+    def __init__(self, db: AsyncSession, parent: ScrapingJob, shard_size: int = BULK_SHARD_SIZE):
+        self.db = db
+        self.parent_id = parent.id
+        self.options = parent.options
+        self.shard_size = shard_size
+        self.seen = ScalableBloomFilter(min(shard_size * 100, 1000000), DEDUPE_ERROR_RATE)
+        self.shard: List[str] = []
+        self.shard_ids: List[int] = []
+        self.stats: Dict[str, Any] = {'lines': 0, 'urls': 0, 'duplicates': 0, 'invalid': 0, 'shards': 0, 'errors': []}
+
+    def _invalid(self, number: int, error: str):
+        self.stats['invalid'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append({'line': number, 'error': error})
+
+    async def add_line(self, number: int, line: Optional[str]):
+        self.stats['lines'] += 1
+        if line is None:
+            self._invalid(number, f"line longer than {MAX_LINE_BYTES} bytes")
+            return
+        try:
+            url = parse_line(line)
+        except ValueError as e:
+            self._invalid(number, str(e))
+            return
+        if url is None:
+            return
+        if not self.seen.add(url):
+            self.stats['duplicates'] += 1
+            return
+        self.shard.append(url)
+        self.stats['urls'] += 1
+        if len(self.shard) >= self.shard_size:
+            await self.flush()
+
+    async def flush(self):
+        """Commit the URLs gathered so far as one pending child job."""
+        if not self.shard:
+            return
+        shard = ScrapingJob(
+            status="pending",
+            parent_id=self.parent_id,
+            urls=self.shard,
+            results=[],
+            options=self.options
+        )
+        self.db.add(shard)
+        await self.db.commit()
+        self.shard_ids.append(shard.id)
+        # Committed shards are not needed here again; keep the session from holding them
+        self.db.expunge(shard)
+        self.stats['shards'] += 1
+        self.shard = []
+
+    async def consume(self, chunks: AsyncIterator[bytes]):
+        async for number, line in ndjson_lines(chunks):
+            await self.add_line(number, line)
+        await self.flush()
@@ -0,0 +1,277 @@
+from typing import Any, Dict, List, Optional
+import os
+import time
+from collections import Counter
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.crawl import CrawlFrontier
+from app.core.events import JOB_COMPLETED, make_event
+from app.core.profiling import JobProfiler
+from app.core.scraper import AsyncWebScraper
+from app.core.urls import dedupe_urls
+from app.core.runtime import ScraperRuntime
+from app.db.bulk import ScrapedContentWriter
+from app.db.models import ScrapedContent, ScrapingJob
+from app.db.database import AsyncSessionLocal
+
+# Results are upserted and committed in batches of this many pages
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "50"))
+
+
+def result_record(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact per-URL record kept in job.results; page content stays in scraped_content."""
+    if result.get('error'):
+        status = "failed"
+    elif result.get('unchanged'):
+        status = "unchanged"
+    else:
+        status = "stored"
+    return {
+        'url': result['url'],
+        'status': status,
+        'content_id': None,
+        'error': result.get('error'),
+        'error_type': result.get('error_type'),
+        'summary_source': result.get('summary_source'),
+        'timings': result.get('timings', {}),
+        'bytes': result.get('bytes', 0),
+        'tokens': result.get('tokens', {}),
+        'chars': len(result.get('text') or '')
+    }
+
+
+class StageTimings:
+    """Where a job's time went: per-stage totals, means and maxima over its pages.
+
+    Kept as running totals, so a crawl of millions of pages does not have
+    to hold every page's record. Pages run concurrently, so stage totals
+    can add up to more than the job's wall time.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, timings: Dict[str, float]):
+        for key, ms in (timings or {}).items():
+            stage = self.stages.setdefault(key[:-3] if key.endswith('_ms') else key, {'pages': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stage['pages'] += 1
+            stage['total_ms'] += ms
+            stage['max_ms'] = max(stage['max_ms'], ms)
+
+    def report(self, persist_seconds: float, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            'wall_ms': round(wall_seconds * 1000, 1),
+            'persist_ms': round(persist_seconds * 1000, 1),
+            'stages': {
+                name: {**stage, 'total_ms': round(stage['total_ms'], 1), 'mean_ms': round(stage['total_ms'] / stage['pages'], 1)}
+                for name, stage in self.stages.items()
+            }
+        }
+
+
+async def shard_progress(db: AsyncSession, parent_id: int) -> Dict[str, Any]:
+    """A bulk upload's progress, aggregated over its shards."""
+    rows = (await db.execute(
+        select(
+            ScrapingJob.id,
+            ScrapingJob.status,
+            func.coalesce(func.cardinality(ScrapingJob.urls), 0).label('urls'),
+            ScrapingJob.stats['rows'].label('rows')
+        )
+        .where(ScrapingJob.parent_id == parent_id)
+        .order_by(ScrapingJob.id)
+    )).all()
+    shards: Counter = Counter()
+    totals: Counter = Counter()
+    urls = done = 0
+    for row in rows:
+        shards[row.status] += 1
+        urls += row.urls
+        if row.status in ("completed", "failed"):
+            done += row.urls
+        totals.update(row.rows or {})
+    return {
+        'shards': dict(shards),
+        'urls': urls,
+        'urls_done': done,
+        'percent': round(100 * done / urls, 1) if urls else 0.0,
+        'rows': dict(totals),
+        'shard_ids': [row.id for row in rows]
+    }
+
+
+async def finish_parent(db: AsyncSession, parent_id: int, runtime: Optional[ScraperRuntime] = None) -> Optional[str]:
+    """Close a bulk upload's parent job once none of its shards is left to run.
+
+    Called as each shard finishes and when the upload ends; returns the
+    parent's new status, or None if it is still running or another
+    caller already closed it.
+    """
+    counts = dict((await db.execute(
+        select(ScrapingJob.status, func.count())
+        .where(ScrapingJob.parent_id == parent_id)
+        .group_by(ScrapingJob.status)
+    )).all())
+    if counts.get("pending") or counts.get("running"):
+        return None
+    failed = counts.get("failed", 0)
+    status = "failed" if failed else "completed"
+    error = f"{failed} of {sum(counts.values())} shards failed" if failed else None
+    closed = await db.execute(
+        update(ScrapingJob)
+        .where(ScrapingJob.id == parent_id, ScrapingJob.status == "running")
+        .values(status=status, error=error)
+    )
+    await db.commit()
+    if closed.rowcount != 1:
+        return None
+    if runtime is not None:
+        runtime.job_events.publish(make_event(parent_id, JOB_COMPLETED, status=status, error=error))
+    return status
+
+
+async def run_shards(parent_id: int, runtime: ScraperRuntime):
+    """Run a bulk upload's pending shards one after another, for JOB_RUNNER=inline."""
+    while True:
+        async with AsyncSessionLocal() as db:
+            shard = (await db.execute(
+                select(ScrapingJob.id, ScrapingJob.urls, ScrapingJob.options)
+                .where(ScrapingJob.parent_id == parent_id, ScrapingJob.status == "pending")
+                .order_by(ScrapingJob.id)
+                .limit(1)
+            )).first()
+        if shard is None:
+            return
+        try:
+            await process_scraping_job(shard.id, shard.urls, runtime, shard.options)
+        except Exception:
+            # Recorded on the shard; carry on with the others
+            pass
+
+
+async def process_scraping_job(
+    job_id: int,
+    urls: List[str],
+    runtime: ScraperRuntime,
+    options: Optional[Dict[str, Any]] = None
+):
+    """Scrape a job's URLs and store the results.
+
+    options are the job's own settings; summary_strategy overrides the
+    runtime default and profile=True records a cProfile of the job. With
+    crawl settings the URLs are seeds whose links are followed; pages go
+    to scraped_content as they finish and, since a crawl can reach
+    millions of pages, the job keeps counts rather than a record per URL.
+    """
+    options = options or {}
+    crawl = options.get('crawl')
+    started = time.perf_counter()
+    # Jobs queued before canonicalization may still hold raw URLs
+    urls = dedupe_urls(urls)
+    db = AsyncSessionLocal()
+    job = None
+
+    def emit(event: str, url: str = None, **data):
+        runtime.job_events.publish(make_event(job_id, event, url, **data))
+
+    def stored(rows):
+        for row in rows:
+            if row['url'] in records:
+                records[row['url']]['content_id'] = row['id']
+            # Later pages in this process can match it without waiting for a refresh
+            if row['fingerprint'] is not None and runtime.near_duplicates is not None:
+                runtime.near_duplicates.add(row['id'], row['fingerprint'])
+            emit('stored', row['url'], content_id=row['id'])
+
+    try:
+        # Update job status
+        job = await db.get(ScrapingJob, job_id)
+        job.status = "running"
+        await db.commit()
+
+        # Validators from earlier fetches make re-scrapes conditional; crawls
+        # fetch in full to see each page's links
+        existing = {} if crawl is not None else {
+            row.url: row
+            for row in await db.execute(
+                select(ScrapedContent.id, ScrapedContent.url, ScrapedContent.extra_metadata)
+                .where(ScrapedContent.url.in_(urls))
+            )
+        }
+        validators = {
+            url: (row.extra_metadata or {}).get('validators')
+            for url, row in existing.items()
+        }
+
+        writer = ScrapedContentWriter(db, PERSIST_BATCH_SIZE)
+        records: Dict[str, Dict[str, Any]] = {}
+        timings = StageTimings()
+        outcomes: Counter = Counter()
+        frontier = CrawlFrontier(urls, **crawl) if crawl is not None else None
+
+        # Initialize scraper
+        with JobProfiler(job_id, bool(options.get('profile'))) as profiler:
+            async with AsyncWebScraper(
+                runtime=runtime,
+                on_event=emit,
+                summary_strategy=options.get('summary_strategy')
+            ) as scraper:
+                if frontier is not None:
+                    results = scraper.crawl(frontier)
+                else:
+                    results = scraper.iter_scrape(urls, validators)
+                # Store results in batches as they finish rather than after the slowest page
+                async for result in results:
+                    record = result_record(result)
+                    timings.add(record['timings'])
+                    outcomes[record['status']] += 1
+                    if frontier is None:
+                        records[result['url']] = record
+                    if result.get('unchanged'):
+                        records[result['url']]['content_id'] = existing[result['url']].id
+                        emit('stored', result['url'], content_id=existing[result['url']].id)
+                    stored(await writer.add(result))
+                stored(await writer.flush())
+
+        wall_seconds = time.perf_counter() - started
+
+        # Update job status
+        job.status = "completed"
+        # Keep results in request order
+        job.results = [records[url] for url in urls if url in records]
+        job.stats = {
+            'summary_cache': scraper.cache_stats,
+            'rows': writer.stats,
+            'timings': timings.report(writer.seconds, wall_seconds)
+        }
+        if frontier is not None:
+            job.stats['crawl'] = {**frontier.report(), 'pages': dict(outcomes)}
+        if profiler.report is not None:
+            job.stats['profile'] = profiler.report
+        job.lease_owner = None
+        job.lease_expires_at = None
+        await db.commit()
+        metrics.JOBS.labels("completed").inc()
+        metrics.JOB_SECONDS.observe(wall_seconds)
+        emit(JOB_COMPLETED, status="completed")
+        if job.parent_id is not None:
+            await finish_parent(db, job.parent_id, runtime)
+
+    except Exception as e:
+        await db.rollback()
+        metrics.JOBS.labels("failed").inc()
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+            job.lease_owner = None
+            job.lease_expires_at = None
+            await db.commit()
+            emit(JOB_COMPLETED, status="failed", error=str(e))
+            if job.parent_id is not None:
+                await finish_parent(db, job.parent_id, runtime)
+        raise
+    finally:
+        await db.close()
@@ -1,20 +1,52 @@
-from typing import List
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from typing import List, Literal, Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
-from pydantic import BaseModel, HttpUrl
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from datetime import datetime
+import asyncio
+import json
 import os
 
-from app.core.scraper import AsyncWebScraper
-from app.db.models import ScrapedContent, ScrapingJob, Base
-from app.db.database import get_db, engine
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Web Scraping with LLMs and LangChain")
+from app.core.runtime import ScraperRuntime
+from app.core.events import JOB_COMPLETED, JOB_STATUS, LISTENER_RESUMED, JobEventBroker, format_sse, make_event
+from app.core.urls import canonicalize_url, dedupe_urls
+from app.ingest import BULK_MAX_SHARD_SIZE, BULK_SHARD_SIZE, ShardWriter
+from app.jobs import finish_parent, process_scraping_job, run_shards, shard_progress
+from app.db.models import ScrapedContent, ScrapingJob
+from app.db.database import AsyncSessionLocal, async_engine, engine, get_async_db
+from app.db.migrations import migrate
+from app.db.pagination import CURSOR_FIELDS, decode_cursor, newest_first, next_cursor, parse_fields
+
+# Create database tables and bring existing ones up to date
+migrate(engine)
+
+# "queue" leaves jobs for app.worker processes; "inline" runs them in this
+# process as background tasks, which is handy for local development
+JOB_RUNNER = os.getenv("JOB_RUNNER", "queue")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled session, LLM client, parse pool, cache and fetch scheduler
+    # shared by every job for the lifetime of the process
+    async with ScraperRuntime.from_env() as runtime:
+        app.state.runtime = runtime
+        # Relays job progress published by workers to streaming clients
+        app.state.job_events = JobEventBroker(engine)
+        app.state.job_events.start()
+        try:
+            yield
+        finally:
+            app.state.job_events.close()
+            await async_engine.dispose()
+
+app = FastAPI(title="Web Scraping with LLMs and LangChain", lifespan=lifespan)
 
 # Create static directory if it doesn't exist
 os.makedirs("app/static", exist_ok=True)
@@ -163,6 +195,47 @@ async def root():
                     }
                 }
 
+                async function showContent(url) {
+                    const results = document.getElementById('results');
+                    const content = document.getElementById('content');
+
+                    // Get the scraped content for this specific URL
+                    const contentResponse = await fetch(`/api/content?url=${encodeURIComponent(url)}`);
+                    if (!contentResponse.ok) {
+                        addLogEntry('Failed to fetch content', 'error');
+                        return;
+                    }
+
+                    const contentData = await contentResponse.json();
+                    if (!contentData || contentData.length === 0) {
+                        addLogEntry('No content found in the response', 'warning');
+                        return;
+                    }
+
+                    const data = contentData[0];
+                    addLogEntry('Content retrieved successfully', 'success');
+                    content.innerHTML += `
+                        <div class="endpoint">
+                            <h3>Title</h3>
+                            <p>${data.title || 'N/A'}</p>
+                            
+                            <h3>Content</h3>
+                            <p>${data.text || 'N/A'}</p>
+                            
+                            <h3>Summary</h3>
+                            <p>${data.summary || 'N/A'}</p>
+                            
+                            <h3>URL</h3>
+                            <p><a href="${data.url}" target="_blank">${data.url}</a></p>
+                            
+                            <h3>Timestamp</h3>
+                            <p>${new Date(data.created_at).toLocaleString()}</p>
+                        </div>
+                    `;
+                    results.style.display = 'block';
+                    addLogEntry('Results displayed successfully', 'success');
+                }
+
                 document.getElementById('scrapeForm').addEventListener('submit', async (e) => {
                     e.preventDefault();
                     const urlInput = document.getElementById('urlInput');
@@ -211,80 +284,53 @@ async def root():
                         const { job_id } = await scrapeResponse.json();
                         addLogEntry(`Job created with ID: ${job_id}`, 'success');
                         
-                        // Polling with exponential backoff
-                        let attempts = 0;
-                        const maxAttempts = 40; // 30 seconds maximum
-                        const baseDelay = 1000; // Start with 1 second
-                        
-                        while (attempts < maxAttempts) {
-                            addLogEntry(`Checking job status (Attempt ${attempts + 1}/${maxAttempts})...`, 'info');
-                            const statusResponse = await fetch(`/api/jobs/${job_id}`);
-                            
-                            if (!statusResponse.ok) {
-                                throw new Error('Failed to check job status');
-                            }
-                            
-                            const jobStatus = await statusResponse.json();
-
-                            if (jobStatus.status === 'completed') {
-                                addLogEntry('Job completed successfully!', 'success');
-                                addLogEntry('Fetching scraped content...', 'info');
-                                
-                                // Get the scraped content for this specific URL
-                                const contentResponse = await fetch(`/api/content?url=${encodeURIComponent(url)}`);
-                                if (!contentResponse.ok) {
-                                    throw new Error('Failed to fetch content');
+                        // Follow the job's progress as it is pushed from the server
+                        await new Promise((resolve, reject) => {
+                            const events = new EventSource(`/api/jobs/${job_id}/events`);
+                            const data = (e) => JSON.parse(e.data);
+
+                            events.addEventListener('fetched', (e) => {
+                                const d = data(e);
+                                addLogEntry(d.unchanged ? `Unchanged since last scrape: ${d.url}` : `Fetched ${d.url} (HTTP ${d.status})`, 'info');
+                            });
+                            events.addEventListener('extracted', (e) => {
+                                const d = data(e);
+                                addLogEntry(`Extracted ${d.chars} characters from ${d.url}`, 'info');
+                            });
+                            events.addEventListener('summarised', (e) => {
+                                const d = data(e);
+                                addLogEntry(`Summary ready for ${d.url} (${d.source})`, 'success');
+                            });
+                            events.addEventListener('failed', (e) => {
+                                const d = data(e);
+                                addLogEntry(`Failed to scrape ${d.url}: ${d.error}`, 'error');
+                            });
+                            events.addEventListener('stored', async (e) => {
+                                const d = data(e);
+                                addLogEntry(`Stored ${d.url}, fetching content...`, 'info');
+                                await showContent(d.url);
+                            });
+                            events.addEventListener('completed', async (e) => {
+                                const d = data(e);
+                                events.close();
+                                if (d.status === 'failed') {
+                                    addLogEntry(`Job failed: ${d.error || 'Unknown error'}`, 'error');
+                                    reject(new Error(d.error || 'Scraping failed'));
+                                    return;
                                 }
-                                
-                                const contentData = await contentResponse.json();
-                                
-                                if (contentData && contentData.length > 0) {
-                                    const data = contentData[0];
-                                    addLogEntry('Content retrieved successfully', 'success');
-                                    
-                                    // Display only this result
-                                    content.innerHTML = `
-                                        <div class="endpoint">
-                                            <h3>Title</h3>
-                                            <p>${data.title || 'N/A'}</p>
-                                            
-                                            <h3>Content</h3>
-                                            <p>${data.text || 'N/A'}</p>
-                                            
-                                            <h3>Summary</h3>
-                                            <p>${data.summary || 'N/A'}</p>
-                                            
-                                            <h3>URL</h3>
-                                            <p><a href="${data.url}" target="_blank">${data.url}</a></p>
-                                            
-                                            <h3>Timestamp</h3>
-                                            <p>${new Date(data.created_at).toLocaleString()}</p>
-                                        </div>
-                                    `;
-                                    results.style.display = 'block';
-                                    addLogEntry('Results displayed successfully', 'success');
-                                } else {
-                                    addLogEntry('No content found in the response', 'warning');
+                                addLogEntry('Job completed successfully!', 'success');
+                                // Unchanged pages, or a job that finished before we
+                                // connected, produce no stored events
+                                if (!content.innerHTML) {
+                                    await showContent(url);
                                 }
-                                break;
-                            } else if (jobStatus.status === 'failed') {
-                                addLogEntry(`Job failed: ${jobStatus.error || 'Unknown error'}`, 'error');
-                                throw new Error(jobStatus.error || 'Scraping failed');
-                            } else {
-                                addLogEntry(`Current status: ${jobStatus.status}`, 'info');
-                            }
-
-                            // Calculate delay with exponential backoff
-                            const delay = Math.min(baseDelay * Math.pow(1.5, attempts), 5000); // Max 5 seconds
-                            addLogEntry(`Waiting ${Math.round(delay/1000)} seconds before next check...`, 'info');
-                            await new Promise(resolve => setTimeout(resolve, delay));
-                            attempts++;
-                        }
-
-                        if (attempts >= maxAttempts) {
-                            addLogEntry('Scraping timed out after 30 seconds', 'error');
-                            throw new Error('Scraping timed out after 30 seconds');
-                        }
+                                resolve();
+                            });
+                            events.onerror = () => {
+                                events.close();
+                                reject(new Error('Lost connection to the job event stream'));
+                            };
+                        });
                     } catch (err) {
                         addLogEntry(`Error: ${err.message}`, 'error');
                         error.textContent = err.message;
@@ -303,8 +349,28 @@ async def root():
 async def favicon():
     return FileResponse("app/static/favicon.png")
 
+class CrawlOptions(BaseModel):
+    # Links followed away from the submitted URLs; 0 scrapes only them
+    max_depth: int = Field(2, ge=0)
+    max_pages: int = Field(100, ge=1)
+    max_pages_per_domain: Optional[int] = Field(None, ge=1)
+    # Hosts the crawl may visit, subdomains included; defaults to the submitted URLs' hosts
+    domains: Optional[List[str]] = None
+
 class ScrapeRequest(BaseModel):
     urls: List[HttpUrl]
+    # "llm", "extractive" or "hybrid"; defaults to the SUMMARY_STRATEGY setting
+    summary_strategy: Optional[Literal["llm", "extractive", "hybrid"]] = None
+    # Record a cProfile of the job in its stats
+    profile: bool = False
+    # Follow links from urls, within these limits, instead of scraping only urls
+    crawl: Optional[CrawlOptions] = None
+
+    @field_validator('urls')
+    @classmethod
+    def canonical_urls(cls, urls: List[HttpUrl]) -> List[str]:
+        # Trivially different spellings of one page become a single URL
+        return dedupe_urls(str(url) for url in urls)
 
 class ScrapeResponse(BaseModel):
     job_id: int
@@ -315,21 +381,24 @@ class ScrapeResponse(BaseModel):
 async def create_scraping_job(
     request: ScrapeRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Create new job
         job = ScrapingJob(
             status="pending",
-            urls=[str(url) for url in request.urls],
-            results=[]
+            urls=request.urls,
+            results=[],
+            options=request.model_dump(exclude={'urls'}, exclude_defaults=True)
         )
         db.add(job)
-        db.commit()
-        db.refresh(job)
+        await db.commit()
 
-        # Start scraping in background
-        background_tasks.add_task(process_scraping_job, job.id, [str(url) for url in request.urls])
+        # Workers pick pending jobs up from the queue; inline mode runs them here
+        if JOB_RUNNER == "inline":
+            background_tasks.add_task(
+                process_scraping_job, job.id, request.urls, app.state.runtime, job.options
+            )
         
         return ScrapeResponse(
             job_id=job.id,
@@ -337,63 +406,241 @@ async def create_scraping_job(
             message="Scraping job created successfully"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+class BulkScrapeResponse(BaseModel):
+    job_id: int
+    status: str
+    lines: int
+    urls: int
+    duplicates: int
+    invalid: int
+    shards: int
+    errors: List[dict]
+
+@app.post("/api/scrape/bulk", response_model=BulkScrapeResponse)
+async def create_bulk_scraping_job(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    summary_strategy: Optional[Literal["llm", "extractive", "hybrid"]] = None,
+    shard_size: int = Query(BULK_SHARD_SIZE, ge=1, le=BULK_MAX_SHARD_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Start a job from a streamed list of URLs, one per line (NDJSON or plain text).
+
+    Each line is a JSON string, an object with a "url" key, or a bare
+    URL. Lines are validated as they arrive; invalid ones are counted and
+    the first few reported. Every shard_size distinct URLs become a child
+    job that workers can start on while the upload continues.
+    """
+    options = {'summary_strategy': summary_strategy} if summary_strategy else {}
+    parent = ScrapingJob(status="ingesting", urls=[], results=[], options=options)
+    db.add(parent)
+    await db.commit()
+    parent_id = parent.id
+
+    writer = ShardWriter(db, parent, shard_size)
+    try:
+        await writer.consume(request.stream())
+    except Exception as e:
+        # Shards already committed keep running; the parent records where the upload stopped
+        await db.rollback()
+        parent.status = "running" if writer.shard_ids else "failed"
+        parent.error = f"Upload interrupted after {writer.stats['lines']} lines: {e}"
+        parent.stats = {'ingest': writer.stats}
+        await db.commit()
+        if writer.shard_ids:
+            await finish_parent(db, parent_id, app.state.runtime)
+        raise HTTPException(status_code=400, detail=parent.error)
+
+    parent.status = "running"
+    parent.stats = {'ingest': writer.stats}
+    await db.commit()
+    # Shards may all have finished during the upload, or there may be none
+    status = await finish_parent(db, parent_id, app.state.runtime) or parent.status
+
+    if JOB_RUNNER == "inline" and writer.shard_ids:
+        background_tasks.add_task(run_shards, parent_id, app.state.runtime)
+
+    return BulkScrapeResponse(job_id=parent_id, status=status, **writer.stats)
+
 @app.get("/api/jobs/{job_id}")
-async def get_job_status(job_id: int, db: Session = Depends(get_db)):
-    job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+async def get_job_status(job_id: int, include_content: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Job status with one compact record per URL.
+
+    With include_content=true each record also carries the stored title,
+    text and summary, read from scraped_content.
+    """
+    job = await db.get(ScrapingJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    data = {column.name: getattr(job, column.name) for column in ScrapingJob.__table__.columns}
+    if job.status == "ingesting" or (job.stats or {}).get('ingest') is not None:
+        # A bulk upload: its pages are in its shards
+        data['progress'] = await shard_progress(db, job_id)
+    if include_content and job.results:
+        ids = [record['content_id'] for record in job.results if record.get('content_id')]
+        rows = await db.execute(
+            select(ScrapedContent.id, ScrapedContent.title, ScrapedContent.text, ScrapedContent.summary)
+            .where(ScrapedContent.id.in_(ids))
+        )
+        content = {row.id: row for row in rows}
+        results = []
+        for record in job.results:
+            row = content.get(record.get('content_id'))
+            if row is not None:
+                record = {**record, 'title': row.title, 'text': row.text, 'summary': row.summary}
+            results.append(record)
+        data['results'] = results
+    return data
+
+async def read_job_status(job_id: int):
+    """The job's status and error from a short-lived session, or None if the job is gone."""
+    async with AsyncSessionLocal() as db:
+        job = await db.get(ScrapingJob, job_id)
+        return (job.status, job.error) if job else None
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stream per-URL progress and a final completion event as Server-Sent Events."""
+    broker = app.state.job_events
+    # Subscribe before reading the status so no completion event can slip by
+    queue = broker.subscribe(job_id)
+    job = await db.get(ScrapingJob, job_id)
     if not job:
+        broker.unsubscribe(job_id, queue)
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    status, error = job.status, job.error
+    # Hand the connection back to the pool rather than holding it for the whole stream
+    await db.close()
+
+    async def event_stream():
+        try:
+            if status in ("completed", "failed"):
+                yield format_sse(make_event(job_id, JOB_COMPLETED, status=status, error=error))
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    event = None
+                if event is None or event['event'] == LISTENER_RESUMED:
+                    # Events are best effort, so a lost completion must not
+                    # leave the stream open: read the job again instead
+                    try:
+                        state = await read_job_status(job_id)
+                    except SQLAlchemyError:
+                        # Read again on the next keep-alive
+                        state = (None, None)
+                    if state is None:
+                        return
+                    current, current_error = state
+                    if current in ("completed", "failed"):
+                        yield format_sse(make_event(job_id, JOB_COMPLETED, status=current, error=current_error))
+                        return
+                    if event is None:
+                        # Keep proxies from closing an idle stream
+                        yield ": keep-alive\n\n"
+                    elif current is not None:
+                        yield format_sse(make_event(job_id, JOB_STATUS, status=current))
+                    continue
+                yield format_sse(event)
+                if event['event'] == JOB_COMPLETED:
+                    return
+        finally:
+            broker.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.get("/api/runtime/stats")
+async def get_runtime_stats():
+    return app.state.runtime.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics for this process; workers serve theirs on WORKER_METRICS_PORT."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+def url_filter(url: str):
+    """Match url as stored: canonicalized, or as given for rows stored before canonicalization."""
+    return ScrapedContent.url.in_(dict.fromkeys([canonicalize_url(url), url]))
 
 @app.get("/api/content")
 async def get_scraped_content(
+    response: Response,
     skip: int = 0,
     limit: int = 1,
     url: str = None,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    fields: str = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(ScrapedContent)
-    if url:
-        query = query.filter(ScrapedContent.url == url)
-    content = query.order_by(ScrapedContent.created_at.desc()).offset(skip).limit(limit).all()
-    return content
+    """List content newest first.
 
-async def process_scraping_job(job_id: int, urls: List[str]):
-    db = next(get_db())
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next;
+    `fields` picks the columns to return, e.g. `fields=url,title`.
+    """
     try:
-        # Update job status
-        job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
-        job.status = "running"
-        db.commit()
-
-        # Initialize scraper
-        async with AsyncWebScraper() as scraper:
-            results = await scraper.scrape_urls(urls)
-
-            # Process results
-            for result in results:
-                if isinstance(result, Exception):
-                    continue
-
-                # Save to database
-                content = ScrapedContent(
-                    url=result['url'],
-                    title=result['title'],
-                    text=result['text'],
-                    summary=result['summary'],
-                    extra_metadata={'timestamp': result['timestamp']}
-                )
-                db.add(content)
-
-            # Update job status
-            job.status = "completed"
-            job.results = results
-            db.commit()
-
-    except Exception as e:
-        job.status = "failed"
-        job.error = str(e)
-        db.commit()
-        raise 
\ No newline at end of file
+        columns = parse_fields(fields)
+        query = newest_first(select(ScrapedContent), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    loaded = dict.fromkeys([*CURSOR_FIELDS, *columns])
+    query = query.options(load_only(*[getattr(ScrapedContent, column) for column in loaded]))
+    if url:
+        query = query.where(url_filter(url))
+    if skip and not cursor:
+        query = query.offset(skip)
+    content = (await db.scalars(query.limit(limit))).all()
+
+    cursor = next_cursor(content, limit)
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    return [{column: getattr(row, column) for column in columns} for row in content]
+
+@app.get("/api/content/export")
+async def export_scraped_content(
+    url: str = None,
+    cursor: str = None,
+    fields: str = None,
+    batch_size: int = 1000
+):
+    """Stream every matching row as newline-delimited JSON."""
+    try:
+        columns = parse_fields(fields)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    selected = dict.fromkeys([*columns, *CURSOR_FIELDS])
+
+    async def rows():
+        position = cursor
+        async with AsyncSessionLocal() as db:
+            while True:
+                query = newest_first(select(*[getattr(ScrapedContent, column) for column in selected]), position)
+                if url:
+                    query = query.where(url_filter(url))
+                batch = (await db.execute(query.limit(batch_size))).all()
+                # Release the connection between batches rather than holding one transaction open
+                await db.commit()
+                if batch:
+                    yield ''.join(
+                        json.dumps({column: getattr(row, column) for column in columns}, default=json_default) + '\n'
+                        for row in batch
+                    )
+                position = next_cursor(batch, batch_size)
+                if position is None:
+                    return
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
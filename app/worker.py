@@ -0,0 +1,219 @@
+"""Standalone job worker.
+
+Claims pending jobs from the scraping_jobs table and runs them outside the
+API process. Start as many copies as needed, on one host or many:
+
+    python -m app.worker --processes 4 --concurrency 2
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from prometheus_client import start_http_server
+from sqlalchemy import and_, or_, select, update
+
+from app.core.runtime import ScraperRuntime
+from app.db.database import AsyncSessionLocal, async_engine, engine
+from app.db.migrations import migrate
+from app.db.models import ScrapingJob
+from app.jobs import finish_parent, process_scraping_job
+
+logger = logging.getLogger("app.worker")
+
+
+async def claim_job(
+    worker_id: str,
+    lease_seconds: int,
+    max_attempts: int
+) -> Optional[Tuple[int, List[str], Dict[str, Any]]]:
+    """Lease the oldest runnable job, skipping rows other workers have locked.
+
+    A job is runnable when it is pending, or running under a lease that has
+    expired because its worker stopped heartbeating.
+    """
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        job = await db.scalar(
+            select(ScrapingJob)
+            .where(or_(
+                ScrapingJob.status == "pending",
+                and_(ScrapingJob.status == "running", ScrapingJob.lease_expires_at < now)
+            ))
+            .order_by(ScrapingJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job is None:
+            return None
+
+        job.attempts = (job.attempts or 0) + 1
+        if job.attempts > max_attempts:
+            job.status = "failed"
+            job.error = f"Gave up after {max_attempts} attempts"
+            job.lease_owner = None
+            job.lease_expires_at = None
+            await db.commit()
+            if job.parent_id is not None:
+                await finish_parent(db, job.parent_id)
+            return None
+
+        job.status = "running"
+        job.lease_owner = worker_id
+        job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        await db.commit()
+        return job.id, list(job.urls or []), dict(job.options or {})
+
+
+async def renew_lease(job_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """Extend the lease; False means another worker has taken the job over."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ScrapingJob)
+            .where(ScrapingJob.id == job_id, ScrapingJob.lease_owner == worker_id)
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+class JobWorker:
+    """Runs up to `concurrency` jobs at a time from the database queue."""
+
+    def __init__(
+        self,
+        runtime: ScraperRuntime,
+        concurrency: int = 2,
+        lease_seconds: int = 60,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        worker_id: Optional[str] = None
+    ):
+        self.runtime = runtime
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.stopping = asyncio.Event()
+
+    async def _heartbeat(self, job_id: int, task: asyncio.Task):
+        while not task.done():
+            await asyncio.sleep(self.lease_seconds / 3)
+            if task.done():
+                return
+            if not await renew_lease(job_id, self.worker_id, self.lease_seconds):
+                logger.warning("Lost lease on job %s, cancelling it", job_id)
+                task.cancel()
+                return
+
+    async def _run_job(self, job_id: int, urls: List[str], options: Dict[str, Any]):
+        task = asyncio.current_task()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, task))
+        try:
+            await process_scraping_job(job_id, urls, self.runtime, options)
+            logger.info("Job %s completed", job_id)
+        except asyncio.CancelledError:
+            logger.warning("Job %s cancelled", job_id)
+        except Exception:
+            logger.exception("Job %s failed", job_id)
+        finally:
+            heartbeat.cancel()
+            self.tasks.pop(job_id, None)
+
+    async def run(self):
+        """Claim and run jobs until stop() is called."""
+        logger.info("Worker %s started", self.worker_id)
+        while not self.stopping.is_set():
+            claimed = None
+            if len(self.tasks) < self.concurrency:
+                claimed = await claim_job(self.worker_id, self.lease_seconds, self.max_attempts)
+            if claimed is not None:
+                job_id, urls, options = claimed
+                logger.info("Claimed job %s with %d URLs", job_id, len(urls))
+                self.tasks[job_id] = asyncio.create_task(self._run_job(job_id, urls, options))
+                continue
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        # Let running jobs finish; unfinished ones are re-claimed after their lease expires
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        logger.info("Worker %s stopped", self.worker_id)
+
+    def stop(self):
+        self.stopping.set()
+
+
+async def serve(concurrency: int, lease_seconds: int, poll_interval: float):
+    async with ScraperRuntime.from_env() as runtime:
+        worker = JobWorker(runtime, concurrency, lease_seconds, poll_interval)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.stop)
+        try:
+            await worker.run()
+        finally:
+            await async_engine.dispose()
+
+
+def run_process(concurrency: int, lease_seconds: int, poll_interval: float, metrics_port: int = 0):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    if metrics_port:
+        start_http_server(metrics_port)
+        logger.info("Serving metrics on port %s", metrics_port)
+    # Connections inherited from the parent process must not be shared
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    asyncio.run(serve(concurrency, lease_seconds, poll_interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scraping job workers.")
+    parser.add_argument('--processes', type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")))
+    parser.add_argument('--lease-seconds', type=int, default=int(os.getenv("JOB_LEASE_SECONDS", "60")))
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv("JOB_POLL_INTERVAL", "1.0")))
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv("WORKER_METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics from this port; process N uses port + N")
+    args = parser.parse_args()
+
+    migrate(engine)
+    worker_args = (args.concurrency, args.lease_seconds, args.poll_interval)
+    if args.processes <= 1:
+        run_process(*worker_args, args.metrics_port)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_process,
+            args=(*worker_args, args.metrics_port + index if args.metrics_port else 0),
+            daemon=False
+        )
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    # Pass SIGTERM on so every child drains its running jobs before exiting
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    signal.signal(signal.SIGTERM, forward)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""API request latency percentiles while a large scrape job runs.
+
+Serves synthetic pages from a local fixture server, measures read latency
+against a running API with no job in flight, then submits one large job
+pointing at the fixture pages and measures again while it runs. Run the API
+with JOB_RUNNER=inline to see how the job affects the API's own event loop.
+
+Usage:
+    python -m benchmarks.bench_api_load --api-url http://localhost:8000 --job-urls 500
+
+If the API runs in Docker, pass --fixture-url http://host.docker.internal:8765
+so the job can reach the fixture server.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.fixture_site import FixtureSite
+
+
+async def submit_job(session: aiohttp.ClientSession, api_url: str, urls: List[str]) -> int:
+    async with session.post(f"{api_url}/api/scrape", json={'urls': urls}) as response:
+        response.raise_for_status()
+        return (await response.json())['job_id']
+
+
+async def job_status(session: aiohttp.ClientSession, api_url: str, job_id: int) -> str:
+    async with session.get(f"{api_url}/api/jobs/{job_id}") as response:
+        return (await response.json())['status']
+
+
+async def measure(session: aiohttp.ClientSession, paths: List[str], clients: int, seconds: float) -> Dict[str, List[float]]:
+    """Hammer the given paths from `clients` loops and record latencies per path."""
+    latencies: Dict[str, List[float]] = {path: [] for path in paths}
+    deadline = time.perf_counter() + seconds
+
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            async with session.get(path) as response:
+                await response.read()
+            latencies[path].append(time.perf_counter() - start)
+
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    return latencies
+
+
+def percentile(sorted_ms: List[float], q: float) -> float:
+    return round(sorted_ms[min(len(sorted_ms) - 1, int(q / 100 * len(sorted_ms)))], 2)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {'requests': 0}
+    ms = sorted(sample * 1000 for sample in samples)
+    return {
+        'requests': len(ms),
+        'p50_ms': percentile(ms, 50),
+        'p95_ms': percentile(ms, 95),
+        'p99_ms': percentile(ms, 99),
+        'max_ms': round(ms[-1], 2)
+    }
+
+
+async def run(args) -> List[dict]:
+    fixture = await FixtureSite(args.page_kb, latency=args.page_latency).start(args.fixture_host, args.fixture_port)
+    reports = []
+    try:
+        timeout = aiohttp.ClientTimeout(total=60)
+        connector = aiohttp.TCPConnector(limit=args.clients)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            # A one-page job gives the status endpoint something to read in both phases
+            probe_id = await submit_job(session, args.api_url, [f"{args.fixture_url}/page/0"])
+            paths = [
+                f"{args.api_url}/api/content?limit=20",
+                f"{args.api_url}/api/jobs/{probe_id}"
+            ]
+
+            for phase in ('idle', 'during_job'):
+                job_id = None
+                if phase == 'during_job':
+                    urls = [f"{args.fixture_url}/page/{i}?run={time.time_ns()}" for i in range(1, args.job_urls + 1)]
+                    job_id = await submit_job(session, args.api_url, urls)
+                latencies = await measure(session, paths, args.clients, args.seconds)
+                for path, samples in latencies.items():
+                    reports.append({
+                        'phase': phase,
+                        'endpoint': path.replace(args.api_url, '').split('?')[0],
+                        **percentiles(samples)
+                    })
+                if job_id is not None:
+                    # Keep serving pages until the job is done so it measures real work
+                    status = await job_status(session, args.api_url, job_id)
+                    deadline = time.perf_counter() + args.job_timeout
+                    while status in ('pending', 'running') and time.perf_counter() < deadline:
+                        await asyncio.sleep(1)
+                        status = await job_status(session, args.api_url, job_id)
+                    reports.append({'phase': phase, 'job_id': job_id, 'job_status': status})
+    finally:
+        await fixture.close()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--api-url', default="http://localhost:8000")
+    parser.add_argument('--job-urls', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--job-timeout', type=float, default=600)
+    parser.add_argument('--page-kb', type=int, default=200)
+    parser.add_argument('--page-latency', type=float, default=0.05)
+    parser.add_argument('--fixture-host', default="0.0.0.0")
+    parser.add_argument('--fixture-port', type=int, default=8765)
+    parser.add_argument('--fixture-url', default=None)
+    args = parser.parse_args()
+    args.api_url = args.api_url.rstrip('/')
+    args.fixture_url = (args.fixture_url or f"http://127.0.0.1:{args.fixture_port}").rstrip('/')
+
+    for report in asyncio.run(run(args)):
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
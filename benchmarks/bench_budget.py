@@ -0,0 +1,111 @@
+"""Prompt size, summary latency and content kept, with and without token budgeting.
+
+Each fixture page mixes an article with the clutter that survives
+extraction: a cookie banner, share and advertisement lines repeated
+between paragraphs, and a related-links list. Every article paragraph
+names one key fact; "facts kept" counts how many of them reach the
+prompt, as a proxy for summary quality. "before" is the old prompt (all
+extracted text, whitespace collapsed), "after" is fit_to_budget's output.
+Latency comes from the fake LLM, so no API key or network is needed;
+pass --openai to also summarise both prompts with the real model and
+count the facts that reach each summary.
+
+Usage:
+    python -m benchmarks.bench_budget --paragraphs 5 20 80 --budget 3000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+from langchain.chains.summarize import stuff_prompt
+
+from app.core.budget import count_tokens, fit_to_budget
+from app.core.scraper import parse_page
+from benchmarks.fake_llm import FakeChatModel
+
+SUBJECTS = ["The council", "Researchers", "The company", "Local residents", "The ministry", "Analysts"]
+VERBS = ["approved", "reported", "rejected", "announced", "measured", "questioned"]
+OBJECTS = ["a new budget", "higher costs", "the expansion plan", "record demand", "the delayed project"]
+
+CLUTTER = [
+    "<div class='cookie'><p>We use cookies to improve your experience. Accept all cookies or manage your "
+    "cookie settings.</p></div>",
+    "<p>Share this article</p>",
+    "<p>Advertisement</p>",
+]
+RELATED = "<ul>" + ''.join(f"<li><a href='/r{i}'>Related story {i}</a></li>" for i in range(8)) + "</ul>"
+
+
+def fact(index: int) -> str:
+    return f"fact{index:03d}"
+
+
+def make_fixture(paragraphs: int, rng: random.Random) -> str:
+    body: List[str] = [CLUTTER[0]]
+    for i in range(paragraphs):
+        sentences = [
+            f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} on day {rng.randint(1, 28)}."
+            for _ in range(rng.randint(3, 6))
+        ]
+        sentences.insert(1, f"The key detail is {fact(i)}.")
+        body.append(f"<p>{' '.join(sentences)}</p>")
+        body.append(CLUTTER[1 + i % 2])
+    body.append(RELATED)
+    return (
+        "<html><head><title>Fixture</title></head><body>"
+        f"<main><h1>Fixture article</h1>{''.join(body)}</main></body></html>"
+    )
+
+
+def facts_in(text: str, paragraphs: int) -> int:
+    return sum(fact(i) in text for i in range(paragraphs))
+
+
+async def summarise(llm, text: str) -> dict:
+    start = time.perf_counter()
+    message = await llm.ainvoke(stuff_prompt.PROMPT.format(text=text))
+    return {'seconds': round(time.perf_counter() - start, 3), 'summary': message.content}
+
+
+async def run(paragraphs: int, args) -> dict:
+    text = parse_page(make_fixture(paragraphs, random.Random(paragraphs)), "stream")['text']
+    before = ' '.join(text.split())
+    after = fit_to_budget(text, args.model, args.budget)['text']
+
+    report = {'paragraphs': paragraphs}
+    for name, prompt in (('before', before), ('after', after)):
+        llm = FakeChatModel(base_latency=args.base_latency, per_1k_chars=args.per_1k_chars)
+        result = await summarise(llm, prompt)
+        report[name] = {
+            'prompt_tokens': count_tokens(prompt, args.model),
+            'summary_seconds': result['seconds'],
+            'facts_kept': facts_in(prompt, paragraphs),
+            'clutter_lines': sum(prompt.count(marker) for marker in ('cookies', 'Share this', 'Advertisement'))
+        }
+        if args.openai:
+            from langchain_openai import ChatOpenAI
+            result = await summarise(ChatOpenAI(temperature=0, model_name=args.model), prompt)
+            report[name]['openai_seconds'] = result['seconds']
+            report[name]['facts_in_summary'] = facts_in(result['summary'], paragraphs)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[5, 20, 80, 320])
+    parser.add_argument('--budget', type=int, default=3000)
+    parser.add_argument('--model', default="gpt-3.5-turbo")
+    parser.add_argument('--base-latency', type=float, default=0.2)
+    parser.add_argument('--per-1k-chars', type=float, default=0.05)
+    parser.add_argument('--openai', action='store_true', help="Also summarise with the real model")
+    args = parser.parse_args()
+
+    for paragraphs in args.paragraphs:
+        print(json.dumps(asyncio.run(run(paragraphs, args))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""End-to-end throughput, per-stage latency percentiles and peak memory.
+
+Starts a local fixture site (pages with configurable size, latency and
+error rate, plus a fake OpenAI chat endpoint) and scrapes it either in
+process through AsyncWebScraper.iter_scrape, or through a running API
+with --api-url. The report is one JSON document with sorted keys, so
+runs from two versions can be diffed directly.
+
+Usage:
+    python -m benchmarks.bench_e2e --pages 500 --page-kb 100 --latency 0.05 --error-rate 0.02
+    python -m benchmarks.bench_e2e --pages 500 --hosts 8 --unhealthy-hosts 2
+    python -m benchmarks.bench_e2e --pages 500 --api-url http://localhost:8000 --output after.json
+
+For --api-url, start the API and worker with
+OPENAI_BASE_URL=http://127.0.0.1:8765/v1 so summaries go to the fake LLM.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from langchain_openai import ChatOpenAI
+
+from app.core.runtime import ScraperRuntime
+from app.core.scheduler import HostScheduler
+from app.core.scraper import AsyncWebScraper, create_parse_executor
+from benchmarks.bench_api_load import percentile
+from benchmarks.fixture_site import FixtureSite
+
+STAGES = ('fetch_ms', 'extract_ms', 'budget_ms', 'summarise_ms', 'total_ms')
+
+
+def stage_percentiles(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for record in records:
+        timings = record.get('timings') or {}
+        for stage, value in timings.items():
+            samples.setdefault(stage, []).append(value)
+        if timings:
+            samples['total_ms'].append(sum(timings.values()))
+    report = {}
+    for stage, values in samples.items():
+        if not values:
+            continue
+        ms = sorted(values)
+        report[stage] = {
+            'count': len(ms),
+            'p50': percentile(ms, 50),
+            'p95': percentile(ms, 95),
+            'p99': percentile(ms, 99),
+            'max': round(ms[-1], 2)
+        }
+    return report
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident memory of this process and of its finished children (e.g. parse workers)."""
+    # ru_maxrss is in kilobytes on Linux
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def page_urls(args) -> List[str]:
+    # Loopback addresses 127.0.0.1..N act as separate hosts for the scheduler
+    return [
+        f"http://127.0.0.{index % args.hosts + 1}:{args.fixture_port}/page/{index}?run={args.run_id}"
+        for index in range(args.pages)
+    ]
+
+
+async def run_scraper(args, fixture: FixtureSite) -> Dict[str, Any]:
+    executor = create_parse_executor(args.parse_workers, args.parse_executor)
+    llm = ChatOpenAI(
+        temperature=0,
+        model_name="gpt-3.5-turbo",
+        base_url=f"http://127.0.0.1:{args.fixture_port}/v1",
+        api_key="fixture",
+        max_retries=0
+    )
+    runtime = ScraperRuntime(
+        parse_executor=executor,
+        extraction_engine=args.extraction_engine,
+        scheduler=HostScheduler(
+            global_limit=args.fetch_concurrency,
+            per_host_limit=args.host_concurrency,
+            per_host_rate=args.host_rate
+        ),
+        llm=llm,
+        summary_strategy=args.summary_strategy,
+        llm_concurrency=args.llm_concurrency,
+        llm_requests_per_minute=1000000,
+        llm_tokens_per_minute=1000000000
+    )
+    async with runtime:
+        async with AsyncWebScraper(runtime=runtime) as scraper:
+            start = time.perf_counter()
+            # Keep only a compact record per page, as a job does, so peak
+            # memory shows what the pipeline holds rather than the results
+            records = [
+                {'status': 'failed' if result.get('error') else 'stored', 'error_type': result.get('error_type'),
+                 'timings': result.get('timings', {})}
+                async for result in scraper.iter_scrape(page_urls(args))
+            ]
+            seconds = time.perf_counter() - start
+        report = {
+            'llm': dict(runtime.llm_dispatcher.stats),
+            'connections': dict(runtime.connection_stats),
+            'circuit_breakers': runtime.breakers.stats()
+        }
+    # Wait for parse worker processes to exit so their peak memory is counted
+    executor.shutdown(wait=True)
+    return {'seconds': seconds, 'records': records, 'peak_rss_mb': peak_rss_mb(), **report}
+
+
+async def run_api(args, fixture: FixtureSite) -> Dict[str, Any]:
+    api_url = args.api_url.rstrip('/')
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        start = time.perf_counter()
+        async with session.post(f"{api_url}/api/scrape", json={'urls': page_urls(args)}) as response:
+            response.raise_for_status()
+            job_id = (await response.json())['job_id']
+        deadline = start + args.job_timeout
+        while True:
+            async with session.get(f"{api_url}/api/jobs/{job_id}") as response:
+                job = await response.json()
+            if job['status'] not in ('pending', 'running') or time.perf_counter() > deadline:
+                break
+            await asyncio.sleep(args.poll_interval)
+        seconds = time.perf_counter() - start
+    # The API and worker run elsewhere, so their memory cannot be measured from here
+    return {
+        'seconds': seconds,
+        'records': job.get('results') or [],
+        'job_id': job_id,
+        'job_status': job['status'],
+        'job_stats': job.get('stats'),
+        'peak_rss_mb': None
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    fixture = FixtureSite(
+        page_kb=args.page_kb,
+        page_kb_max=args.page_kb_max,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        unhealthy_hosts=[f"127.0.0.{args.hosts - index}" for index in range(args.unhealthy_hosts)],
+        unhealthy_latency=args.unhealthy_latency,
+        retry_after=args.retry_after,
+        llm_latency=args.llm_latency,
+        llm_per_1k_chars=args.llm_per_1k_chars,
+        seed=args.seed
+    )
+    await fixture.start(args.fixture_host, args.fixture_port)
+    try:
+        if args.api_url:
+            outcome = await run_api(args, fixture)
+        else:
+            outcome = await run_scraper(args, fixture)
+    finally:
+        await fixture.close()
+
+    records = outcome.pop('records')
+    seconds = outcome.pop('seconds')
+    completed = [record for record in records if record.get('status') != 'failed']
+    return {
+        'commit': git_commit(),
+        'mode': 'api' if args.api_url else 'scraper',
+        'config': {
+            key: value for key, value in vars(args).items()
+            if key not in ('output', 'api_url', 'run_id')
+        },
+        'pages': len(records),
+        'completed': len(completed),
+        'failed': len(records) - len(completed),
+        'error_types': dict(Counter(record.get('error_type') for record in records if record.get('status') == 'failed')),
+        'seconds': round(seconds, 3),
+        'pages_per_sec': round(len(completed) / seconds, 2) if seconds else 0.0,
+        'stages_ms': stage_percentiles(completed),
+        'fixture': dict(fixture.stats),
+        **outcome
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--page-kb', type=int, default=100)
+    parser.add_argument('--page-kb-max', type=int, default=None, help="Vary page sizes up to this size")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds before each page is served")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of pages answering 503")
+    parser.add_argument('--unhealthy-hosts', type=int, default=0, help="Loopback hosts whose pages all answer 503")
+    parser.add_argument('--unhealthy-latency', type=float, default=1.0)
+    parser.add_argument('--retry-after', type=int, default=None, help="Retry-After sent by unhealthy hosts")
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-per-1k-chars', type=float, default=0.01)
+    parser.add_argument('--hosts', type=int, default=4, help="Spread pages over this many loopback hosts")
+    parser.add_argument('--fetch-concurrency', type=int, default=20)
+    parser.add_argument('--host-concurrency', type=int, default=10)
+    parser.add_argument('--host-rate', type=float, default=1000.0)
+    parser.add_argument('--llm-concurrency', type=int, default=8)
+    parser.add_argument('--parse-workers', type=int, default=None)
+    parser.add_argument('--parse-executor', default="process")
+    parser.add_argument('--extraction-engine', default="soup")
+    parser.add_argument('--summary-strategy', default="llm")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fixture-host', default="0.0.0.0")
+    parser.add_argument('--fixture-port', type=int, default=8765)
+    parser.add_argument('--api-url', default=None, help="Drive /api/scrape on a running API instead")
+    parser.add_argument('--job-timeout', type=float, default=900)
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    parser.add_argument('--output', default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+    # Unique URLs per run, so an API's stored validators never turn pages into 304s
+    args.run_id = time.time_ns()
+
+    report = json.dumps(asyncio.run(run(args)), indent=2, sort_keys=True)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare the soup and stream extraction engines for output, CPU and memory.
+
+Usage:
+    python -m benchmarks.bench_extract --pages 50 --page-kb 300
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.core.scraper import parse_page
+from benchmarks.bench_parse import make_page
+
+
+def check_agreement(pages: List[str]) -> int:
+    """Return the number of pages where the engines disagree."""
+    mismatches = 0
+    for index, html in enumerate(pages):
+        # Passing a URL also compares the links each engine finds for crawling
+        soup = parse_page(html, "soup", "https://example.com/page")
+        stream = parse_page(html, "stream", "https://example.com/page")
+        if soup['text'] != stream['text'] or soup['title'] != stream['title'] or soup['links'] != stream['links']:
+            mismatches += 1
+            print(json.dumps({'page': index, 'soup': soup, 'stream': stream}))
+    return mismatches
+
+
+def profile(pages: List[str], engine: str) -> Dict[str, float]:
+    start = time.process_time()
+    for html in pages:
+        parse_page(html, engine)
+    cpu = time.process_time() - start
+
+    # Peak allocation for a single page, measured separately from timing
+    tracemalloc.start()
+    parse_page(pages[0], engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'engine': engine,
+        'cpu_ms_per_page': round(cpu * 1000 / len(pages), 2),
+        'peak_kb_per_page': round(peak / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=30)
+    parser.add_argument('--page-kb', type=int, default=300)
+    args = parser.parse_args()
+
+    pages = [make_page(i, args.page_kb) for i in range(args.pages)]
+    # The edge-case corpus is in tests/test_extract.py; this checks the benchmark pages
+    mismatches = check_agreement(pages[:3])
+    print(json.dumps({'checked_pages': 3, 'mismatches': mismatches}))
+
+    results = [profile(pages, engine) for engine in ("soup", "stream")]
+    for result in results:
+        print(json.dumps(result))
+    print(json.dumps({
+        'cpu_speedup': round(results[0]['cpu_ms_per_page'] / results[1]['cpu_ms_per_page'], 2),
+        'memory_reduction': round(results[0]['peak_kb_per_page'] / results[1]['peak_kb_per_page'], 2)
+    }))
+
+
+if __name__ == "__main__":
+    main()
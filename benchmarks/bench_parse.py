@@ -0,0 +1,91 @@
+"""Benchmark the parse/extract stage across parse executor sizes.
+
+Usage:
+    python -m benchmarks.bench_parse --pages 200 --page-kb 500
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from app.core.scraper import create_parse_executor, parse_page
+
+
+def make_page(index: int, size_kb: int) -> str:
+    """Build a synthetic article page of roughly size_kb kilobytes."""
+    paragraph = (
+        "<p>Paragraph {i} of a long synthetic article with <a href='/x'>a link</a> "
+        "and <b>some bold text</b> to give the parser real work to do.</p>\n"
+    )
+    chrome = (
+        "<header><h1>Site header</h1></header>"
+        "<nav><ul><li><a href='/'>Home</a></li><li><a href='/about'>About</a></li></ul></nav>"
+        "<script>var x = 1;</script><style>p { color: red; }</style>"
+    )
+    body = []
+    size = 0
+    i = 0
+    while size < size_kb * 1024:
+        chunk = paragraph.format(i=i)
+        body.append(chunk)
+        size += len(chunk)
+        i += 1
+    return (
+        f"<html><head><title>Page {index}</title></head><body>{chrome}"
+        f"<main><article><h2>Article {index}</h2>{''.join(body)}</article></main>"
+        "<footer><p>Footer</p></footer></body></html>"
+    )
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: List[float]):
+    """Record how late a 10ms timer fires while parsing is under way."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append(time.perf_counter() - start - 0.01)
+
+
+async def run(pages: List[str], workers: int, kind: str) -> dict:
+    executor = create_parse_executor(workers, kind)
+    loop = asyncio.get_running_loop()
+    try:
+        # Warm up the pool so process start-up is not measured
+        await asyncio.gather(*[loop.run_in_executor(executor, parse_page, pages[0]) for _ in range(workers)])
+
+        stop = asyncio.Event()
+        lag: List[float] = []
+        lag_task = asyncio.create_task(measure_loop_lag(stop, lag))
+        start = time.perf_counter()
+        await asyncio.gather(*[loop.run_in_executor(executor, parse_page, page) for page in pages])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await lag_task
+    finally:
+        executor.shutdown()
+
+    return {
+        'executor': kind,
+        'workers': workers,
+        'pages': len(pages),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(len(pages) / elapsed, 2),
+        'max_loop_lag_ms': round(max(lag, default=0.0) * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--page-kb', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process')
+    args = parser.parse_args()
+
+    pages = [make_page(i, args.page_kb) for i in range(args.pages)]
+    for workers in args.workers:
+        print(json.dumps(asyncio.run(run(pages, workers, args.executor))))
+
+
+if __name__ == "__main__":
+    main()
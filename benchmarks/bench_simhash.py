@@ -0,0 +1,78 @@
+"""SimHash fingerprinting speed, lookup speed and near-duplicate accuracy.
+
+Usage:
+    python -m benchmarks.bench_simhash --index-sizes 100000 1000000 5000000
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from app.core.simhash import SimHashIndex, hamming_distance, simhash
+
+
+def article(rng: random.Random, vocabulary, words: int) -> str:
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+def accuracy(args) -> dict:
+    """Distances for templated copies (new byline and date) versus unrelated pages."""
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    copies, unrelated = [], []
+    for i in range(args.pairs):
+        body = article(rng, vocabulary, args.words)
+        copy = f"By Reporter {i}, updated {i % 28 + 1} March. {body} Share this story."
+        copies.append(hamming_distance(simhash(body), simhash(copy)))
+        unrelated.append(hamming_distance(simhash(body), simhash(article(rng, vocabulary, args.words))))
+    return {
+        'copies_max_distance': max(copies),
+        'copies_mean_distance': round(sum(copies) / len(copies), 2),
+        'unrelated_min_distance': min(unrelated),
+        'unrelated_mean_distance': round(sum(unrelated) / len(unrelated), 2)
+    }
+
+
+def fingerprint_speed(args) -> dict:
+    rng = random.Random(1)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    text = article(rng, vocabulary, args.words * 10)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        simhash(text)
+    seconds = (time.perf_counter() - start) / args.repeat
+    return {'words': args.words * 10, 'fingerprint_ms': round(seconds * 1000, 3)}
+
+
+def lookup_speed(size: int, args) -> dict:
+    index = SimHashIndex(max_distance=3)
+    fingerprints = np.random.default_rng(size).integers(-2 ** 63, 2 ** 63 - 1, size=size, dtype=np.int64)
+    index.fingerprints = fingerprints
+    index.ids = np.arange(size, dtype=np.int64)
+    index.size = size
+    query = int(fingerprints[size // 2]) ^ 0b101
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        match = index.candidates(query)
+    seconds = (time.perf_counter() - start) / args.repeat
+    return {'indexed': size, 'lookup_ms': round(seconds * 1000, 3), 'found': match[:1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--index-sizes', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--words', type=int, default=800)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(accuracy(args)))
+    print(json.dumps(fingerprint_speed(args)))
+    for size in args.index_sizes:
+        print(json.dumps(lookup_speed(size, args)))
+
+
+if __name__ == "__main__":
+    main()
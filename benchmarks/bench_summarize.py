@@ -0,0 +1,68 @@
+"""Wall-clock summary latency versus page length for stuff, map_reduce and extractive.
+
+Uses a fake local LLM, so no API key or network is needed. The extractive
+rows need no LLM at all.
+
+Usage:
+    python -m benchmarks.bench_summarize --lengths 2000 16000 64000 256000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.core.extractive import extractive_summary
+from app.core.summarizer import SUMMARY_MODES, Summarizer
+from benchmarks.fake_llm import FakeChatModel
+
+SENTENCE = "The quick brown fox jumps over the lazy dog while the committee debates the budget. "
+
+
+async def run(length: int, mode: str, args) -> dict:
+    llm = FakeChatModel(base_latency=args.base_latency, per_1k_chars=args.per_1k_chars)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=4000, chunk_overlap=0)
+    summarizer = Summarizer(llm, splitter, mode, args.concurrency)
+    text = (SENTENCE * (length // len(SENTENCE) + 1))[:length]
+
+    start = time.perf_counter()
+    await summarizer.summarize(text)
+    return {
+        'mode': mode,
+        'page_chars': length,
+        'seconds': round(time.perf_counter() - start, 3),
+        'llm_calls': llm.calls,
+        'prompt_chars': llm.prompt_chars
+    }
+
+
+def run_extractive(length: int) -> dict:
+    text = (SENTENCE * (length // len(SENTENCE) + 1))[:length]
+    start = time.perf_counter()
+    result = extractive_summary(text)
+    return {
+        'mode': 'extractive',
+        'page_chars': length,
+        'seconds': round(time.perf_counter() - start, 4),
+        'llm_calls': 0,
+        'confidence': result['confidence']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[2000, 16000, 64000, 256000])
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--base-latency', type=float, default=0.2)
+    parser.add_argument('--per-1k-chars', type=float, default=0.05)
+    args = parser.parse_args()
+
+    for length in args.lengths:
+        for mode in SUMMARY_MODES:
+            print(json.dumps(asyncio.run(run(length, mode, args))))
+        print(json.dumps(run_extractive(length)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Deterministic stand-in for ChatOpenAI with tunable latency."""
+from typing import Any, List, Optional
+import asyncio
+import hashlib
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model whose latency grows with prompt length, like a real one.
+
+    Each call takes base_latency plus per_1k_chars for every 1000 prompt
+    characters, and answers with a short summary derived from a hash of
+    the prompt so repeated runs produce identical output.
+    """
+
+    model_name: str = "fake-llm"
+    base_latency: float = 0.2
+    per_1k_chars: float = 0.05
+    max_prompt_chars: Optional[int] = None
+    calls: int = 0
+    prompt_chars: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = ''.join(str(message.content) for message in messages)
+        if self.max_prompt_chars and len(prompt) > self.max_prompt_chars:
+            raise ValueError(f"Prompt of {len(prompt)} chars exceeds the context limit")
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+        text = f"Summary {digest} of {len(prompt)} characters."
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _latency(self, messages: List[BaseMessage]) -> float:
+        chars = sum(len(str(message.content)) for message in messages)
+        return self.base_latency + self.per_1k_chars * chars / 1000
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._latency(messages))
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._latency(messages))
+        return self._respond(messages)
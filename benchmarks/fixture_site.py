@@ -0,0 +1,116 @@
+"""Local fixture site and fake OpenAI endpoint for end-to-end benchmarks.
+
+Pages are served from /page/{index} and chat completions from
+/v1/chat/completions, so both the in-process scraper and a running API
+(with OPENAI_BASE_URL pointed here) can be benchmarked without network
+access or an API key. Page sizes, latencies and failures are derived
+from a seed and the page index, so repeated runs see the same site.
+Hosts listed as unhealthy answer every page with a slow 503, and with
+site_pages set the pages link to each other for crawl benchmarks.
+"""
+from typing import Iterable, Optional
+import asyncio
+import hashlib
+import random
+import time
+
+from aiohttp import web
+
+from benchmarks.bench_parse import make_page
+
+
+class FixtureSite:
+    def __init__(
+        self,
+        page_kb: int = 100,
+        page_kb_max: Optional[int] = None,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        unhealthy_hosts: Iterable[str] = (),
+        unhealthy_latency: float = 1.0,
+        retry_after: Optional[int] = None,
+        site_pages: int = 0,
+        links_per_page: int = 0,
+        llm_latency: float = 0.2,
+        llm_per_1k_chars: float = 0.0,
+        seed: int = 0
+    ):
+        self.page_kb = page_kb
+        self.page_kb_max = max(page_kb_max or page_kb, page_kb)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Hosts that answer every page with a slow 503, as a host that is down would
+        self.unhealthy_hosts = set(unhealthy_hosts)
+        self.unhealthy_latency = unhealthy_latency
+        self.retry_after = retry_after
+        # With site_pages set, every page links to links_per_page random pages among the first site_pages
+        self.site_pages = site_pages
+        self.links_per_page = links_per_page
+        self.llm_latency = llm_latency
+        self.llm_per_1k_chars = llm_per_1k_chars
+        self.seed = seed
+        self.runner: Optional[web.AppRunner] = None
+        self.stats = {'pages': 0, 'errors': 0, 'unhealthy': 0, 'bytes': 0, 'llm_calls': 0, 'llm_prompt_chars': 0}
+
+    def _rng(self, index: int) -> random.Random:
+        return random.Random(f"{self.seed}:{index}")
+
+    async def page(self, request: web.Request) -> web.Response:
+        index = int(request.match_info['index'])
+        # The loopback address the client connected to names the host
+        if request.transport.get_extra_info('sockname')[0] in self.unhealthy_hosts:
+            self.stats['unhealthy'] += 1
+            await asyncio.sleep(self.unhealthy_latency)
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else None
+            return web.Response(status=503, text="Fixture host down", headers=headers)
+        rng = self._rng(index)
+        await asyncio.sleep(self.latency + rng.uniform(0, self.jitter))
+        if rng.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.Response(status=503, text="Fixture error")
+        body = make_page(index, rng.randint(self.page_kb, self.page_kb_max))
+        if self.site_pages and self.links_per_page:
+            links = ''.join(
+                f"<li><a href='/page/{rng.randrange(self.site_pages)}'>Page</a></li>"
+                for _ in range(self.links_per_page)
+            )
+            body = body.replace('</main>', f"</main><nav><ul>{links}</ul></nav>", 1)
+        self.stats['pages'] += 1
+        self.stats['bytes'] += len(body)
+        return web.Response(text=body, content_type='text/html')
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        prompt = ''.join(str(message.get('content', '')) for message in body.get('messages', []))
+        await asyncio.sleep(self.llm_latency + self.llm_per_1k_chars * len(prompt) / 1000)
+        self.stats['llm_calls'] += 1
+        self.stats['llm_prompt_chars'] += len(prompt)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+        return web.json_response({
+            'id': f"chatcmpl-{digest}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake-llm'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': f"Summary {digest} of {len(prompt)} characters."},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 8, 'total_tokens': len(prompt) // 4 + 8}
+        })
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8765) -> "FixtureSite":
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get('/page/{index}', self.page)
+        app.router.add_post('/v1/chat/completions', self.chat_completions)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        return self
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
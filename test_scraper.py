@@ -1,22 +1,33 @@
 import requests
-import time
 from typing import List
 from urllib.parse import urlparse
 import json
 
+from app.core.urls import canonicalize_url
+
 def validate_urls(urls: List[str]) -> List[str]:
-    """Validate URLs and return only valid ones."""
+    """Validate URLs and return only valid ones, canonicalized and without duplicates."""
     valid_urls = []
     for url in urls:
         try:
             result = urlparse(url)
             if all([result.scheme, result.netloc]):
-                valid_urls.append(url)
+                valid_urls.append(canonicalize_url(url))
             else:
                 print(f"Invalid URL: {url}")
         except Exception as e:
             print(f"Error validating URL {url}: {str(e)}")
-    return valid_urls
+    return list(dict.fromkeys(valid_urls))
+
+def read_events(response: requests.Response):
+    """Yield the JSON payload of each Server-Sent Event in a streaming response."""
+    data = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield json.loads("\n".join(data))
+            data = []
 
 def scrape_urls(urls: List[str]) -> dict:
     """Send URLs to the scraper API and monitor the job."""
@@ -37,18 +48,24 @@ def scrape_urls(urls: List[str]) -> dict:
     job_data = response.json()
     job_id = job_data["job_id"]
     
-    # Monitor job status
-    while True:
-        status_response = requests.get(f"http://localhost:8000/api/jobs/{job_id}")
-        if status_response.status_code != 200:
-            return {"error": f"Failed to get job status: {status_response.text}"}
-        
-        job_status = status_response.json()
-        if job_status["status"] in ["completed", "failed"]:
-            return job_status
-        
-        print(f"Job status: {job_status['status']}")
-        time.sleep(2)  # Wait 2 seconds before checking again
+    # Follow job progress over Server-Sent Events
+    with requests.get(f"http://localhost:8000/api/jobs/{job_id}/events", stream=True) as events:
+        if events.status_code != 200:
+            return {"error": f"Failed to follow job events: {events.text}"}
+
+        for event in read_events(events):
+            if event["event"] == "completed":
+                break
+            print(f"{event['event']}: {event.get('url', '')}")
+
+    # Fetch the final job record once it has finished
+    status_response = requests.get(
+        f"http://localhost:8000/api/jobs/{job_id}",
+        params={"include_content": "true"}
+    )
+    if status_response.status_code != 200:
+        return {"error": f"Failed to get job status: {status_response.text}"}
+    return status_response.json()
 
 def main():
     # Example URLs to scrape
@@ -0,0 +1,39 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from app.core.runtime import ScraperRuntime
+from app.core.scraper import create_parse_executor
+from benchmarks.fake_llm import FakeChatModel
+
+
+@asynccontextmanager
+async def _serve(app: web.Application):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture
+def serve():
+    """serve(app) runs app on a free local port for an async with block and yields its base URL."""
+    return _serve
+
+
+@pytest.fixture
+def make_runtime():
+    """Build a ScraperRuntime with a fake LLM, a thread parse executor and no database."""
+
+    def make(**kwargs) -> ScraperRuntime:
+        kwargs.setdefault('llm', FakeChatModel(base_latency=0, per_1k_chars=0))
+        kwargs.setdefault('parse_executor', create_parse_executor(2, "thread"))
+        return ScraperRuntime(**kwargs)
+
+    return make
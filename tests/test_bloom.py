@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.bloom import BloomFilter, ScalableBloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    items = [f"https://example.com/{index}" for index in range(1000)]
+    assert all(bloom.add(item) for item in items[:10])
+    for item in items[10:]:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert not bloom.add(items[0])
+    assert len(bloom) <= 1000
+    assert bloom.nbytes == (bloom.size + 7) // 8
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(10000, 0.01)
+    for index in range(10000):
+        bloom.add(f"seen-{index}")
+    false_positives = sum(f"new-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(0, 0.01), (10, 0), (10, 1)])
+def test_bloom_filter_rejects_bad_sizes(capacity, error_rate):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity, error_rate)
+
+
+def test_scalable_bloom_filter_grows():
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.001)
+    items = [f"url-{index}" for index in range(1000)]
+    added = sum(bloom.add(item) for item in items)
+    assert len(bloom.filters) > 1
+    assert bloom.filters[1].capacity == 200
+    assert bloom.filters[1].error_rate < bloom.filters[0].error_rate
+    assert all(item in bloom for item in items)
+    assert added == len(bloom) >= 995
+    assert not any(bloom.add(item) for item in items)
+    assert sum(f"other-{index}" in bloom for index in range(10000)) < 30
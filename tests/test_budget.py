@@ -0,0 +1,61 @@
+from app.core.budget import fit_to_budget, informative_blocks, truncate_tokens
+from app.core.llm_dispatch import count_tokens
+
+MODEL = "gpt-3.5-turbo"
+
+ARTICLE = "\n\n".join(
+    f"Paragraph {index} explains the topic in a full sentence with enough words to matter." for index in range(20)
+)
+
+
+def test_truncate_tokens_cuts_at_a_word():
+    text = "alpha beta gamma delta " * 50
+    prefix = truncate_tokens(text, 10, MODEL)
+    assert text.startswith(prefix)
+    assert count_tokens(prefix, MODEL) <= 10
+    assert not prefix.endswith(' ')
+    assert text.startswith(prefix + ' ')
+    assert truncate_tokens("short", 100, MODEL) == "short"
+
+
+def test_informative_blocks_drops_boilerplate():
+    blocks = [
+        "Home", "News", "Sport", "Weather",
+        "A real paragraph of the article.",
+        "Advertisement",
+        "We use cookies to improve your experience.",
+        "A real paragraph of the article.",
+        "Short heading",
+        "Another real paragraph."
+    ]
+    assert informative_blocks(blocks) == [
+        "A real paragraph of the article.",
+        "Short heading",
+        "Another real paragraph."
+    ]
+
+
+def test_fit_to_budget_only_cleans_without_a_limit():
+    result = fit_to_budget("Intro text here.\n\n\n\nRead more\n\nBody text here.", MODEL)
+    assert result['text'] == "Intro text here.\n\nBody text here."
+    assert result['dropped_blocks'] == 1
+    assert not result['truncated']
+
+
+def test_fit_to_budget_keeps_whole_blocks_in_order():
+    result = fit_to_budget(ARTICLE, MODEL, max_tokens=100)
+    assert result['truncated']
+    assert result['tokens'] <= 100
+    assert result['source_tokens'] > result['tokens']
+    blocks = result['text'].split("\n\n")
+    assert blocks[0] == "Paragraph 0 explains the topic in a full sentence with enough words to matter."
+    # The block crossing the limit is cut rather than dropped
+    assert ARTICLE.startswith(result['text'])
+    assert len(blocks[-1]) < len(blocks[0])
+
+
+def test_fit_to_budget_fits_short_text():
+    result = fit_to_budget(ARTICLE, MODEL, max_tokens=100000)
+    assert result['text'] == ARTICLE
+    assert result['tokens'] == result['source_tokens']
+    assert not result['truncated']
@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+from app.core.events import JOB_COMPLETED, LISTENER_RESUMED, JobEventBroker, format_sse, make_event
+
+
+def test_make_event_truncates_long_fields():
+    event = make_event(1, 'failed', "https://example.com/", error="x" * 1000, status=500)
+    assert event == {'job_id': 1, 'event': 'failed', 'url': "https://example.com/", 'error': "x" * 500, 'status': 500}
+    assert format_sse(make_event(2, JOB_COMPLETED)) == f"event: completed\ndata: {json.dumps({'job_id': 2, 'event': 'completed'})}\n\n"
+
+
+def test_broker_dispatches_to_the_job_subscribers():
+    async def run():
+        broker = JobEventBroker(engine=None)
+        first, other = broker.subscribe(1), broker.subscribe(2)
+        broker._dispatch(json.dumps(make_event(1, 'stored', "https://example.com/")))
+        broker._dispatch("not json")
+        assert first.get_nowait()['event'] == 'stored'
+        assert other.empty()
+
+        # After a reconnect every subscriber is told to read its job again
+        broker._resume()
+        assert first.get_nowait() == {'job_id': 1, 'event': LISTENER_RESUMED}
+        assert other.get_nowait() == {'job_id': 2, 'event': LISTENER_RESUMED}
+
+        broker.unsubscribe(1, first)
+        broker.unsubscribe(2, other)
+        assert broker.subscribers == {}
+
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+import pytest
+
+from app.core.fast_extract import stream_extract
+from app.core.scraper import parse_page
+
+# Awkward markup the soup and stream engines must agree on
+GOLDEN_CORPUS = [
+    "<html><head><title>Plain</title></head><body><p>Hello <b>world</b></p><p>  </p></body></html>",
+    "<body><p>Outer <li>nested item</li> tail</p><blockquote>Quote <p>inner</p></blockquote></body>",
+    "<body><nav><main><p>hidden main</p></main></nav><article><h1>Title</h1><p>Body</p></article></body>",
+    "<body><div class='sidebar'><p>side</p></div><div class='post content'><p>Post text</p></div></body>",
+    "<body><p>Unclosed one<p>Unclosed two<div>Block</div></body>",
+    "<body><div><p>Stray</span> close</p></div></p><p>After &amp; &nbsp; entities &#169;</p></body>",
+    "<body><header><h1>Site</h1></header><main><h2>Heading</h2><!-- comment --><p>Text<br>with break</p></main>"
+    "<footer><p>Footer</p></footer></body>",
+    "<p>No body tag</p><ul><li>One</li><li>Two <a href='#'>link</a></li></ul>",
+    "<body><script>var p = '<p>not text</p>';</script><style>p {}</style><p>Visible</p>"
+    "<noscript><p>No script</p></noscript><aside><p>Aside</p></aside></body>",
+    "<body><main><p>First main</p></main><main><p>Second main</p></main><p>Outside</p></body>",
+    "<body><div class='main'><h3>Div main</h3><iframe>frame</iframe><p>Kept</p></div><p>Dropped</p></body>",
+    "<body><nav>Navigation <div>Closes nav</nav><p>After nav</p></div></body>",
+    "<head><base href='/docs/'></head><body><nav><a href='/'>Home</a></nav><p><a href='guide#intro'>Guide</a> "
+    "<a rel='nofollow' href='/login'>Log in</a> <a href='mailto:a@example.com'>Mail</a></p></body>",
+    # Void elements, closed or not, self-closed, stray and inside skipped subtrees
+    "<body><p>Line<br>break<br/>again</br> end</p><p><img src='a.png'>after image<wbr>word</p></body>",
+    "<body><h1>Head<hr>ing</h1><li><input type='text'>field</input> label</li><p>Tail<img/></p></body>",
+    "<body><nav><img><p>in nav</p></nav><p>Kept<meta charset='utf-8'>text<link rel='x'>more</p></body>",
+    "<body><main><source><track><p>Media<embed>text</embed></p></main><p>outside</p></body>",
+    "<body><p>Self <p/> closed <div/> tags</p><blockquote>Quote<br><br>lines</blockquote></body>",
+    "<body><P>Upper<BR>case</P><IMG SRC='x'><LI>Item</LI></body>",
+    # Titles: text, whitespace and markup that splits the title into several nodes
+    "<head><title>  Spaced\n title  </title></head><body><p>x</p></body>",
+    "<head><title>\n Foo \n</title></head><body><p>x</p></body>",
+    "<head><title>x</li>y</title></head><body><p>split by a stray end tag</p></body>",
+    "<head><title></li>Stray first</title></head><body><p>not split</p></body>",
+    "<head><title>Text<br>break</title></head><body><p>void tag in title</p></body>",
+    "<head><title>Text<!-- note --></title></head><body><p>comment in title</p></body>",
+    "<head><title><b>Bold</b></title></head><body><p>single element in title</p></body>",
+    "<head><title>First</title><title>Second</title></head><body><p>two titles</p></body>",
+]
+
+# Where the engines are known to differ: soup's title.string returns the
+# text of a single comment, doctype or element child even when that child
+# holds several nodes. Neither happens in titles real pages use.
+KNOWN_DIFFERENCES = [
+    "<head><title><!-- only a comment --></title></head><body><p>x</p></body>",
+    "<head><title><b>Bold <i>and italic</i></b></title></head><body><p>x</p></body>",
+]
+
+
+def engines_agree(html: str) -> bool:
+    # Passing a URL also compares the links each engine finds for crawling
+    soup = parse_page(html, "soup", "https://example.com/page")
+    stream = parse_page(html, "stream", "https://example.com/page")
+    assert soup['text'] == stream['text']
+    assert soup['links'] == stream['links']
+    assert soup['fingerprint'] == stream['fingerprint']
+    return soup['title'] == stream['title']
+
+
+@pytest.mark.parametrize("html", GOLDEN_CORPUS)
+def test_stream_matches_soup(html):
+    assert engines_agree(html)
+
+
+@pytest.mark.parametrize("html", KNOWN_DIFFERENCES)
+def test_known_title_differences(html):
+    assert not engines_agree(html)
+
+
+def test_titles_are_raw_from_the_engines_and_stripped_by_parse_page():
+    html = "<title>\n Foo \n</title>"
+    assert stream_extract(html)['title'] == "\n Foo \n"
+    for engine in ("soup", "stream"):
+        assert parse_page(html, engine)['title'] == "Foo"
+        assert parse_page("<title>x</li>y</title>", engine)['title'] == ''
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        parse_page("<p>x</p>", "lxml")
+
+
+def test_stream_extract_links():
+    html = (
+        "<head><base href='/docs/'><base href='/ignored/'></head><body><nav><a href='/'>Home</a></nav>"
+        "<p><a href='guide'>Guide</a><a rel='external nofollow' href='/login'>Log in</a><a>No href</a></p></body>"
+    )
+    assert stream_extract(html, links=True) == {
+        'title': '', 'text': 'Guide Log in No href', 'links': ['/', 'guide'], 'base_href': '/docs/'
+    }
+    assert 'links' not in stream_extract(html)
+
+
+def test_stream_extract_prefers_main_content():
+    html = (
+        "<body><p>Body text</p><div class='content'><p>Div text</p></div>"
+        "<article><h2>Article</h2></article><main><li>Main text</li></main></body>"
+    )
+    assert stream_extract(html)['text'] == "Main text"
+    assert stream_extract("<p>One</p>\n<p>  Two\n  lines </p><h1></h1>")['text'] == "One\n\nTwo lines"
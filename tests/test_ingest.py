@@ -0,0 +1,47 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from app.ingest import MAX_LINE_BYTES, ndjson_lines, parse_line
+
+
+def lines_of(chunks: List[bytes]):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in ndjson_lines(stream())]
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_lines_across_chunks():
+    assert lines_of([b'"a"\n"b', b'"\n\n{"url": "c"}', b'\n"d"']) == [
+        (1, '"a"'), (2, '"b"'), (3, ''), (4, '{"url": "c"}'), (5, '"d"')
+    ]
+    assert lines_of([]) == []
+    assert lines_of([b'one\n']) == [(1, 'one')]
+
+
+def test_ndjson_lines_skips_overlong_lines():
+    long_line = b'x' * (MAX_LINE_BYTES + 1)
+    # Split so the overlong line is dropped from the buffer before it ends
+    chunks = [b'first\n' + long_line[:10], long_line[10:], b'tail\nlast']
+    assert lines_of(chunks) == [(1, 'first'), (2, None), (3, 'last')]
+    assert lines_of([b'ok\n' + long_line]) == [(1, 'ok'), (2, None)]
+
+
+def test_ndjson_lines_replaces_invalid_utf8():
+    assert lines_of([b'caf\xe9\n']) == [(1, 'caf�')]
+
+
+def test_parse_line():
+    assert parse_line('  ') is None
+    assert parse_line('"https://Example.com/a/?utm_source=x"') == "https://example.com/a"
+    assert parse_line('{"url": "https://example.com"}') == "https://example.com/"
+    assert parse_line('https://example.com/b') == "https://example.com/b"
+    for line in ('ftp://example.com/', 'not a url', '{"link": "https://example.com"}', '[1]'):
+        with pytest.raises(ValueError):
+            parse_line(line)
@@ -0,0 +1,41 @@
+import asyncio
+
+from aiohttp import web
+
+from app.core.scraper import AsyncWebScraper
+from app.core.urls import canonicalize_url
+
+LINKS = "<html><body><p><a href='guide'>Guide</a> <a href='../about'>About</a> <a href='sub/'>Sub</a></p></body></html>"
+
+
+def redirect(location: str):
+    async def handler(request: web.Request) -> web.Response:
+        raise web.HTTPFound(location)
+    return handler
+
+
+async def links_page(request: web.Request) -> web.Response:
+    return web.Response(text=LINKS, content_type='text/html')
+
+
+def site() -> web.Application:
+    app = web.Application()
+    app.router.add_get('/docs', redirect('/docs/'))
+    app.router.add_get('/docs/', links_page)
+    app.router.add_get('/old', redirect('/new/section/'))
+    app.router.add_get('/new/section/', links_page)
+    return app
+
+
+def test_links_resolve_against_the_final_url(serve, make_runtime):
+    async def run():
+        async with serve(site()) as base, make_runtime() as runtime:
+            async with AsyncWebScraper(runtime=runtime) as scraper:
+                # The canonical URL drops the trailing slash; the site redirects back to it
+                docs = await scraper.scrape_url(canonicalize_url(f"{base}/docs/"), follow_links=True)
+                moved = await scraper.scrape_url(f"{base}/old", follow_links=True)
+        assert docs['url'] == f"{base}/docs"
+        assert docs['links'] == [f"{base}/docs/guide", f"{base}/about", f"{base}/docs/sub"]
+        assert moved['links'] == [f"{base}/new/section/guide", f"{base}/new/about", f"{base}/new/section/sub"]
+
+    asyncio.run(run())
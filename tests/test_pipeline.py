@@ -0,0 +1,172 @@
+import asyncio
+from collections import Counter
+from contextlib import aclosing, asynccontextmanager
+
+import pytest
+
+from app.core.download import FetchError
+from app.core.pipeline import ScrapePipeline, interleave_hosts
+from app.core.scraper import AsyncWebScraper
+
+
+def test_interleave_hosts_takes_hosts_in_turn():
+    urls = [
+        "https://a.example/1", "https://a.example/2", "https://a.example/3",
+        "https://b.example/1", "https://B.example/2",
+        "https://c.example/1",
+    ]
+    assert list(interleave_hosts(urls)) == [
+        "https://a.example/1", "https://b.example/1", "https://c.example/1",
+        "https://a.example/2", "https://B.example/2",
+        "https://a.example/3",
+    ]
+
+
+def test_interleave_hosts_is_lazy_and_complete():
+    assert list(interleave_hosts([])) == []
+    urls = [f"https://host{index % 7}.example/{index}" for index in range(100)]
+    interleaved = interleave_hosts(urls)
+    assert next(interleaved) == urls[0]
+    assert sorted([urls[0], *interleaved]) == sorted(urls)
+
+
+PAGE = "<html><head><title>Page {index}</title></head><body><p>Paragraph {index} has a sentence worth summarising.</p></body></html>"
+
+
+class FakeFetcher:
+    """Stands in for AsyncWebScraper.fetch_page, counting calls per URL."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.calls = Counter()
+
+    async def __call__(self, url, validators=None):
+        self.calls[url] += 1
+        await asyncio.sleep(self.delays.get(url, 0.001))
+        if url in self.failing:
+            raise FetchError("broken page")
+        html = PAGE.format(index=url.rsplit('/', 1)[-1])
+        return {
+            'url': url, 'status': 200, 'not_modified': False, 'html': html, 'bytes': len(html),
+            'validators': {'etag': None, 'last_modified': None, 'body_hash': url}
+        }
+
+
+@asynccontextmanager
+async def scraper_with(make_runtime, fetcher):
+    async with make_runtime() as runtime, AsyncWebScraper(runtime=runtime) as scraper:
+        scraper.fetch_page = fetcher
+        yield scraper
+
+
+def test_results_are_yielded_as_pages_finish(make_runtime):
+    urls = [f"https://example.com/{index}" for index in range(5)]
+    fetcher = FakeFetcher(delays={urls[0]: 0.3})
+
+    async def run():
+        async with scraper_with(make_runtime, fetcher) as scraper:
+            return [result async for result in ScrapePipeline(scraper).run(urls, {})]
+
+    results = asyncio.run(run())
+    assert sorted(result['url'] for result in results) == urls
+    # The slow first URL does not hold back the others
+    assert results[-1]['url'] == urls[0]
+    assert results[0]['summary_source'] == 'llm'
+    assert results[0]['title'] == "Page 1"
+
+
+def test_queues_bound_the_pages_in_progress(make_runtime):
+    urls = [f"https://example.com/{index}" for index in range(30)]
+    fetcher = FakeFetcher()
+
+    async def run():
+        async with scraper_with(make_runtime, fetcher) as scraper:
+            pipeline = ScrapePipeline(scraper, queue_size=2, fetch_workers=2, extract_workers=1, summarise_workers=1)
+            results = []
+            async for result in pipeline.run(urls, {}):
+                results.append(result)
+                if len(results) == 1:
+                    # A stalled consumer stops the stages once every worker and queue is full
+                    await asyncio.sleep(0.3)
+                    fetched = sum(fetcher.calls.values())
+            return fetched, results
+
+    fetched, results = asyncio.run(run())
+    # Workers (2 + 1 + 1), three queues of 2 and the result being handled
+    assert fetched <= 2 + 1 + 1 + 3 * 2 + 1
+    assert len(results) == 30
+
+
+def test_failed_pages_become_error_results(make_runtime):
+    urls = ["https://example.com/1", "https://example.com/2"]
+    fetcher = FakeFetcher(failing=[urls[1]])
+
+    async def run():
+        async with scraper_with(make_runtime, fetcher) as scraper:
+            return {result['url']: result async for result in ScrapePipeline(scraper).run(urls, {})}
+
+    results = asyncio.run(run())
+    assert results[urls[1]]['error_type'] == 'fetch_error'
+    assert 'fetch_ms' in results[urls[1]]['timings']
+    assert 'error' not in results[urls[0]]
+
+
+def test_a_stage_worker_error_reaches_the_consumer(make_runtime):
+    urls = [f"https://example.com/{index}" for index in range(3)]
+
+    async def run():
+        async with scraper_with(make_runtime, FakeFetcher()) as scraper:
+            async def broken(stage, page):
+                raise RuntimeError("bug in a stage")
+
+            scraper.run_stage = broken
+            with pytest.raises(RuntimeError, match="bug in a stage"):
+                async for _ in ScrapePipeline(scraper).run(urls, {}):
+                    pass
+            assert scraper.runtime.in_flight == {}
+
+    asyncio.run(run())
+
+
+def test_consumer_leaving_early_stops_the_pipeline(make_runtime):
+    urls = [f"https://example.com/{index}" for index in range(50)]
+    fetcher = FakeFetcher(delays={url: 0.02 for url in urls})
+
+    async def run():
+        async with scraper_with(make_runtime, fetcher) as scraper:
+            pipeline = ScrapePipeline(scraper, fetch_workers=4)
+            async with aclosing(pipeline.run(urls, {})) as results:
+                async for _ in results:
+                    break
+            # URLs claimed but unfinished are released for other jobs
+            assert scraper.runtime.in_flight == {}
+            assert pipeline.claimed == {}
+            fetched = sum(fetcher.calls.values())
+            await asyncio.sleep(0.2)
+            assert sum(fetcher.calls.values()) == fetched < len(urls)
+
+    asyncio.run(run())
+
+
+def test_concurrent_pipelines_share_one_scrape_per_url(make_runtime):
+    shared_urls = [f"https://example.com/{index}" for index in range(10)]
+    fetcher = FakeFetcher(delays={url: 0.05 for url in shared_urls})
+
+    async def run():
+        async with make_runtime() as runtime:
+            async def job():
+                async with AsyncWebScraper(runtime=runtime) as scraper:
+                    scraper.fetch_page = fetcher
+                    return [result async for result in ScrapePipeline(scraper).run(shared_urls, {})]
+
+            first, second = await asyncio.gather(job(), job())
+            return runtime, first, second
+
+    runtime, first, second = asyncio.run(run())
+    assert set(fetcher.calls) == set(shared_urls)
+    assert set(fetcher.calls.values()) == {1}
+    assert runtime.scrape_stats['shared'] == len(shared_urls)
+    assert runtime.in_flight == {}
+    summaries = {result['url']: result['summary'] for result in first}
+    assert all(summaries[result['url']] == result['summary'] for result in second)
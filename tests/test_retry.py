@@ -0,0 +1,161 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from app.core.download import FetchError
+from app.core.retry import (
+    MAX_RETRY_AFTER,
+    CircuitBreaker,
+    CircuitOpenError,
+    HostBreakers,
+    RetryPolicy,
+    classify,
+    fetch_with_retries,
+    retry_after
+)
+
+
+def response_error(status: int, headers=None) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers)
+
+
+def test_classify():
+    assert classify(response_error(429)) == 'throttled'
+    assert classify(response_error(503)) == 'throttled'
+    assert classify(response_error(502)) == 'server_error'
+    assert classify(response_error(408)) == 'server_error'
+    assert classify(response_error(404)) is None
+    assert classify(asyncio.TimeoutError()) == 'timeout'
+    assert classify(aiohttp.ServerDisconnectedError()) == 'connection'
+    assert classify(FetchError("not html")) is None
+    assert classify(ValueError()) is None
+
+
+def test_retry_policy_delays():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0, max_retry_after=60.0)
+    assert policy.delay(None, 1) is None
+    assert policy.delay('timeout', 2) is None
+    assert policy.delay('throttled', 4) is None
+    for attempt in range(1, 4):
+        assert 0 <= policy.delay('throttled', attempt) <= min(4.0, 2 ** (attempt - 1))
+    # A Retry-After hint is waited out unless it is longer than we would wait
+    assert policy.delay('throttled', 1, hint=10.0) == 10.0
+    assert policy.delay('throttled', 1, hint=61.0) is None
+    assert RetryPolicy(max_attempts=1).delay('throttled', 1) is None
+    assert RetryPolicy(attempts={'timeout': 5}).delay('throttled', 1) is None
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10.0, max_reset_seconds=15.0)
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats == {'opened': 1, 'rejected': 1}
+
+    # Once due, a single probe is let through
+    breaker.opened_at -= 10.0
+    breaker.check()
+    breaker.allow()
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    # A failed probe opens it again for twice as long, up to the maximum
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.open_for == 15.0
+
+    breaker.opened_at -= 15.0
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.open_for == 10.0
+    breaker.allow()
+
+
+def test_fetch_with_retries():
+    async def run():
+        policy = RetryPolicy(base_delay=0.001, max_delay=0.001)
+        breaker = CircuitBreaker(failure_threshold=10)
+        calls = []
+
+        async def flaky(admit):
+            admit()
+            calls.append(1)
+            if len(calls) < 3:
+                raise response_error(502)
+            return "page"
+
+        assert await fetch_with_retries("https://example.com/", flaky, policy, breaker) == "page"
+        assert len(calls) == 3
+        assert breaker.failures == 0
+
+        async def missing(admit):
+            admit()
+            raise response_error(404)
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            await fetch_with_retries("https://example.com/", missing, policy, breaker)
+
+        sent = []
+
+        async def down(admit):
+            admit()
+            sent.append(1)
+            raise aiohttp.ServerDisconnectedError()
+
+        # The second failure opens the breaker, so the third attempt is never sent
+        breaker = CircuitBreaker(failure_threshold=2)
+        with pytest.raises(CircuitOpenError):
+            await fetch_with_retries("https://example.com/", down, policy, breaker)
+        assert len(sent) == 2
+        with pytest.raises(CircuitOpenError):
+            await fetch_with_retries("https://example.com/other", down, policy, breaker)
+        assert len(sent) == 2
+
+    asyncio.run(run())
+
+
+def test_retry_after_seconds_and_dates():
+    assert retry_after({'Retry-After': ' 12 '}) == 12.0
+    assert retry_after({'Retry-After': '-5'}) == 0.0
+    assert retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+    assert retry_after({}) is None
+    assert retry_after(None) is None
+    assert retry_after({'Retry-After': 'soon'}) is None
+
+
+def test_retry_after_rejects_non_finite_and_clamps():
+    for value in ('inf', 'Infinity', '-inf', 'nan', '1e400'):
+        assert retry_after({'Retry-After': value}) is None
+    assert retry_after({'Retry-After': '99999999'}) == MAX_RETRY_AFTER
+    assert retry_after({'Retry-After': 'Fri, 31 Dec 9999 23:59:59 GMT'}) == MAX_RETRY_AFTER
+
+
+def test_idle_closed_breakers_are_evicted():
+    breakers = HostBreakers(failure_threshold=1, idle_seconds=0, min_hosts=4)
+    breakers.for_url("https://failing.example/").record_failure()
+    for index in range(3):
+        breakers.for_url(f"https://host{index}.example/")
+    assert len(breakers.hosts) == 4
+
+    breakers.for_url("https://new.example/")
+    # The open breaker is kept, the idle closed ones are dropped
+    assert set(breakers.hosts) == {"failing.example", "new.example"}
+    stats = breakers.stats()
+    assert stats['evicted'] == 3
+    assert stats['opened'] == 1
+
+
+def test_breakers_in_use_are_kept():
+    breakers = HostBreakers(idle_seconds=3600, min_hosts=2)
+    first = breakers.for_url("https://a.example/")
+    breakers.for_url("https://b.example/")
+    breakers.for_url("https://c.example/")
+    assert breakers.for_url("https://a.example/x") is first
+    assert len(breakers.hosts) == 3
+    # The next sweep waits until the hosts double
+    assert breakers.evict_at == 4
@@ -0,0 +1,69 @@
+import asyncio
+import gzip
+
+import aiohttp
+from aiohttp import web
+
+from app.core.scheduler import ROBOTS_MAX_BYTES, HostScheduler
+
+
+def test_idle_hosts_are_evicted():
+    async def run():
+        scheduler = HostScheduler(per_host_rate=1000, idle_seconds=0, min_hosts=2)
+        async with scheduler.slot("https://busy.example/"):
+            async with scheduler.slot("https://a.example/"):
+                pass
+            async with scheduler.slot("https://b.example/"):
+                pass
+            scheduler.host_state("c.example")
+            # Hosts with a request in progress are never dropped
+            assert set(scheduler.hosts) == {"busy.example", "c.example"}
+        assert scheduler.evicted == 2
+
+    asyncio.run(run())
+
+
+def test_recently_used_hosts_are_kept():
+    async def run():
+        scheduler = HostScheduler(per_host_rate=1000, idle_seconds=3600, min_hosts=1)
+        for host in ("a", "b", "c"):
+            async with scheduler.slot(f"https://{host}.example/"):
+                pass
+        assert len(scheduler.hosts) == 3
+        assert scheduler.stats()["a.example"]['requests'] == 1
+
+    asyncio.run(run())
+
+
+def robots_site(body: bytes, headers=None) -> web.Application:
+    async def robots(request: web.Request) -> web.Response:
+        return web.Response(body=body, headers={'Content-Type': 'text/plain', **(headers or {})})
+
+    app = web.Application()
+    app.router.add_get('/robots.txt', robots)
+    return app
+
+
+def crawl_rate(serve, body: bytes, headers=None) -> float:
+    async def run():
+        async with serve(robots_site(body, headers)) as base, aiohttp.ClientSession() as session:
+            scheduler = HostScheduler(per_host_rate=4, respect_robots=True)
+            async with scheduler.slot(f"{base}/page", session):
+                pass
+            return next(iter(scheduler.hosts.values())).bucket.rate
+
+    return asyncio.run(run())
+
+
+def test_robots_crawl_delay_slows_the_host(serve):
+    robots = b"User-agent: *\nCrawl-delay: 2\n"
+    assert crawl_rate(serve, robots) == 0.5
+    assert crawl_rate(serve, gzip.compress(robots), {'Content-Encoding': 'gzip'}) == 0.5
+
+
+def test_oversized_robots_is_treated_as_no_rules(serve):
+    padding = b"# " + b"x" * ROBOTS_MAX_BYTES + b"\n"
+    assert crawl_rate(serve, b"User-agent: *\nCrawl-delay: 2\n" + padding) == 4
+    # A small body that inflates past the limit is cut off too
+    bomb = gzip.compress(b"User-agent: *\nCrawl-delay: 2\n" + b" " * (ROBOTS_MAX_BYTES * 4))
+    assert crawl_rate(serve, bomb, {'Content-Encoding': 'gzip'}) == 4
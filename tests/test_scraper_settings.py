@@ -0,0 +1,30 @@
+from app.core.scraper import AsyncWebScraper
+
+
+def test_runtime_fills_in_only_settings_left_unset(make_runtime):
+    runtime = make_runtime(
+        extraction_engine="stream", max_page_bytes=1000, token_budget=500,
+        extractive_min_confidence=0.9, extractive_max_chars=100
+    )
+    try:
+        inherited = AsyncWebScraper(runtime=runtime)
+        assert inherited.extraction_engine == "stream"
+        assert inherited.max_page_bytes == 1000
+        assert inherited.token_budget == 500
+        assert inherited.extractive_min_confidence == 0.9
+        assert inherited.extractive_max_chars == 100
+        # The runtime's session carries the timeout
+        assert inherited.timeout is None
+
+        explicit = AsyncWebScraper(
+            runtime=runtime, extraction_engine="soup", max_page_bytes=2000, token_budget=0,
+            extractive_min_confidence=0.1, extractive_max_chars=0, timeout=3
+        )
+        assert explicit.extraction_engine == "soup"
+        assert explicit.max_page_bytes == 2000
+        assert explicit.token_budget == 0
+        assert explicit.extractive_min_confidence == 0.1
+        assert explicit.extractive_max_chars == 0
+        assert explicit.timeout == 3
+    finally:
+        runtime.parse_executor.shutdown()
@@ -0,0 +1,52 @@
+import asyncio
+
+from sqlalchemy.exc import OperationalError
+
+from app.core.simhash import SimHashIndex, hamming_distance, simhash
+
+ARTICLE = " ".join(f"sentence {index} of the article talks about topic {index % 7} at some length." for index in range(60))
+
+
+class BrokenSession:
+    """Session factory whose database is down."""
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        raise OperationalError("SELECT 1", {}, ConnectionRefusedError("database is down"))
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_simhash_of_near_duplicates_is_close():
+    fingerprint = simhash(ARTICLE)
+    assert hamming_distance(fingerprint, simhash(ARTICLE + " Updated today.")) <= 3
+    assert hamming_distance(fingerprint, simhash(ARTICLE.replace("article", "essay"))) > 3
+    assert simhash("too short") is None
+
+
+def test_index_keeps_one_entry_per_content_id():
+    index = SimHashIndex(max_distance=3)
+    index.add(1, 0b1111)
+    index.add(2, 0b0111)
+    index.add(1, 0b1110)
+    assert index.size == 2
+    assert index.candidates(0b1110) == [(1, 0), (2, 2)]
+    assert index.candidates(0b1110, limit=1) == [(1, 0)]
+
+
+def test_database_errors_mean_no_near_duplicate():
+    async def run():
+        index = SimHashIndex(session_factory=BrokenSession())
+        fingerprint = simhash(ARTICLE)
+        # Refresh fails and the index stays empty
+        assert await index.find_summary(fingerprint) is None
+        # A candidate whose row cannot be read is not lent either
+        index.add(7, fingerprint)
+        assert await index.find_summary(fingerprint) is None
+        assert index.stats['database_errors'] == 2
+        assert index.stats['matches'] == 0
+
+    asyncio.run(run())
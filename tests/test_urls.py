@@ -0,0 +1,39 @@
+from app.core.urls import canonicalize_url, dedupe_urls, resolve_links
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTPS://Example.COM:443/a/b/?utm_source=x&b=2&a=1#frag") == "https://example.com/a/b?b=2&a=1"
+    assert canonicalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert canonicalize_url(" http://user:pw@Example.com/x?fbclid=1 ") == "http://user:pw@example.com/x"
+    assert canonicalize_url("http://[::1]:80/") == "http://[::1]/"
+    # Blank values are kept, only tracking parameters are dropped
+    assert canonicalize_url("https://example.com/?q=&UTM_medium=m&gclid=g") == "https://example.com/?q="
+
+
+def test_canonicalize_url_keeps_query_as_given():
+    for query in ("a=1;b=2", "flag", "ids=3&ids=1", "q=two%20words", "q=a+b&x=%2F", "empty=&flag"):
+        assert canonicalize_url(f"https://example.com/search?{query}") == f"https://example.com/search?{query}"
+    assert canonicalize_url("https://example.com/?utm%5Fsource=x&&a=1&FBCLID") == "https://example.com/?a=1"
+
+
+def test_dedupe_urls_keeps_first_seen_order():
+    urls = [
+        "https://b.example/page/",
+        "https://a.example/",
+        "https://B.example/page#top",
+        "https://a.example/?utm_campaign=c",
+    ]
+    assert dedupe_urls(urls) == ["https://b.example/page", "https://a.example/"]
+    assert dedupe_urls([]) == []
+
+
+def test_resolve_links():
+    hrefs = ["guide", "/about/", "#top", "", "mailto:a@example.com", "javascript:void(0)",
+             "https://Other.example/x#y", "about", "http://[broken/"]
+    assert resolve_links("https://example.com/docs/page", hrefs) == [
+        "https://example.com/docs/guide",
+        "https://example.com/about",
+        "https://other.example/x",
+        "https://example.com/docs/about",
+    ]
+    assert resolve_links("https://example.com/page", ["x"], base_href="/base/") == ["https://example.com/base/x"]